@@ -8,16 +8,31 @@ against either local RDF files or remote SPARQL endpoints based on the MITRE ATT
 
 from typing import Any, Dict, List, Optional
 import os
+import re
 import argparse
 import json
+import io
 import sys
 import time
+import asyncio
+import functools
+import inspect
+import contextvars
+import threading
+import weakref
 import tiktoken
 import logging
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from collections.abc import AsyncIterator
 
 import rdflib
+from rdflib.graph import DATASET_DEFAULT_GRAPH_ID
+from rdflib.plugins.sparql import prepareQuery
+from rdflib.plugins.sparql.parserutils import CompValue
+from rdflib.plugins.sparql.sparql import Query
 from mcp.server.fastmcp import FastMCP, Context
 from mcp.server.fastmcp.prompts import base
 
@@ -39,11 +54,59 @@ except ImportError:
     HAS_SPARQLSTORE = False
     logger.warning("SPARQLStore not available. SPARQL Endpoint Mode will be disabled.")
 
+# Check for requests availability (pooled HTTP transport for endpoint mode)
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    HAS_REQUESTS = True
+except ImportError:
+    HAS_REQUESTS = False
+    logger.warning("requests not available. SPARQL Endpoint Mode will use SPARQLStore defaults.")
+
+# Check for Oxigraph availability (persistent on-disk store for Local File Mode)
+try:
+    import pyoxigraph
+    from oxrdflib import OxigraphStore
+    HAS_OXIGRAPH = True
+except ImportError:
+    HAS_OXIGRAPH = False
+
+STORE_EXTRA_MISSING = (
+    "pyoxigraph and oxrdflib are required for --store-path; install the `store` extra "
+    "(uv sync --extra store, or pip install -r mcp-cskg-rdf/requirements-store.txt)."
+)
+
 # Parse command-line arguments
 parser = argparse.ArgumentParser(description="MITRE ATT&CK SPARQL MCP Server v1.0.0")
 parser.add_argument("--rdf-file", default="", help="Path to the local RDF file containing MITRE ATT&CK data")
 parser.add_argument("--sparql-endpoint", default="", help="SPARQL endpoint URL (empty for Local File Mode)")
-args = parser.parse_args()
+parser.add_argument("--store-path", default="",
+                    help="Persistent Oxigraph store directory for Local File Mode (built from --rdf-file on first use)")
+parser.add_argument("--build-store", action="store_true",
+                    help="Convert --rdf-file into the --store-path store and exit")
+parser.add_argument("--transport", default="stdio", choices=["stdio", "sse", "streamable-http"],
+                    help="MCP transport; sse/streamable-http serve many clients from one loaded graph")
+parser.add_argument("--host", default="127.0.0.1", help="Bind address for sse/streamable-http (default: 127.0.0.1)")
+parser.add_argument("--port", type=int, default=8000, help="Port for sse/streamable-http (default: 8000)")
+parser.add_argument("--max-concurrency", type=int, default=8,
+                    help="Maximum tool calls running at once, also the query worker threads (default: 8)")
+parser.add_argument("--http-pool-size", type=int, default=16, help="Keep-alive connections to the SPARQL endpoint (default: 16)")
+parser.add_argument("--http-connect-timeout", type=float, default=5.0, help="Endpoint connect timeout in seconds (default: 5)")
+parser.add_argument("--http-read-timeout", type=float, default=60.0, help="Endpoint read timeout in seconds (default: 60)")
+parser.add_argument("--http-retries", type=int, default=3, help="Retries for failed endpoint requests (default: 3)")
+parser.add_argument("--http-backoff", type=float, default=0.5, help="Retry backoff factor in seconds (default: 0.5)")
+parser.add_argument("--cache-size", type=int, default=512, help="Maximum cached SPARQL results (default: 512, 0 disables)")
+parser.add_argument("--cache-ttl", type=float, default=3600, help="Default SPARQL result TTL in seconds (default: 3600)")
+parser.add_argument("--metrics-file", default="", help="Write server metrics as JSON to this file periodically")
+parser.add_argument("--metrics-interval", type=float, default=60, help="Seconds between metrics file writes (default: 60)")
+parser.add_argument("--no-keyword-index", action="store_true",
+                    help="Do not build the title/description keyword index in Local File Mode")
+parser.add_argument("--output-format", default="text", choices=["text", "tsv", "json"],
+                    help="Default tool result format; clients can switch with set_output_format (default: text)")
+# Only parse the command line when run as the server; importing the module for
+# in-process tool mode (scripts/run_sepses_mcp.py:load_server) keeps the defaults.
+args = parser.parse_args() if __name__ == "__main__" else parser.parse_args([])
 
 logger.info("Starting MITRE ATT&CK SPARQL MCP Server v1.0.0")
 
@@ -53,6 +116,7 @@ CAPEC = rdflib.Namespace("http://w3id.org/sepses/vocab/ref/capec#")
 RDF = rdflib.Namespace("http://www.w3.org/1999/02/22-rdf-syntax-ns#")
 RDFS = rdflib.Namespace("http://www.w3.org/2000/01/rdf-schema#")
 OWL = rdflib.Namespace("http://www.w3.org/2002/07/owl#")
+DCTERMS = rdflib.Namespace("http://purl.org/dc/terms/")
 
 STANDARD_PREFIX_BLOCK = """\
 PREFIX cve: <http://w3id.org/sepses/vocab/ref/cve#>
@@ -76,23 +140,283 @@ NAMESPACE_REWRITES = {
     "http://w3id.org/sepses/vocab/attack#": "http://w3id.org/sepses/vocab/ref/attack#",
 }
 
+# Prologue declarations and comments that may precede the query form keyword.
+QUERY_PROLOGUE_PATTERN = re.compile(r"(?:\s+|#[^\n]*|PREFIX\s+[\w-]*:\s*<[^>]*>|BASE\s*<[^>]*>)*", re.IGNORECASE)
+QUERY_FORMS = ("SELECT", "ASK", "CONSTRUCT", "DESCRIBE")
+
+def query_form(query: str) -> str:
+    """Return the form of a SPARQL query: SELECT, ASK, CONSTRUCT or DESCRIBE."""
+    body = query[QUERY_PROLOGUE_PATTERN.match(query).end():]
+    form = body[:9].upper()
+    for name in QUERY_FORMS:
+        if form.startswith(name):
+            return name
+    raise ValueError("Not a SPARQL query: expected SELECT, ASK, CONSTRUCT or DESCRIBE after the prefixes")
+
+class SparqlEndpoint:
+    """Pooled keep-alive HTTP client for a remote SPARQL endpoint.
+
+    Drop-in for the `SPARQLStore.query` / `close` calls the tools make: queries
+    are POSTed over a shared `requests.Session` (gzip, connect/read timeouts,
+    retries with exponential backoff) and the response is parsed into an
+    rdflib `Result`: SPARQL JSON for SELECT/ASK, N-Triples for the graph of a
+    CONSTRUCT/DESCRIBE. Every request's latency is recorded.
+    """
+
+    RETRY_STATUS = (429, 500, 502, 503, 504)
+    # Accept header per query form; graph forms are answered as N-Triples.
+    ACCEPT = {
+        "SELECT": "application/sparql-results+json",
+        "ASK": "application/sparql-results+json",
+        "CONSTRUCT": "application/n-triples",
+        "DESCRIBE": "application/n-triples",
+    }
+
+    def __init__(
+        self,
+        endpoint: str,
+        pool_size: int = 16,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 60.0,
+        retries: int = 3,
+        backoff: float = 0.5,
+        sample_size: int = 1000,
+    ):
+        self.endpoint = endpoint
+        self.timeout = (connect_timeout, read_timeout)
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff,
+            status_forcelist=self.RETRY_STATUS,
+            allowed_methods=frozenset({"GET", "POST"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry, pool_block=True)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Accept-Encoding": "gzip, deflate"})
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=sample_size)
+        self.metrics = {"requests": 0, "errors": 0, "bytes": 0, "total_time": 0.0}
+
+    def query(self, query: str):
+        form = query_form(query)
+        start_time = time.time()
+        try:
+            response = self.session.post(
+                self.endpoint, data={"query": query}, headers={"Accept": self.ACCEPT[form]}, timeout=self.timeout
+            )
+            response.raise_for_status()
+        except Exception:
+            with self._lock:
+                self.metrics["errors"] += 1
+            raise
+        finally:
+            elapsed = time.time() - start_time
+            with self._lock:
+                self.metrics["requests"] += 1
+                self.metrics["total_time"] += elapsed
+                self._latencies.append(elapsed)
+        with self._lock:
+            self.metrics["bytes"] += len(response.content)
+        logger.debug(f"SPARQL endpoint request took {elapsed * 1000:.1f} ms ({len(response.content)} bytes)")
+        if form in ("CONSTRUCT", "DESCRIBE"):
+            result = rdflib.query.Result(form)
+            result.graph = rdflib.Graph().parse(data=response.content, format="nt")
+            return result
+        return rdflib.query.Result.parse(io.BytesIO(response.content), format="json")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Request counters plus latency percentiles over the recent sample window."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            metrics = dict(self.metrics)
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+        return {
+            "endpoint": self.endpoint,
+            **metrics,
+            "total_time": round(metrics["total_time"], 3),
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "max_ms": round(latencies[-1] * 1000, 1) if latencies else 0.0,
+        }
+
+    def close(self) -> None:
+        self.session.close()
+
 # Initialize FastMCP server
 mcp = FastMCP(
     "MITRE ATT&CK SPARQL",
     dependencies=["rdflib[sparql]"],
-    lifespan=lambda mcp: attack_triplestore_lifespan(mcp, args.rdf_file, args.sparql_endpoint)
+    lifespan=lambda mcp: attack_triplestore_lifespan(mcp, args.rdf_file, args.sparql_endpoint, args.store_path),
+    host=args.host,
+    port=args.port,
 )
 
-@asynccontextmanager
-async def attack_triplestore_lifespan(server: FastMCP, rdf_file: str, sparql_endpoint: str) -> AsyncIterator[Dict[str, Any]]:
-    """Manage the lifespan of the MITRE ATT&CK triplestore.
+# The lifespan runs once per client session. The loaded graph is shared by all
+# sessions so that in sse/streamable-http mode it is loaded once per process.
+_shared_context: Optional[Dict[str, Any]] = None
+_shared_sessions = 0
+_shared_lock = asyncio.Lock()
+# Settings a client changes with set_max_tokens/set_output_format, per MCP
+# session, so that one client cannot change another's budget or format. The
+# shared context holds the server defaults. Without a session object
+# (in-process tool mode, one client) the overrides live in the context.
+_session_settings: "weakref.WeakKeyDictionary[Any, Dict[str, Any]]" = weakref.WeakKeyDictionary()
+_session_settings_lock = threading.Lock()
+
+def _session_overrides(ctx: Context, create: bool = False) -> Optional[Dict[str, Any]]:
+    """The calling session's setting overrides (created on demand with `create`)."""
+    session = getattr(getattr(ctx, "request_context", None), "session", None)
+    if session is None:
+        context = ctx.request_context.lifespan_context
+        return context.setdefault("session_settings", {}) if create else context.get("session_settings")
+    with _session_settings_lock:
+        return _session_settings.setdefault(session, {}) if create else _session_settings.get(session)
+
+def session_setting(ctx: Context, name: str, default: Any = None) -> Any:
+    """Return a setting of the calling session, else the server default from the lifespan context."""
+    overrides = _session_overrides(ctx)
+    if overrides and name in overrides:
+        return overrides[name]
+    return ctx.request_context.lifespan_context.get(name, default)
+
+def set_session_setting(ctx: Context, name: str, value: Any) -> None:
+    """Change a setting for the calling session only."""
+    _session_overrides(ctx, create=True)[name] = value
+
+def resolve_data_path(path: str) -> str:
+    """Resolve a data path relative to this file (absolute paths are kept)."""
+    return os.path.join(os.path.dirname(__file__), path)
+
+def build_store(rdf_file: str, store_path: str) -> int:
+    """Parse a Turtle file once into a persistent Oxigraph store.
+
+    Args:
+        rdf_file (str): Path to the local RDF file.
+        store_path (str): Directory of the store to create.
+
+    Returns:
+        int: Number of triples in the store.
+    """
+    if not HAS_OXIGRAPH:
+        raise RuntimeError(STORE_EXTRA_MISSING)
+    file_path, store_dir = resolve_data_path(rdf_file), resolve_data_path(store_path)
+    if os.path.exists(store_dir) and os.listdir(store_dir):
+        raise ValueError(f"Store directory already exists and is not empty: {store_dir}")
+    logger.info(f"Building Oxigraph store {store_dir} from {file_path}")
+    start_time = time.time()
+    store = pyoxigraph.Store(store_dir)
+    store.bulk_load(path=file_path, format=pyoxigraph.RdfFormat.TURTLE)
+    store.optimize()
+    triples = len(store)
+    store.flush()
+    del store
+    logger.info(f"Built store with {triples} triples in {time.time() - start_time:.1f}s")
+    return triples
+
+def open_store(store_path: str) -> rdflib.Graph:
+    """Open a persistent Oxigraph store read-only, so several server processes can share it."""
+    if not HAS_OXIGRAPH:
+        raise RuntimeError(STORE_EXTRA_MISSING)
+    store = OxigraphStore(store=pyoxigraph.Store.read_only(resolve_data_path(store_path)))
+    # bulk_load fills the default graph; bind to it rather than a fresh named graph.
+    return rdflib.Graph(store=store, identifier=DATASET_DEFAULT_GRAPH_ID)
+
+#################################################################
+# Keyword Index
+#################################################################
+
+# Above this many candidates a VALUES block is no cheaper than the FILTER scan.
+KEYWORD_VALUES_LIMIT = 2000
+NO_MATCH = "urn:sepses:keyword-index:no-match"
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens."""
+    return re.findall(r"\w+", text.lower())
+
+class KeywordIndex:
+    """Inverted index from title/description tokens to subjects for the *_by_keyword tools.
+
+    `lookup` returns a superset of the subjects whose text CONTAINS the keyword:
+    every keyword token must be a substring of some token of the same field.
+    The tools keep their FILTER, so results are unchanged while rdflib only
+    evaluates the candidates instead of scanning the whole class.
+    """
+
+    FIELDS = {"title": DCTERMS.title, "description": DCTERMS.description}
+
+    def __init__(self, graph: rdflib.Graph):
+        self.postings: Dict[str, Dict[str, set]] = {field: {} for field in self.FIELDS}
+        for field, predicate in self.FIELDS.items():
+            postings = self.postings[field]
+            for subject, _, text in graph.triples((None, predicate, None)):
+                if not isinstance(subject, rdflib.URIRef):
+                    continue
+                for token in set(tokenize(str(text))):
+                    postings.setdefault(token, set()).add(subject)
+        # Lookups may run in worker threads; lru_cache is thread-safe.
+        self._matching = functools.lru_cache(maxsize=1024)(self._scan)
+
+    def _scan(self, field: str, token: str) -> frozenset:
+        """Subjects with a `field` token containing `token`."""
+        subjects = set()
+        for candidate, owners in self.postings[field].items():
+            if token in candidate:
+                subjects |= owners
+        return frozenset(subjects)
+
+    def lookup(self, keyword: str, fields: tuple = ("title",)) -> Optional[set]:
+        """Candidate subjects for `keyword` in any of `fields`, or None if it has no word tokens."""
+        tokens = tokenize(keyword)
+        if not tokens:
+            return None
+        result = set()
+        for field in fields:
+            subjects = None
+            for token in tokens:
+                matching = self._matching(field, token)
+                subjects = set(matching) if subjects is None else subjects & matching
+                if not subjects:
+                    break
+            result |= subjects
+        return result
+
+    def __len__(self) -> int:
+        return sum(len(postings) for postings in self.postings.values())
+
+def keyword_candidates(ctx: Context, keyword: str, fields: tuple = ("title",)) -> Optional[List[rdflib.URIRef]]:
+    """Return the keyword index candidates for a tool's candidate slot.
+
+    None means the tool should scan with its FILTER alone (endpoint mode,
+    index disabled, or too many candidates). The slot goes first in the
+    WHERE clause so rdflib evaluates the patterns per candidate.
+    """
+    index = ctx.request_context.lifespan_context.get("keyword_index")
+    if index is None:
+        return None
+    subjects = index.lookup(keyword, fields)
+    if subjects is None or len(subjects) > KEYWORD_VALUES_LIMIT:
+        return None
+    # An empty VALUES block is rejected by some engines; bind a subject that never matches.
+    return sorted(subjects) or [rdflib.URIRef(NO_MATCH)]
+
+def load_triplestore(rdf_file: str, sparql_endpoint: str, store_path: str = "") -> Dict[str, Any]:
+    """Connect to the SPARQL endpoint, open the persistent store, or parse the local RDF file.
 
     Args:
-        server (FastMCP): The FastMCP server instance.
         rdf_file (str): Path to the local RDF file.
         sparql_endpoint (str): URL of the SPARQL endpoint, if any.
+        store_path (str): Persistent Oxigraph store directory, if any.
 
-    Yields:
+    Returns:
         Dict[str, Any]: Context dictionary containing the graph and configuration.
     """
     logger.info(f"Initializing MITRE ATT&CK triplestore with rdf_file={rdf_file}, sparql_endpoint={sparql_endpoint}")
@@ -100,82 +424,644 @@ async def attack_triplestore_lifespan(server: FastMCP, rdf_file: str, sparql_end
     metrics = {"queries": 0, "total_time": 0.0}
     max_tokens = 10000
     active_endpoint = sparql_endpoint if sparql_endpoint else None
+    is_sparql_endpoint = bool(sparql_endpoint and (HAS_REQUESTS or HAS_SPARQLSTORE))
     
-    if sparql_endpoint and HAS_SPARQLSTORE:
+    if is_sparql_endpoint:
         logger.info(f"Connecting to SPARQL endpoint: {sparql_endpoint}")
         try:
-            graph = SPARQLStore(query_endpoint=sparql_endpoint)
+            if HAS_REQUESTS:
+                graph = SparqlEndpoint(
+                    sparql_endpoint,
+                    pool_size=args.http_pool_size,
+                    connect_timeout=args.http_connect_timeout,
+                    read_timeout=args.http_read_timeout,
+                    retries=args.http_retries,
+                    backoff=args.http_backoff,
+                )
+            else:
+                graph = SPARQLStore(query_endpoint=sparql_endpoint)
             # Test connection
             graph.query("SELECT ?s WHERE { ?s ?p ?o } LIMIT 1")
             logger.info(f"Successfully connected to {sparql_endpoint}")
         except Exception as e:
             logger.error(f"Failed to connect to SPARQL endpoint: {str(e)}")
             raise
+    elif store_path:
+        start_time = time.time()
+        if not os.path.isdir(resolve_data_path(store_path)):
+            if not rdf_file:
+                raise FileNotFoundError(f"Store not found and no --rdf-file to build it from: {store_path}")
+            build_store(rdf_file, store_path)
+        graph = open_store(store_path)
+        logger.info(f"Opened persistent store {store_path} with {len(graph)} triples in {time.time() - start_time:.2f}s")
     else:
         graph = rdflib.Graph()
-        file_path = os.path.join(os.path.dirname(__file__), rdf_file)
+        file_path = resolve_data_path(rdf_file)
         logger.info(f"Loading local RDF file: {file_path}")
         try:
+            start_time = time.time()
             graph.parse(file_path, format="turtle")
-            logger.info(f"Loaded {len(graph)} triples from local file")
+            logger.info(f"Loaded {len(graph)} triples from local file in {time.time() - start_time:.2f}s")
         except FileNotFoundError:
             logger.error(f"RDF file not found: {file_path}")
             raise
         except Exception as e:
             logger.error(f"Failed to load RDF file: {str(e)}")
             raise    
+    keyword_index = None
+    if not is_sparql_endpoint and not args.no_keyword_index:
+        start_time = time.time()
+        keyword_index = KeywordIndex(graph)
+        logger.info(f"Built keyword index with {len(keyword_index)} tokens in {time.time() - start_time:.2f}s")
+    logger.info("MITRE ATT&CK triplestore initialized successfully")
+    return {
+        "graph": graph,
+        "metrics": metrics,
+        "max_tokens": max_tokens,
+        "output_format": args.output_format,
+        "keyword_index": keyword_index,
+        "rdf_file": rdf_file,
+        "store_path": store_path,
+        "sparql_endpoint": sparql_endpoint,
+        "is_sparql_endpoint": is_sparql_endpoint,
+        "active_external_endpoint": active_endpoint
+    }
+
+@asynccontextmanager
+async def attack_triplestore_lifespan(server: FastMCP, rdf_file: str, sparql_endpoint: str, store_path: str = "") -> AsyncIterator[Dict[str, Any]]:
+    """Manage the lifespan of the MITRE ATT&CK triplestore.
+
+    The first session loads the triplestore; later sessions reuse it. In stdio
+    mode it is closed with the last session, in network mode it stays resident.
+
+    Args:
+        server (FastMCP): The FastMCP server instance.
+        rdf_file (str): Path to the local RDF file.
+        sparql_endpoint (str): URL of the SPARQL endpoint, if any.
+        store_path (str): Persistent Oxigraph store directory, if any.
+
+    Yields:
+        Dict[str, Any]: Context dictionary containing the graph and configuration.
+    """
+    global _shared_context, _shared_sessions
+    async with _shared_lock:
+        if _shared_context is None:
+            # Parsing a large file takes seconds; keep the event loop serving meanwhile.
+            _shared_context = await asyncio.to_thread(load_triplestore, rdf_file, sparql_endpoint, store_path)
+            sparql_cache.invalidate()
+            if args.metrics_file:
+                start_metrics_dump(args.metrics_file, args.metrics_interval)
+        _shared_sessions += 1
+        context = _shared_context
     try:
-        logger.info("MITRE ATT&CK triplestore initialized successfully")
-        yield {
-            "graph": graph,
-            "metrics": metrics,
-            "max_tokens": max_tokens,
-            "rdf_file": rdf_file,
-            "sparql_endpoint": sparql_endpoint,
-            "is_sparql_endpoint": bool(sparql_endpoint and HAS_SPARQLSTORE),
-            "active_external_endpoint": active_endpoint
-        }
+        yield context
     finally:
-        logger.info("Shutting down MITRE ATT&CK triplestore connection")
-        if sparql_endpoint and HAS_SPARQLSTORE:
+        async with _shared_lock:
+            _shared_sessions -= 1
+            if _shared_sessions == 0 and args.transport == "stdio":
+                logger.info("Shutting down MITRE ATT&CK triplestore connection")
+                if context["is_sparql_endpoint"]:
+                    try:
+                        context["graph"].close()
+                    except:
+                        pass
+                _shared_context = None
+
+#################################################################
+# SPARQL Result Cache
+#################################################################
+
+# ATT&CK catalogue listings change with MITRE releases, not between queries.
+CATALOG_TTL = 86400
+
+# Page size of the get_all_* listing tools.
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+class SparqlResultCache:
+    """LRU cache with per-entry expiry for formatted SPARQL results.
+
+    Keys are (prepared query, include_description, max_tokens, output
+    format); the TTL is
+    chosen per tool at lookup time, so one entry can be fresh for one tool
+    and stale for another.
+    """
+
+    def __init__(self, max_entries: int, default_ttl: float):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[tuple, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, key: tuple, ttl: Optional[float] = None) -> Optional[Any]:
+        ttl = self.default_ttl if ttl is None else ttl
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or ttl <= 0:
+                self.stats["misses"] += 1
+                return None
+            stored_at, value = entry
+            if time.time() - stored_at > ttl:
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return value
+
+    def put(self, key: tuple, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def invalidate(self, contains: str = "") -> int:
+        """Drop every entry, or only those whose query contains the given text."""
+        with self._lock:
+            keys = [key for key in self._entries if not contains or contains in key[0]]
+            for key in keys:
+                del self._entries[key]
+            self.stats["invalidations"] += 1
+            return len(keys)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "default_ttl": self.default_ttl,
+                "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+            }
+
+sparql_cache = SparqlResultCache(args.cache_size, args.cache_ttl)
+# Per-tool TTL overrides registered through tool(ttl=...).
+tool_cache_ttls: Dict[str, float] = {}
+# Name of the MCP tool currently being served (nested tool calls keep the outer one).
+current_tool: ContextVar[Optional[str]] = ContextVar("current_tool", default=None)
+
+def cache_ttl() -> float:
+    """TTL for results produced under the current tool call."""
+    return tool_cache_ttls.get(current_tool.get(), sparql_cache.default_ttl)
+
+#################################################################
+# Tool Metrics
+#################################################################
+
+class ToolMetrics:
+    """Per-tool call and error counts, latency percentiles, SPARQL rows and response bytes.
+
+    Latency percentiles cover the most recent `window` calls of each tool.
+    """
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._tools: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, name: str) -> Dict[str, Any]:
+        return self._tools.setdefault(name, {
+            "calls": 0, "errors": 0, "rows": 0, "bytes": 0, "total_time": 0.0,
+            "latencies": deque(maxlen=self.window),
+        })
+
+    def record_call(self, name: str, seconds: float, error: bool = False, size: int = 0) -> None:
+        with self._lock:
+            entry = self._entry(name)
+            entry["calls"] += 1
+            entry["errors"] += int(error)
+            entry["bytes"] += size
+            entry["total_time"] += seconds
+            entry["latencies"].append(seconds)
+
+    def record_rows(self, name: str, rows: int) -> None:
+        """Count rows returned by SPARQL queries run for a tool (cache hits run none)."""
+        with self._lock:
+            self._entry(name)["rows"] += rows
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            entries = {name: {**entry, "latencies": sorted(entry["latencies"])} for name, entry in self._tools.items()}
+        snapshot = {}
+        for name, entry in sorted(entries.items()):
+            latencies = entry.pop("latencies")
+            def percentile(p: float) -> float:
+                if not latencies:
+                    return 0.0
+                return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+            snapshot[name] = {
+                **entry,
+                "total_time": round(entry["total_time"], 3),
+                "p50_ms": percentile(0.50),
+                "p95_ms": percentile(0.95),
+                "p99_ms": percentile(0.99),
+                "max_ms": round(latencies[-1] * 1000, 1) if latencies else 0.0,
+            }
+        return snapshot
+
+tool_metrics = ToolMetrics()
+_metrics_dumper: Optional[threading.Thread] = None
+
+def server_metrics(context: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Everything the server measures, as one JSON-serializable dict."""
+    metrics: Dict[str, Any] = {
+        "timestamp": time.time(),
+        "tools": tool_metrics.snapshot(),
+        "cache": sparql_cache.snapshot(),
+        "pool": {**pool_stats, "wait_time": round(pool_stats["wait_time"], 3), "run_time": round(pool_stats["run_time"], 3)},
+    }
+    if context is not None:
+        metrics["queries"] = {**context["metrics"], "total_time": round(context["metrics"]["total_time"], 3)}
+        if isinstance(context["graph"], SparqlEndpoint):
+            metrics["endpoint"] = context["graph"].snapshot()
+    return metrics
+
+def start_metrics_dump(path: str, interval: float) -> None:
+    """Write server metrics to `path` every `interval` seconds from a daemon thread (once per process)."""
+    global _metrics_dumper
+    if _metrics_dumper is not None:
+        return
+
+    def dump_forever():
+        while True:
+            time.sleep(interval)
             try:
-                graph.close()
-            except:
-                pass
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(server_metrics(_shared_context), f, indent=2)
+                # Readers never see a half-written file.
+                os.replace(tmp_path, path)
+            except Exception as e:
+                logger.warning(f"Failed to write metrics file {path}: {str(e)}")
+
+    _metrics_dumper = threading.Thread(target=dump_forever, name="metrics-dump", daemon=True)
+    _metrics_dumper.start()
+    logger.info(f"Writing server metrics to {path} every {interval:g}s")
+
+#################################################################
+# Tool Registration, Concurrency and Client Accounting
+#################################################################
+
+# Bounds how many tool calls run at once across all connected clients.
+_tool_semaphore = asyncio.Semaphore(args.max_concurrency)
+client_stats: Dict[str, Dict[str, Any]] = {}
+# Synchronous tools (rdflib evaluation, blocking endpoint HTTP) run here so
+# the event loop keeps serving other sessions and tool calls.
+_query_executor = ThreadPoolExecutor(max_workers=args.max_concurrency, thread_name_prefix="sparql")
+# Updated on the event loop thread only.
+pool_stats: Dict[str, Any] = {
+    "workers": args.max_concurrency, "waiting": 0, "max_waiting": 0, "running": 0,
+    "completed": 0, "wait_time": 0.0, "run_time": 0.0,
+}
+
+def configure(namespace: argparse.Namespace) -> None:
+    """Apply parsed command-line flags to an imported (not run) server module.
+
+    The module-level `args` hold the defaults when the server is imported for
+    in-process tool mode; this rebuilds the result cache, the concurrency bound
+    and the query worker pool from `namespace`. Call it before the lifespan opens.
+    """
+    global args, sparql_cache, _tool_semaphore, _query_executor
+    args = namespace
+    sparql_cache = SparqlResultCache(args.cache_size, args.cache_ttl)
+    _tool_semaphore = asyncio.Semaphore(args.max_concurrency)
+    previous_executor = _query_executor
+    _query_executor = ThreadPoolExecutor(max_workers=args.max_concurrency, thread_name_prefix="sparql")
+    previous_executor.shutdown(wait=False)
+    pool_stats["workers"] = args.max_concurrency
+
+def _client_key(ctx: Optional[Context]) -> str:
+    """Identify the calling client: its MCP client_id, else its session."""
+    if ctx is None:
+        return "unknown"
+    try:
+        client_id = ctx.client_id
+    except Exception:
+        client_id = None
+    if client_id:
+        return str(client_id)
+    session = getattr(getattr(ctx, "request_context", None), "session", None)
+    return f"session-{id(session):x}" if session is not None else "local"
+
+# Undecorated tool functions by name, for batch_execute.
+tool_functions: Dict[str, Any] = {}
+
+async def _run_tool(fn, is_async: bool, stats: Dict[str, Any], call_args: tuple, call_kwargs: dict) -> Any:
+    """Call a tool function with per-client and per-tool accounting."""
+    stats["in_flight"] += 1
+    start_time = time.time()
+    token = current_tool.set(current_tool.get() or fn.__name__)
+    result, failed = None, True
+    try:
+        if is_async:
+            result = await fn(*call_args, **call_kwargs)
+        else:
+            # Copy the context so current_tool (cache TTLs) is seen in the worker.
+            call = functools.partial(contextvars.copy_context().run, fn, *call_args, **call_kwargs)
+            result = await asyncio.get_running_loop().run_in_executor(_query_executor, call)
+        failed = isinstance(result, str) and result.startswith("Error")
+        return result
+    except Exception:
+        stats["errors"] += 1
+        raise
+    finally:
+        current_tool.reset(token)
+        tool_metrics.record_call(
+            fn.__name__, time.time() - start_time, failed,
+            len(result.encode("utf-8")) if isinstance(result, str) else 0,
+        )
+        stats["in_flight"] -= 1
+        stats["total_time"] += time.time() - start_time
+
+def tool(*tool_args, ttl: Optional[float] = None, bounded: bool = True, **tool_kwargs):
+    """Register a function as an MCP tool behind the concurrency bound and per-client accounting.
+
+    `ttl` overrides how long SPARQL results produced by this tool are served
+    from the cache (0 disables caching for it). `bounded=False` is for tools
+    that only dispatch other tool calls (batch_execute): those calls take the
+    concurrency slots, so holding one for the dispatcher too could exhaust
+    them. The undecorated function is returned so tools can keep calling each
+    other directly.
+    """
+    def decorator(fn):
+        if ttl is not None:
+            tool_cache_ttls[fn.__name__] = ttl
+        tool_functions[fn.__name__] = fn
+        is_async = inspect.iscoroutinefunction(fn)
+
+        @functools.wraps(fn)
+        async def handler(*call_args, **call_kwargs):
+            stats = client_stats.setdefault(_client_key(call_kwargs.get("ctx")), {
+                "requests": 0, "errors": 0, "in_flight": 0, "total_time": 0.0, "last_seen": None, "tools": {},
+            })
+            stats["requests"] += 1
+            stats["tools"][fn.__name__] = stats["tools"].get(fn.__name__, 0) + 1
+            stats["last_seen"] = time.time()
+            if not bounded:
+                return await _run_tool(fn, is_async, stats, call_args, call_kwargs)
+            pool_stats["waiting"] += 1
+            pool_stats["max_waiting"] = max(pool_stats["max_waiting"], pool_stats["waiting"])
+            wait_start = time.time()
+            async with _tool_semaphore:
+                pool_stats["waiting"] -= 1
+                pool_stats["wait_time"] += time.time() - wait_start
+                pool_stats["running"] += 1
+                start_time = time.time()
+                try:
+                    return await _run_tool(fn, is_async, stats, call_args, call_kwargs)
+                finally:
+                    pool_stats["running"] -= 1
+                    pool_stats["completed"] += 1
+                    pool_stats["run_time"] += time.time() - start_time
+
+        mcp.tool(*tool_args, **tool_kwargs)(handler)
+        return fn
+    return decorator
+
+@functools.lru_cache(maxsize=1)
+def get_encoder():
+    """Load the tiktoken encoder once per process; None if it cannot be loaded."""
+    try:
+        return tiktoken.get_encoding("gpt2")
+    except Exception as e:
+        logger.warning(f"tiktoken encoder unavailable, estimating tokens from length: {str(e)}")
+        return None
+
+def count_tokens(text: str) -> int:
+    """Count tokens with the cached encoder (about 4 characters per token without it)."""
+    encoder = get_encoder()
+    if encoder is None:
+        return (len(text) + 3) // 4
+    return len(encoder.encode(text))
+
+def format_row(row) -> str:
+    """Format one result row as `var: value | var: value`."""
+    result_parts = []
+    
+    # Handle different variable bindings
+    for var_name, value in row.asdict().items():
+        if value:
+            # Clean up the value representation
+            if isinstance(value, rdflib.URIRef):
+                # Extract the local name for cleaner display
+                local_name = str(value).split('#')[-1] if '#' in str(value) else str(value).split('/')[-1]
+                result_parts.append(f"{var_name}: {local_name}")
+            else:
+                result_parts.append(f"{var_name}: {value}")
+    
+    return " | ".join(result_parts)
+
+OUTPUT_FORMATS = ("text", "tsv", "json")
+
+# prefix -> namespace, longest namespace first so the most specific prefix wins.
+CURIE_PREFIXES = sorted(
+    re.findall(r"PREFIX (\w+): <([^>]+)>", STANDARD_PREFIX_BLOCK), key=lambda item: -len(item[1])
+)
+
+def curie(uri: rdflib.URIRef) -> str:
+    """Shorten a URI to a CURIE (attack:T1566); unknown namespaces keep only the local name."""
+    text = str(uri)
+    for prefix, namespace in CURIE_PREFIXES:
+        if text.startswith(namespace):
+            return f"{prefix}:{text[len(namespace):]}"
+    return local_name(uri)
+
+def compact_cell(value) -> str:
+    """One cell of a tsv/json row; whitespace runs collapse so a cell never spans lines or tabs."""
+    if value is None:
+        return ""
+    if isinstance(value, rdflib.URIRef):
+        return curie(value)
+    return " ".join(str(value).split())
+
+def group_table(table: list) -> Optional[tuple]:
+    """Group adjacent rows that share their first cell.
+
+    Only runs of consecutive rows are grouped, so the row order of the
+    query (its ORDER BY) is kept. The key is the leading run of columns that
+    is constant within every group (e.g. technique and techniqueLabel); the
+    remaining columns are listed per group.
+
+    Returns:
+        (key width, groups) or None when no two adjacent rows share a first value
+    """
+    groups: list = []
+    for cells in table:
+        if groups and groups[-1][0][0] == cells[0]:
+            groups[-1].append(cells)
+        else:
+            groups.append([cells])
+    width = len(table[0])
+    if len(groups) == len(table) or width < 2:
+        return None
+    key_width = 1
+    while key_width < width - 1 and all(len({cells[key_width] for cells in group}) == 1 for group in groups):
+        key_width += 1
+    return key_width, groups
+
+def format_compact(rows: list, output_format: str, max_tokens: Optional[int] = None) -> tuple:
+    """Format rows as a header-once table (tsv) or column/row arrays (json).
+
+    Columns that are unbound in every row are dropped, and adjacent rows
+    sharing a first value are grouped (see group_table). In tsv a grouped row leaves
+    its key cells empty to repeat the row above; in json the result is
+    {"key": [...], "columns": [...], "groups": [[key..., [[row], ...]], ...]}
+    instead of {"columns": [...], "rows": [...]}. The budget is charged per
+    ungrouped row, so grouping only ever makes the result smaller.
 
-def format_sparql_results(results, include_description: bool = False) -> str:
+    Returns:
+        (formatted text, number of rows included)
+    """
+    def encode(cells: list) -> str:
+        if output_format == "json":
+            return json.dumps(cells, ensure_ascii=False, separators=(",", ":"))
+        return "\t".join(cells)
+
+    labels = list(rows[0].labels)
+    columns = [label for label in labels if any(row[label] is not None for row in rows)]
+    used = count_tokens(encode(columns))
+    table = []
+    for row in rows:
+        cells = [compact_cell(row[column]) for column in columns]
+        if max_tokens is not None:
+            used += count_tokens(encode(cells)) + 1
+            if used > max_tokens:
+                break
+        table.append(cells)
+    if not table:
+        return "", 0
+    grouping = group_table(table)
+    if output_format == "json":
+        if grouping is None:
+            document = {"columns": columns, "rows": table}
+        else:
+            key_width, groups = grouping
+            document = {
+                "key": columns[:key_width],
+                "columns": columns[key_width:],
+                "groups": [group[0][:key_width] + [[cells[key_width:] for cells in group]] for group in groups],
+            }
+        return json.dumps(document, ensure_ascii=False, separators=(",", ":")), len(table)
+    lines = [encode(columns)]
+    if grouping is None:
+        lines.extend(encode(cells) for cells in table)
+    else:
+        key_width, groups = grouping
+        for group in groups:
+            lines.append(encode(group[0]))
+            lines.extend(encode([""] * key_width + cells[key_width:]) for cells in group[1:])
+    return "\n".join(lines), len(table)
+
+def embed_state(formatted: str, name: str, state: Dict[str, Any]) -> str:
+    """Add paging or truncation state to a json result as `name`, so it stays one JSON document."""
+    document = json.loads(formatted) if formatted else {"rows": []}
+    document[name] = state
+    return json.dumps(document, ensure_ascii=False, separators=(",", ":"))
+
+def format_rows(rows: list, max_tokens: Optional[int] = None, output_format: str = "text") -> tuple:
+    """Format rows until the token budget is spent.
+
+    Returns:
+        (formatted text, number of rows included)
+    """
+    if output_format != "text":
+        return format_compact(rows, output_format, max_tokens)
+    lines = []
+    used = 0
+    for row in rows:
+        line = format_row(row)
+        if max_tokens is not None:
+            # +1 for the newline joining the rows.
+            used += count_tokens(line) + 1
+            if used > max_tokens:
+                break
+        lines.append(line)
+    return "\n".join(lines), len(lines)
+
+def format_sparql_results(results, include_description: bool = False, max_tokens: Optional[int] = None,
+                          output_format: str = "text") -> str:
     """Format SPARQL query results into a readable string.
     
     Args:
         results: SPARQL query results
         include_description: Whether to include descriptions (if available)
+        max_tokens: Token budget for the rows (default: unlimited)
+        output_format: One of OUTPUT_FORMATS (default: "text")
         
     Returns:
-        Formatted string representation of the results
+        Formatted string representation of the results, ending with a
+        truncation marker if the budget was reached (in json, a "truncated"
+        member of the document)
     """
-    if not results:
+    rows = list(results) if results else []
+    if not rows:
         return "No results found."
     
-    formatted_results = []
-    
-    for row in results:
-        result_parts = []
-        
-        # Handle different variable bindings
-        for var_name, value in row.asdict().items():
-            if value:
-                # Clean up the value representation
-                if isinstance(value, rdflib.URIRef):
-                    # Extract the local name for cleaner display
-                    local_name = str(value).split('#')[-1] if '#' in str(value) else str(value).split('/')[-1]
-                    result_parts.append(f"{var_name}: {local_name}")
-                else:
-                    result_parts.append(f"{var_name}: {value}")
-        
-        formatted_results.append(" | ".join(result_parts))
-    
-    return "\n".join(formatted_results)
+    formatted, shown = format_rows(rows, max_tokens, output_format)
+    if shown < len(rows):
+        if output_format == "json":
+            return embed_state(formatted, "truncated", {"shown": shown, "total": len(rows), "max_tokens": max_tokens})
+        formatted += f"\n[truncated: {shown} of {len(rows)} rows shown; token budget of {max_tokens} reached]"
+    return formatted
+
+def format_page(results, include_description: bool, limit: int, offset: int, max_tokens: Optional[int] = None,
+                output_format: str = "text") -> str:
+    """Format at most `limit` rows and add a footer with the paging state.
 
+    Args:
+        results: SPARQL query results, fetched with LIMIT limit + 1
+        include_description: Whether to include descriptions (if available)
+        limit: Page size
+        offset: Index of the first row of the page
+        max_tokens: Token budget for the rows (default: unlimited)
+        output_format: One of OUTPUT_FORMATS (default: "text")
+
+    Returns:
+        Formatted page followed by a `[rows a-b; has_more: ...]` line (in
+        json, a "page" member of the document). An empty page, e.g. an offset
+        past the end, keeps that structure with no rows and has_more false.
+    """
+    rows = list(results)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if not rows:
+        if output_format == "json":
+            return embed_state("", "page", {"first": offset + 1, "last": offset, "has_more": False})
+        return f"No results found.\n[rows: none from {offset + 1}; has_more: false]"
+    formatted, shown = format_rows(rows, max_tokens, output_format)
+    # A page cut short by the budget continues where it stopped.
+    truncated = shown < len(rows)
+    has_more = has_more or truncated
+    if output_format == "json":
+        state = {"first": offset + 1, "last": offset + shown, "has_more": has_more}
+        if has_more:
+            state["next_offset"] = offset + shown
+        if truncated:
+            state["max_tokens"] = max_tokens
+        return embed_state(formatted, "page", state)
+    footer = f"[rows {offset + 1}-{offset + shown}; has_more: {str(has_more).lower()}"
+    if has_more:
+        footer += f"; next offset: {offset + shown}"
+    if truncated:
+        footer += f"; token budget of {max_tokens} reached"
+    return f"{formatted}\n{footer}]" if formatted else f"{footer}]"
+
+GRAPH_ROW_LABELS = [rdflib.Variable("subject"), rdflib.Variable("predicate"), rdflib.Variable("object")]
+
+def result_rows(result) -> list:
+    """Rows of any query form: SELECT rows, one `answer` row for ASK, one row per triple for CONSTRUCT/DESCRIBE."""
+    if result.type == "ASK":
+        answer = rdflib.Variable("answer")
+        return [rdflib.query.ResultRow({answer: rdflib.Literal(str(result.askAnswer).lower())}, [answer])]
+    if result.type in ("CONSTRUCT", "DESCRIBE"):
+        return [rdflib.query.ResultRow(dict(zip(GRAPH_ROW_LABELS, triple)), GRAPH_ROW_LABELS) for triple in result]
+    return list(result)
 
 def prepare_query(query: str) -> str:
     """Normalize namespace prefixes and ensure the SEPSES defaults are available."""
@@ -193,9 +1079,9 @@ def prepare_query(query: str) -> str:
 # Core Infrastructure Tools
 #################################################################
 # Tools
-@mcp.tool()
+@tool()
 def set_max_tokens(tokens: int, ctx: Context) -> str:
-    """Set the maximum token limit for prompts.
+    """Set the token budget for tool results and text_to_sparql queries.
 
     Args:
         tokens (int): The new maximum token limit (must be positive).
@@ -206,11 +1092,222 @@ def set_max_tokens(tokens: int, ctx: Context) -> str:
     """
     if tokens <= 0:
         return "Error: MAX_TOKENS must be positive."
-    ctx.request_context.lifespan_context["max_tokens"] = tokens
+    set_session_setting(ctx, "max_tokens", tokens)
     logger.info(f"Set MAX_TOKENS to {tokens}")
     return f"MAX_TOKENS set to {tokens}"
 
-@mcp.tool()
+@tool()
+def reset_session_settings(ctx: Context) -> str:
+    """Restore the server's default token budget and output format for this session.
+
+    Args:
+        ctx (Context): The FastMCP context object.
+
+    Returns:
+        str: Confirmation message.
+    """
+    overrides = _session_overrides(ctx)
+    if overrides:
+        overrides.clear()
+    return "Session settings reset to the server defaults"
+
+@tool()
+def set_output_format(output_format: str, ctx: Context) -> str:
+    """Choose how query tools write their results.
+
+    "text" gives one `var: value | var: value` line per row. "tsv" gives a
+    header line and tab-separated rows; "json" gives {"columns": [...],
+    "rows": [[...], ...]}. Both compact formats shorten URIs to CURIEs
+    (attack:T1566) and group adjacent rows that share their first value,
+    e.g. one technique with its list of mitigations: in tsv the grouped rows
+    leave the key cells empty, in json they are nested under "groups". In
+    json, paging and truncation state are "page" and "truncated" members.
+
+    Args:
+        output_format (str): "text", "tsv" or "json".
+        ctx (Context): The FastMCP context object.
+
+    Returns:
+        str: Confirmation message or error if the format is unknown.
+    """
+    if output_format not in OUTPUT_FORMATS:
+        return f"Error: output format must be one of {', '.join(OUTPUT_FORMATS)}."
+    set_session_setting(ctx, "output_format", output_format)
+    logger.info(f"Set output format to {output_format}")
+    return f"Output format set to {output_format}"
+
+class SparqlTemplate:
+    """A SPARQL query with `$name` parameters, parsed once per process.
+
+    On an in-memory graph the parsed query is evaluated with `initBindings`,
+    so rdflib skips parsing and algebra translation on every call. For an
+    endpoint or an Oxigraph store each `$name` is replaced by the value's N3
+    form; quotes and backslashes in arguments are escaped and cannot break
+    the query.
+
+    A `candidate_slot(var)` block takes a list of terms per call (see
+    `with_candidates`), so restricting a variable to keyword index hits does
+    not change the template text.
+    """
+
+    PARAMETER = re.compile(r"\$(\w+)")
+    VARIABLE = re.compile(r"\?(\w+)")
+    CANDIDATES = rdflib.URIRef("urn:sepses:template:candidates")
+    CANDIDATE_SLOT = re.compile(r"VALUES \?(\w+) \{ <urn:sepses:template:candidates> \}")
+
+    def __init__(self, text: str):
+        self.text = prepare_query(text)
+        self.parameters = set(self.PARAMETER.findall(self.text))
+        # `$x` and `?x` are the same variable in SPARQL: binding the parameter
+        # would also fix the variable the query searches for.
+        collisions = self.parameters & set(self.VARIABLE.findall(self.text))
+        if collisions:
+            raise ValueError(f"Template parameters also used as query variables: {', '.join(sorted(collisions))}")
+        self.candidate_slots = set(self.CANDIDATE_SLOT.findall(self.text))
+        self._prepared = None
+        self._lock = threading.Lock()
+
+    @property
+    def prepared(self):
+        with self._lock:
+            if self._prepared is None:
+                self._prepared = prepareQuery(self.text)
+            return self._prepared
+
+    def render(self, bindings: Dict[str, rdflib.term.Identifier], candidates: Optional[Dict[str, list]] = None) -> str:
+        """The query text with parameters substituted; slots without candidates are dropped."""
+        candidates = candidates or {}
+
+        def slot(match):
+            terms = candidates.get(match.group(1))
+            if terms is None:
+                return ""
+            return f"VALUES ?{match.group(1)} {{ {' '.join(term.n3() for term in terms)} }}"
+
+        text = self.CANDIDATE_SLOT.sub(slot, self.text)
+        return self.PARAMETER.sub(lambda match: bindings[match.group(1)].n3(), text)
+
+    def with_candidates(self, candidates: Dict[str, Optional[list]]) -> Query:
+        """The prepared query with each candidate slot bound to `candidates[var]`.
+
+        A slot without candidates holds one empty solution, which restricts
+        nothing. Only the nodes on the path to a slot are copied; the shared
+        prepared query is never modified.
+        """
+        def clone(node):
+            # CompValue.clone() drops subclasses such as Expr and their attributes.
+            bound = node.clone()
+            bound.__class__ = type(node)
+            bound.__dict__.update(node.__dict__)
+            return bound
+
+        def substitute(node):
+            if isinstance(node, CompValue):
+                if node.name == "values" and len(node["res"]) == 1 and list(node["res"][0].values()) == [self.CANDIDATES]:
+                    var = next(iter(node["res"][0]))
+                    terms = candidates.get(str(var))
+                    bound = clone(node)
+                    bound["res"] = [{}] if terms is None else [{var: term} for term in terms]
+                    return bound
+                children = {key: substitute(value) for key, value in node.items()}
+                if all(children[key] is node[key] for key in children):
+                    return node
+                bound = clone(node)
+                bound.update(children)
+                return bound
+            if isinstance(node, list):
+                items = [substitute(item) for item in node]
+                return node if all(a is b for a, b in zip(items, node)) else items
+            return node
+
+        prepared = self.prepared
+        return Query(prepared.prologue, substitute(prepared.algebra))
+
+def candidate_slot(var: str) -> str:
+    """A VALUES block of a SparqlTemplate that `run_sparql(candidates=...)` fills per call."""
+    return f"VALUES ?{var} {{ {SparqlTemplate.CANDIDATES.n3()} }}"
+
+@functools.lru_cache(maxsize=256)
+def sparql_template(text: str) -> SparqlTemplate:
+    """The template for a query text; tool query strings are constants, so each is parsed once."""
+    return SparqlTemplate(text)
+
+def sparql_term(value: Any) -> rdflib.term.Identifier:
+    """RDF term for a template argument (strings and numbers become typed literals)."""
+    if isinstance(value, rdflib.term.Identifier):
+        return value
+    return rdflib.Literal(value)
+
+def run_sparql(query: str, ctx: Context, include_description: bool = False, page: Optional[tuple] = None,
+               bindings: Optional[Dict[str, Any]] = None, candidates: Optional[Dict[str, Optional[list]]] = None) -> str:
+    """Run a SPARQL query through the result cache and return formatted results.
+
+    Rows are cut off at the session's `max_tokens` budget and written in its
+    `output_format` (see session_setting). The cache key is the prepared query plus
+    `include_description`, the budget and the format; error results are
+    never cached. `page` is the (limit, offset) of a query built
+    by `run_sparql_page`. With `bindings`, `query` is a template whose
+    `$name` parameters take these values (see SparqlTemplate) and whose
+    candidate slots take `candidates`. Candidates follow from the bindings,
+    so they are not part of the cache key.
+    """
+    context = ctx.request_context.lifespan_context
+    graph = context["graph"]
+    max_tokens = session_setting(ctx, "max_tokens")
+    output_format = session_setting(ctx, "output_format", "text")
+    if bindings is None:
+        query = prepare_query(query)
+        execute = functools.partial(graph.query, query)
+    else:
+        template = sparql_template(query)
+        missing = template.parameters - bindings.keys()
+        if missing:
+            return f"Error: missing query parameters: {', '.join(sorted(missing))}"
+        terms = {name: sparql_term(value) for name, value in bindings.items() if name in template.parameters}
+        # The rendered text without candidates is a stable cache key.
+        query = template.render(terms)
+        if context["is_sparql_endpoint"] or (HAS_OXIGRAPH and isinstance(graph.store, OxigraphStore)):
+            # Oxigraph parses its own queries and rejects rdflib's parsed form.
+            execute = functools.partial(graph.query, template.render(terms, candidates))
+        elif template.candidate_slots:
+            execute = functools.partial(graph.query, template.with_candidates(candidates or {}), initBindings=terms)
+        else:
+            execute = functools.partial(graph.query, template.prepared, initBindings=terms)
+    key = (query, include_description, max_tokens, output_format)
+    cached = sparql_cache.get(key, cache_ttl())
+    if cached is not None:
+        logger.info(f"SPARQL cache hit ({current_tool.get() or 'direct'})")
+        return cached
+
+    start_time = time.time()
+    try:
+        results = result_rows(execute())
+        tool_metrics.record_rows(current_tool.get() or "direct", len(results))
+        if page:
+            formatted = format_page(results, include_description, *page, max_tokens, output_format)
+        else:
+            formatted = format_sparql_results(results, include_description, max_tokens, output_format)
+        ctx.request_context.lifespan_context["metrics"]["queries"] += 1
+        ctx.request_context.lifespan_context["metrics"]["total_time"] += time.time() - start_time
+        logger.info(query)
+    except Exception as e:
+        logger.error(f"SPARQL query error: {str(e)}")
+        return f"Error executing SPARQL query: {str(e)}"
+    sparql_cache.put(key, formatted)
+    return formatted
+
+def run_sparql_page(query: str, ctx: Context, include_description: bool, limit: int, offset: int) -> str:
+    """Run one page of an ORDER BY query.
+
+    One row past `limit` is fetched to tell whether another page follows.
+    """
+    if limit <= 0 or offset < 0:
+        return "Error: limit must be positive and offset must not be negative."
+    limit = min(limit, MAX_PAGE_SIZE)
+    page_query = f"{query.rstrip()}\n    LIMIT {limit + 1}\n    OFFSET {offset}\n"
+    return run_sparql(page_query, ctx, include_description, page=(limit, offset))
+
+@tool()
 def execute_sparql_query(query: str, ctx: Context, include_description: bool = False) -> str:
     """Execute a custom SPARQL query against the MITRE ATT&CK knowledge graph.
     
@@ -222,21 +1319,59 @@ def execute_sparql_query(query: str, ctx: Context, include_description: bool = F
     Returns:
         Formatted query results
     """
-    graph = ctx.request_context.lifespan_context["graph"]
-    query = prepare_query(query)
+    return run_sparql(query, ctx, include_description)
+
+@tool()
+def text_to_sparql(prompt: str, ctx: Context, include_description: bool = False) -> str:
+    """Execute an arbitrary SPARQL query supplied in the prompt text.
+
+    The MCP agent should pass the full SPARQL statement (SELECT/ASK/CONSTRUCT/DESCRIBE).
+    This helper enforces the configured token budget and runs the query against
+    whichever data source (local file or SEPSES endpoint) is active.
+    """
+    sanitized = prompt.strip()
+    if not sanitized:
+        return "Error: Empty prompt. Provide a full SPARQL query."
+
+    try:
+        query_form(sanitized)
+    except ValueError:
+        return (
+            "Error: text_to_sparql expects a complete SPARQL query beginning with "
+            "SELECT/ASK/CONSTRUCT/DESCRIBE. Provide the query you want to execute."
+        )
+
+    max_tokens = session_setting(ctx, "max_tokens", 10000)
+    prepared_query = prepare_query(sanitized)
+    input_tokens = count_tokens(prepared_query)
+    if input_tokens > max_tokens:
+        return (
+            f"Error: Input exceeds token limit ({input_tokens} tokens > {max_tokens}). "
+            "Shorten your query or increase MAX_TOKENS with 'set_max_tokens'."
+        )
+
     start_time = time.time()
-    
     try:
-        results = graph.query(query)
-        ctx.request_context.lifespan_context["metrics"]["queries"] += 1
-        ctx.request_context.lifespan_context["metrics"]["total_time"] += time.time() - start_time
-        logger.info(query)
-        return format_sparql_results(results, include_description)
-    except Exception as e:
-        logger.error(f"SPARQL query error: {str(e)}")
-        return f"Error executing SPARQL query: {str(e)}"
+        results = execute_sparql_query(prepared_query, ctx, include_description)
+    except Exception as exc:
+        logger.error(f"Failed to run custom SPARQL query: {exc}")
+        return f"Error executing SPARQL query: {exc}"
+
+    output_tokens = count_tokens(results)
+    total_tokens = input_tokens + output_tokens
+    exec_time = time.time() - start_time
+    if session_setting(ctx, "output_format", "text") == "json" and results.startswith("{"):
+        return embed_state(results, "usage", {
+            "input_tokens": input_tokens, "output_tokens": output_tokens,
+            "total_tokens": total_tokens, "time": round(exec_time, 2),
+        })
+    usage_stats = (
+        f"[Resource Usage: Input Tokens: {input_tokens}, "
+        f"Output Tokens: {output_tokens}, Total: {total_tokens}, Time: {exec_time:.2f}s]"
+    )
+    return f"{results}\n\n{usage_stats}"
 
-@mcp.tool()
+@tool()
 def get_server_mode(ctx: Context) -> str:
     """Get the current mode of the MITRE ATT&CK server.
     
@@ -250,85 +1385,85 @@ def get_server_mode(ctx: Context) -> str:
     sparql_endpoint = ctx.request_context.lifespan_context["sparql_endpoint"]
     is_sparql_endpoint = ctx.request_context.lifespan_context["is_sparql_endpoint"]
     
+    store_path = ctx.request_context.lifespan_context.get("store_path")
+    
     if is_sparql_endpoint:
         return f"SPARQL Endpoint Mode with Endpoint: '{sparql_endpoint}'"
+    elif store_path:
+        return f"Local Store Mode with Oxigraph store: '{store_path}'"
     else:
         return f"Local File Mode with Dataset: '{rdf_file or 'empty graph'}'"
 
-@mcp.tool()
-def get_attack_statistics(ctx: Context) -> str:
+# Statistics keys and the class each one counts.
+STATISTICS_CLASSES = {
+    "techniqueCount": ATTACK.Technique,
+    "subtechniqueCount": ATTACK.SubTechnique,
+    "groupCount": ATTACK.AdversaryGroup,
+    "softwareCount": ATTACK.Software,
+    "malwareCount": ATTACK.Malware,
+    "mitigationCount": ATTACK.Mitigation,
+    "tacticCount": ATTACK.Tactic,
+    "assetCount": ATTACK.Asset,
+    "dataSourceCount": ATTACK.DataSource,
+    "dataComponentCount": ATTACK.DataComponent,
+}
+_statistics_lock = threading.Lock()
+
+def count_class(graph, rdf_class: rdflib.URIRef, is_sparql_endpoint: bool) -> int:
+    """Count the distinct instances of one class."""
+    if not is_sparql_endpoint:
+        # Straight off the store's type index, no SPARQL parse or evaluation.
+        return len(set(graph.subjects(RDF.type, rdf_class)))
+    query = f"SELECT (COUNT(DISTINCT ?s) AS ?count) WHERE {{ ?s a {rdf_class.n3()} }}"
+    for row in graph.query(query):
+        return int(row[0])
+    return 0
+
+def compute_statistics(graph, is_sparql_endpoint: bool) -> Dict[str, int]:
+    """Count each class separately, concurrently against an endpoint.
+
+    A single SELECT with an OPTIONAL per class joins them into a cartesian
+    product of all classes; separate counts stay linear in the class sizes.
+    """
+    def count(rdf_class):
+        return count_class(graph, rdf_class, is_sparql_endpoint)
+
+    if not is_sparql_endpoint:
+        # Local counts are CPU-bound; threads would only contend for the GIL.
+        return {key: count(rdf_class) for key, rdf_class in STATISTICS_CLASSES.items()}
+    with ThreadPoolExecutor(max_workers=len(STATISTICS_CLASSES)) as pool:
+        return dict(zip(STATISTICS_CLASSES, pool.map(count, STATISTICS_CLASSES.values())))
+
+@tool()
+def get_attack_statistics(ctx: Context, refresh: bool = False) -> str:
     """Get statistical summary of the MITRE ATT&CK knowledge base.
     
+    The counts are computed once per loaded graph and reused until it is
+    reloaded, or until `refresh` is set.
+
     Args:
         ctx: FastMCP context object
+        refresh: Recompute the counts instead of using the snapshot (default: False)
         
     Returns:
         JSON string containing statistics about the knowledge base
     """
-    graph = ctx.request_context.lifespan_context["graph"]
-    is_sparql_endpoint = ctx.request_context.lifespan_context["is_sparql_endpoint"]
+    context = ctx.request_context.lifespan_context
     
     try:
-        if is_sparql_endpoint:
-            # For SPARQL endpoints, use limited queries to avoid timeouts
-            query = """
-            PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>
-            SELECT 
-                (COUNT(DISTINCT ?technique) AS ?techniqueCount)
-                (COUNT(DISTINCT ?group) AS ?groupCount)
-                (COUNT(DISTINCT ?software) AS ?softwareCount)
-                (COUNT(DISTINCT ?mitigation) AS ?mitigationCount)
-                (COUNT(DISTINCT ?tactic) AS ?tacticCount)
-            WHERE {
-                OPTIONAL { ?technique a attack:Technique }
-                OPTIONAL { ?group a attack:AdversaryGroup }
-                OPTIONAL { ?software a attack:Software }
-                OPTIONAL { ?mitigation a attack:Mitigation }
-                OPTIONAL { ?tactic a attack:Tactic }
-            }
-            """
-        else:
-            # For local graphs, we can do more comprehensive statistics
-            query = """
-            PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>
-            SELECT 
-                (COUNT(DISTINCT ?technique) AS ?techniqueCount)
-                (COUNT(DISTINCT ?subtechnique) AS ?subtechniqueCount)
-                (COUNT(DISTINCT ?group) AS ?groupCount)
-                (COUNT(DISTINCT ?software) AS ?softwareCount)
-                (COUNT(DISTINCT ?malware) AS ?malwareCount)
-                (COUNT(DISTINCT ?mitigation) AS ?mitigationCount)
-                (COUNT(DISTINCT ?tactic) AS ?tacticCount)
-                (COUNT(DISTINCT ?asset) AS ?assetCount)
-                (COUNT(DISTINCT ?dataSource) AS ?dataSourceCount)
-                (COUNT(DISTINCT ?dataComponent) AS ?dataComponentCount)
-            WHERE {
-                OPTIONAL { ?technique a attack:Technique }
-                OPTIONAL { ?subtechnique a attack:SubTechnique }
-                OPTIONAL { ?group a attack:AdversaryGroup }
-                OPTIONAL { ?software a attack:Software }
-                OPTIONAL { ?malware a attack:Malware }
-                OPTIONAL { ?mitigation a attack:Mitigation }
-                OPTIONAL { ?tactic a attack:Tactic }
-                OPTIONAL { ?asset a attack:Asset }
-                OPTIONAL { ?dataSource a attack:DataSource }
-                OPTIONAL { ?dataComponent a attack:DataComponent }
-            }
-            """
-        
-        results = graph.query(query)
-        stats = {}
-        for row in results:
-            for var_name, value in row.asdict().items():
-                if value is not None:
-                    stats[var_name] = int(value)
-        
+        # One computation at a time; concurrent callers wait for its snapshot.
+        with _statistics_lock:
+            if refresh or context.get("statistics") is None:
+                start_time = time.time()
+                context["statistics"] = compute_statistics(context["graph"], context["is_sparql_endpoint"])
+                logger.info(f"Computed ATT&CK statistics in {time.time() - start_time:.2f}s")
+            stats = context["statistics"]
         return json.dumps(stats, indent=2)
     except Exception as e:
         logger.error(f"Statistics query error: {str(e)}")
         return f"Error retrieving statistics: {str(e)}"
 
-@mcp.tool()
+@tool()
 def health_check(ctx: Context) -> str:
     """Check the health of the MITRE ATT&CK triplestore connection.
     
@@ -347,17 +1482,114 @@ def health_check(ctx: Context) -> str:
         logger.error(f"Health check error: {str(e)}")
         return f"Unhealthy: {str(e)}"
 
+@tool()
+def get_client_stats(ctx: Context) -> str:
+    """Get per-client request accounting for this server process.
+    
+    Args:
+        ctx: FastMCP context object
+        
+    Returns:
+        JSON string with requests, errors, in-flight calls, time and tool usage per client
+    """
+    report = {
+        "max_concurrency": args.max_concurrency,
+        "active_sessions": _shared_sessions,
+        "caller": _client_key(ctx),
+        "clients": {
+            client: {**stats, "total_time": round(stats["total_time"], 3)}
+            for client, stats in client_stats.items()
+        },
+    }
+    return json.dumps(report, indent=2)
+
+@tool()
+def get_query_pool_stats(ctx: Context) -> str:
+    """Get the tool execution pool's load: calls waiting for a slot, running and completed.
+    
+    Args:
+        ctx: FastMCP context object
+        
+    Returns:
+        JSON string with queue depth (current and peak) and total wait/run times in seconds
+    """
+    return json.dumps({
+        **pool_stats,
+        "wait_time": round(pool_stats["wait_time"], 3),
+        "run_time": round(pool_stats["run_time"], 3),
+    }, indent=2)
+
+@tool()
+def get_server_metrics(ctx: Context) -> str:
+    """Get per-tool metrics plus cache, worker pool, query and endpoint statistics.
+    
+    Per tool: calls, errors, SPARQL rows fetched, response bytes and
+    p50/p95/p99 latency. Use it to see which tools are worth caching or indexing.
+
+    Args:
+        ctx: FastMCP context object
+        
+    Returns:
+        JSON string with the server metrics
+    """
+    return json.dumps(server_metrics(ctx.request_context.lifespan_context), indent=2)
+
+@tool()
+def get_endpoint_metrics(ctx: Context) -> str:
+    """Get HTTP request metrics for the remote SPARQL endpoint (endpoint mode only).
+    
+    Args:
+        ctx: FastMCP context object
+        
+    Returns:
+        JSON string with request/error/byte counts and latency percentiles
+    """
+    graph = ctx.request_context.lifespan_context["graph"]
+    if not isinstance(graph, SparqlEndpoint):
+        return "No pooled SPARQL endpoint in use (local file mode or SPARQLStore fallback)."
+    return json.dumps(graph.snapshot(), indent=2)
+
+@tool()
+def get_cache_stats(ctx: Context) -> str:
+    """Get SPARQL result cache statistics and the per-tool TTL overrides.
+    
+    Args:
+        ctx: FastMCP context object
+        
+    Returns:
+        JSON string with hits, misses, expirations, evictions, size and TTLs
+    """
+    return json.dumps({**sparql_cache.snapshot(), "tool_ttls": tool_cache_ttls}, indent=2)
+
+@tool()
+def invalidate_cache(ctx: Context, contains: str = "") -> str:
+    """Drop cached SPARQL results so the next calls query the data source again.
+    
+    Args:
+        ctx: FastMCP context object
+        contains: Only drop entries whose query contains this text (default: drop all)
+        
+    Returns:
+        Number of entries removed
+    """
+    removed = sparql_cache.invalidate(contains)
+    logger.info(f"Invalidated {removed} cached SPARQL results")
+    return f"Removed {removed} cached results."
+
 #################################################################
 # Technique Query Tools
 #################################################################
 
-@mcp.tool()
-def get_all_techniques(ctx: Context,  include_description: bool = False) -> str:
+@tool(ttl=CATALOG_TTL)
+def get_all_techniques(ctx: Context,  include_description: bool = False,
+                       limit: int = DEFAULT_PAGE_SIZE, offset: int = 0) -> str:
     """Get all techniques in the MITRE ATT&CK framework.
     
     Args:
         ctx: FastMCP context object
         include_description: Whether to include descriptions (default: False)
+        limit: Rows per page (default: 100, at most 1000)
+        offset: Rows to skip; use the `next offset` from the previous page (default: 0)
     """
     query = """
     PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>
@@ -368,11 +1600,11 @@ def get_all_techniques(ctx: Context,  include_description: bool = False) -> str:
         ?technique dcterm:title ?label .
         OPTIONAL { ?technique dcterm:description ?description }  
     }
-    ORDER BY ?label
+    ORDER BY ?label ?technique
     """
-    return execute_sparql_query(query, ctx, include_description)
+    return run_sparql_page(query, ctx, include_description, limit, offset)
 
-@mcp.tool()
+@tool()
 def get_techniques_by_keyword(ctx: Context,  keyword: str, include_description: bool = False) -> str:
     """Get all techniques in the MITRE ATT&CK framework.
     
@@ -380,27 +1612,30 @@ def get_techniques_by_keyword(ctx: Context,  keyword: str, include_description:
         ctx: FastMCP context object
         include_description: Whether to include descriptions (default: False)
     """
+    candidates = keyword_candidates(ctx, keyword, ("title", "description"))
     query = f"""
     PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>
     PREFIX dcterm: <http://purl.org/dc/terms/>
     
     SELECT ?technique ?label ?description WHERE {{
+        {candidate_slot("technique")}
         ?technique a attack:Technique .
         ?technique dcterm:title ?label .
         OPTIONAL {{ ?technique dcterm:description ?description }}  
         
         FILTER(
-            CONTAINS(LCASE(?label), LCASE("{keyword}")) ||
-            CONTAINS(LCASE(?description), LCASE("{keyword}"))
+            CONTAINS(LCASE(?label), LCASE($keyword)) ||
+            CONTAINS(LCASE(?description), LCASE($keyword))
         )
     }}
     ORDER BY ?label
     LIMIT 50
     """
-    return execute_sparql_query(query, ctx, include_description)
+    return run_sparql(query, ctx, include_description, bindings={"keyword": keyword},
+                      candidates={"technique": candidates})
 
 
-@mcp.tool()
+@tool()
 def get_techniques_by_tactic(tactic_name: str, ctx: Context, include_description: bool = False) -> str:
     """Get all techniques that accomplish a specific tactic.
     
@@ -409,23 +1644,23 @@ def get_techniques_by_tactic(tactic_name: str, ctx: Context, include_description
         ctx: FastMCP context object
         include_description: Whether to include descriptions (default: False)
     """
-    query = f"""
+    query = """
     PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>
     PREFIX dcterm: <http://purl.org/dc/terms/>
     
-    SELECT ?technique ?techniqueLabel ?tactic ?tacticLabel WHERE {{
+    SELECT ?technique ?techniqueLabel ?tactic ?tacticLabel WHERE {
         ?technique a attack:Technique .
         ?technique dcterm:title ?techniqueLabel .
         ?technique attack:accomplishesTactic ?tactic .
         ?tactic dcterm:title ?tacticLabel .
-        FILTER(CONTAINS(LCASE(?tacticLabel), LCASE("{tactic_name}")))
-    }}
+        FILTER(CONTAINS(LCASE(?tacticLabel), LCASE($tactic_name)))
+    }
     ORDER BY ?techniqueLabel
     """
     
-    return execute_sparql_query(query, ctx, include_description)
+    return run_sparql(query, ctx, include_description, bindings={"tactic_name": tactic_name})
 
-@mcp.tool()
+@tool()
 def get_subtechniques_of_technique(technique_name: str, ctx: Context, include_description: bool = False) -> str:
     """Get all subtechniques of a parent technique.
     
@@ -434,23 +1669,23 @@ def get_subtechniques_of_technique(technique_name: str, ctx: Context, include_de
         ctx: FastMCP context object
         include_description: Whether to include descriptions (default: False)
     """
-    query = f"""
+    query = """
     PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>
     PREFIX dcterm: <http://purl.org/dc/terms/>
     
-    SELECT ?subtechnique ?subtechniqueLabel ?parentTechnique ?parentLabel WHERE {{
+    SELECT ?subtechnique ?subtechniqueLabel ?parentTechnique ?parentLabel WHERE {
         ?subtechnique a attack:SubTechnique .
         ?subtechnique dcterm:title ?subtechniqueLabel .
         ?subtechnique attack:isSubTechniqueOf ?parentTechnique .
         ?parentTechnique dcterm:title ?parentLabel .
-        FILTER(CONTAINS(LCASE(?parentLabel), LCASE("{technique_name}")))
-    }}
+        FILTER(CONTAINS(LCASE(?parentLabel), LCASE($technique_name)))
+    }
     ORDER BY ?subtechniqueLabel
     """
     
-    return execute_sparql_query(query, ctx, include_description)
+    return run_sparql(query, ctx, include_description, bindings={"technique_name": technique_name})
 
-@mcp.tool()
+@tool()
 def get_techniques_by_platform(platform: str, ctx: Context, include_description: bool = False) -> str:
     """Get techniques that target a specific platform.
     
@@ -459,32 +1694,35 @@ def get_techniques_by_platform(platform: str, ctx: Context, include_description:
         ctx: FastMCP context object
         include_description: Whether to include descriptions (default: False)
     """
-    query = f"""
+    query = """
     PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>
     PREFIX dcterm: <http://purl.org/dc/terms/>
     
-    SELECT ?technique ?label ?platform WHERE {{
+    SELECT ?technique ?label ?platform WHERE {
         ?technique a attack:Technique .
         ?technique dcterm:title ?label .
         ?technique attack:platform ?platform .
-        FILTER(CONTAINS(LCASE(?platform), LCASE("{platform}")))
-    }}
+        FILTER(CONTAINS(LCASE(?platform), LCASE($platform_name)))
+    }
     ORDER BY ?label
     """
     
-    return execute_sparql_query(query, ctx, include_description)
+    return run_sparql(query, ctx, include_description, bindings={"platform_name": platform})
 
 #################################################################
 # Adversary Group Query Tools
 #################################################################
 
-@mcp.tool()
-def get_all_adversary_groups(ctx: Context, include_description: bool = False) -> str:
+@tool(ttl=CATALOG_TTL)
+def get_all_adversary_groups(ctx: Context, include_description: bool = False,
+                             limit: int = DEFAULT_PAGE_SIZE, offset: int = 0) -> str:
     """Get all adversary groups in the MITRE ATT&CK framework.
     
     Args:
         ctx: FastMCP context object
         include_description: Whether to include descriptions (default: False)
+        limit: Rows per page (default: 100, at most 1000)
+        offset: Rows to skip; use the `next offset` from the previous page (default: 0)
     """
     query = """
     PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>
@@ -495,12 +1733,12 @@ def get_all_adversary_groups(ctx: Context, include_description: bool = False) ->
         ?group dcterm:title ?label .
         OPTIONAL { ?group attack:aliases ?aliases }
     }
-    ORDER BY ?label
+    ORDER BY ?label ?group
     """
     
-    return execute_sparql_query(query, ctx, include_description)
+    return run_sparql_page(query, ctx, include_description, limit, offset)
 
-@mcp.tool()
+@tool()
 def get_techniques_used_by_group(group_name: str, ctx: Context, include_description: bool = False) -> str:
     """Get all techniques used by a specific adversary group.
     
@@ -509,23 +1747,23 @@ def get_techniques_used_by_group(group_name: str, ctx: Context, include_descript
         ctx: FastMCP context object
         include_description: Whether to include descriptions (default: False)
     """
-    query = f"""
+    query = """
     PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>
     PREFIX dcterm: <http://purl.org/dc/terms/>
     
-    SELECT ?group ?groupLabel ?technique ?techniqueLabel WHERE {{
+    SELECT ?group ?groupLabel ?technique ?techniqueLabel WHERE {
         ?group a attack:AdversaryGroup .
         ?group dcterm:title ?groupLabel .
         ?group attack:usesTechnique ?technique .
         ?technique dcterm:title ?techniqueLabel .
-        FILTER(CONTAINS(LCASE(?groupLabel), LCASE("{group_name}")))
-    }}
+        FILTER(CONTAINS(LCASE(?groupLabel), LCASE($group_name)))
+    }
     ORDER BY ?techniqueLabel
     """
     
-    return execute_sparql_query(query, ctx, include_description)
+    return run_sparql(query, ctx, include_description, bindings={"group_name": group_name})
 
-@mcp.tool()
+@tool()
 def get_software_used_by_group(group_name: str, ctx: Context, include_description: bool = False) -> str:
     """Get all software used by a specific adversary group.
     
@@ -534,27 +1772,27 @@ def get_software_used_by_group(group_name: str, ctx: Context, include_descriptio
         ctx: FastMCP context object
         include_description: Whether to include descriptions (default: False)
     """
-    query = f"""
+    query = """
     PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>
     PREFIX dcterm: <http://purl.org/dc/terms/>
     
-    SELECT ?group ?groupLabel ?software ?softwareLabel WHERE {{
+    SELECT ?group ?groupLabel ?software ?softwareLabel WHERE {
         ?group a attack:AdversaryGroup .
         ?group dcterm:title ?groupLabel .
-        {{
+        {
             ?group attack:usesSoftware ?software .
-        }} UNION {{
+        } UNION {
             ?group attack:usesMalware ?software .
-        }}
+        }
         ?software dcterm:title ?softwareLabel .
-        FILTER(CONTAINS(LCASE(?groupLabel), LCASE("{group_name}")))
-    }}
+        FILTER(CONTAINS(LCASE(?groupLabel), LCASE($group_name)))
+    }
     ORDER BY ?softwareLabel
     """
     
-    return execute_sparql_query(query, ctx, include_description)
+    return run_sparql(query, ctx, include_description, bindings={"group_name": group_name})
 
-@mcp.tool()
+@tool()
 def get_groups_using_technique(technique_name: str, ctx: Context, include_description: bool = False) -> str:
     """Get all adversary groups that use a specific technique.
     
@@ -563,33 +1801,36 @@ def get_groups_using_technique(technique_name: str, ctx: Context, include_descri
         ctx: FastMCP context object
         include_description: Whether to include descriptions (default: False)
     """
-    query = f"""
+    query = """
     PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>
     PREFIX dcterm: <http://purl.org/dc/terms/>
     
-    SELECT ?group ?groupLabel ?technique ?techniqueLabel WHERE {{
+    SELECT ?group ?groupLabel ?technique ?techniqueLabel WHERE {
         ?group a attack:AdversaryGroup .
         ?group dcterm:title ?groupLabel .
         ?group attack:usesTechnique ?technique .
         ?technique dcterm:title ?techniqueLabel .
-        FILTER(CONTAINS(LCASE(?techniqueLabel), LCASE("{technique_name}")))
-    }}
+        FILTER(CONTAINS(LCASE(?techniqueLabel), LCASE($technique_name)))
+    }
     ORDER BY ?groupLabel
     """
     
-    return execute_sparql_query(query, ctx, include_description)
+    return run_sparql(query, ctx, include_description, bindings={"technique_name": technique_name})
 
 #################################################################
 # Software and Malware Query Tools
 #################################################################
 
-@mcp.tool()
-def get_all_software(ctx: Context, include_description: bool = False) -> str:
+@tool(ttl=CATALOG_TTL)
+def get_all_software(ctx: Context, include_description: bool = False,
+                     limit: int = DEFAULT_PAGE_SIZE, offset: int = 0) -> str:
     """Get all software in the MITRE ATT&CK framework.
     
     Args:
         ctx: FastMCP context object
         include_description: Whether to include descriptions (default: False)
+        limit: Rows per page (default: 100, at most 1000)
+        offset: Rows to skip; use the `next offset` from the previous page (default: 0)
     """
     query = """
     PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>
@@ -600,12 +1841,12 @@ def get_all_software(ctx: Context, include_description: bool = False) -> str:
         ?software dcterm:title ?label .
         FILTER(?type = attack:Software || ?type = attack:Malware)
     }
-    ORDER BY ?label
+    ORDER BY ?label ?software ?type
     """
     
-    return execute_sparql_query(query, ctx, include_description)
+    return run_sparql_page(query, ctx, include_description, limit, offset)
 
-@mcp.tool()
+@tool()
 def get_software_by_keyword(ctx: Context, keyword: str, include_description: bool = False) -> str:
     """Get all software in the MITRE ATT&CK framework.
     
@@ -613,24 +1854,27 @@ def get_software_by_keyword(ctx: Context, keyword: str, include_description: boo
         ctx: FastMCP context object
         include_description: Whether to include descriptions (default: False)
     """
+    candidates = keyword_candidates(ctx, keyword, ("title",))
     query = f"""
     PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>
     PREFIX dcterm: <http://purl.org/dc/terms/>
     
     SELECT ?software ?label ?type WHERE {{
+        {candidate_slot("software")}
         ?software a ?type .
         ?software dcterm:title ?label .
         FILTER(?type = attack:Software || ?type = attack:Malware)
         FILTER(
-            CONTAINS(LCASE(?label), LCASE("{keyword}"))
+            CONTAINS(LCASE(?label), LCASE($keyword))
         )
     }}
     ORDER BY ?label
     """
     
-    return execute_sparql_query(query, ctx, include_description)
+    return run_sparql(query, ctx, include_description, bindings={"keyword": keyword},
+                      candidates={"software": candidates})
 
-@mcp.tool()
+@tool()
 
 def get_techniques_used_by_software(software_name: str, ctx: Context, include_description: bool = False) -> str:
     """Get all techniques implemented by specific software/malware.
@@ -640,39 +1884,42 @@ def get_techniques_used_by_software(software_name: str, ctx: Context, include_de
         ctx: FastMCP context object
         include_description: Whether to include descriptions (default: False)
     """
-    query = f"""
+    query = """
     PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>
     PREFIX dcterm: <http://purl.org/dc/terms/>
     
-    SELECT ?software ?softwareLabel ?technique ?techniqueLabel WHERE {{
-        {{
+    SELECT ?software ?softwareLabel ?technique ?techniqueLabel WHERE {
+        {
             ?software a attack:Software .
             ?software dcterm:title ?softwareLabel .
             ?technique attack:hasSoftware ?software .
-        }} UNION {{
+        } UNION {
             ?software a attack:Malware .
             ?software dcterm:title ?softwareLabel .
             ?software attack:implementsTechnique ?technique .
-        }}
+        }
         ?technique dcterm:title ?techniqueLabel .
-        FILTER(CONTAINS(LCASE(?softwareLabel), LCASE("{software_name}")))
-    }}
+        FILTER(CONTAINS(LCASE(?softwareLabel), LCASE($software_name)))
+    }
     ORDER BY ?techniqueLabel
     """
     
-    return execute_sparql_query(query, ctx, include_description)
+    return run_sparql(query, ctx, include_description, bindings={"software_name": software_name})
 
 #################################################################
 # Mitigation Query Tools
 #################################################################
 
-@mcp.tool()
-def get_all_mitigations(ctx: Context, include_description: bool = False) -> str:
+@tool(ttl=CATALOG_TTL)
+def get_all_mitigations(ctx: Context, include_description: bool = False,
+                        limit: int = DEFAULT_PAGE_SIZE, offset: int = 0) -> str:
     """Get all mitigations in the MITRE ATT&CK framework.
     
     Args:
         ctx: FastMCP context object
         include_description: Whether to include descriptions (default: False)
+        limit: Rows per page (default: 100, at most 1000)
+        offset: Rows to skip; use the `next offset` from the previous page (default: 0)
     """
     query = """
     PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>
@@ -682,11 +1929,12 @@ def get_all_mitigations(ctx: Context, include_description: bool = False) -> str:
         ?mitigation a attack:Mitigation .
         ?mitigation dcterm:title ?label .
     }
-    ORDER BY ?label
+    ORDER BY ?label ?mitigation
     """
     
-    return execute_sparql_query(query, ctx, include_description)
+    return run_sparql_page(query, ctx, include_description, limit, offset)
 
+@tool()
 def get_all_mitigations_by_keyword(ctx: Context, keyword: str, include_description: bool = False) -> str:
     """Get all mitigations in the MITRE ATT&CK framework.
     
@@ -694,23 +1942,26 @@ def get_all_mitigations_by_keyword(ctx: Context, keyword: str, include_descripti
         ctx: FastMCP context object
         include_description: Whether to include descriptions (default: False)
     """
+    candidates = keyword_candidates(ctx, keyword, ("title",))
     query = f"""
     PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>
     PREFIX dcterm: <http://purl.org/dc/terms/>
     
     SELECT ?mitigation ?label WHERE {{
+        {candidate_slot("mitigation")}
         ?mitigation a attack:Mitigation .
         ?mitigation dcterm:title ?label .
         FILTER(
-            CONTAINS(LCASE(?label), LCASE("{keyword}"))
+            CONTAINS(LCASE(?label), LCASE($keyword))
         )
     }}
     ORDER BY ?label
     """
     
-    return execute_sparql_query(query, ctx, include_description)
+    return run_sparql(query, ctx, include_description, bindings={"keyword": keyword},
+                      candidates={"mitigation": candidates})
 
-@mcp.tool()
+@tool()
 def get_techniques_mitigated_by_mitigation(mitigation_name: str, ctx: Context, include_description: bool = False) -> str:
     """Get all techniques that are mitigated by a specific mitigation.
     
@@ -719,23 +1970,23 @@ def get_techniques_mitigated_by_mitigation(mitigation_name: str, ctx: Context, i
         ctx: FastMCP context object
         include_description: Whether to include descriptions (default: False)
     """
-    query = f"""
+    query = """
     PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>
     PREFIX dcterm: <http://purl.org/dc/terms/>
     
-    SELECT ?mitigation ?mitigationLabel ?technique ?techniqueLabel WHERE {{
+    SELECT ?mitigation ?mitigationLabel ?technique ?techniqueLabel WHERE {
         ?mitigation a attack:Mitigation .
         ?mitigation dcterm:title ?mitigationLabel .
         ?mitigation attack:preventsTechnique ?technique .
         ?technique dcterm:title ?techniqueLabel .
-        FILTER(CONTAINS(LCASE(?mitigationLabel), LCASE("{mitigation_name}")))
-    }}
+        FILTER(CONTAINS(LCASE(?mitigationLabel), LCASE($mitigation_name)))
+    }
     ORDER BY ?techniqueLabel
     """
     
-    return execute_sparql_query(query, ctx, include_description)
+    return run_sparql(query, ctx, include_description, bindings={"mitigation_name": mitigation_name})
 
-@mcp.tool()
+@tool()
 def get_mitigations_for_technique(technique_name: str, ctx: Context, include_description: bool = False) -> str:
     """Get all mitigations that can prevent a specific technique.
     
@@ -744,33 +1995,36 @@ def get_mitigations_for_technique(technique_name: str, ctx: Context, include_des
         ctx: FastMCP context object
         include_description: Whether to include descriptions (default: False)
     """
-    query = f"""
+    query = """
     PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>
     PREFIX dcterm: <http://purl.org/dc/terms/>
     
-    SELECT ?technique ?techniqueLabel ?mitigation ?mitigationLabel WHERE {{
+    SELECT ?technique ?techniqueLabel ?mitigation ?mitigationLabel WHERE {
         ?technique a attack:Technique .
         ?technique dcterm:title ?techniqueLabel .
         ?technique attack:hasMitigation ?mitigation .
         ?mitigation dcterm:title ?mitigationLabel .
-        FILTER(CONTAINS(LCASE(?techniqueLabel), LCASE("{technique_name}")))
-    }}
+        FILTER(CONTAINS(LCASE(?techniqueLabel), LCASE($technique_name)))
+    }
     ORDER BY ?mitigationLabel
     """
     
-    return execute_sparql_query(query, ctx, include_description)
+    return run_sparql(query, ctx, include_description, bindings={"technique_name": technique_name})
 
 #################################################################
 # Tactic Query Tools
 #################################################################
 
-@mcp.tool()
-def get_all_tactics(ctx: Context, include_description: bool = False) -> str:
+@tool(ttl=CATALOG_TTL)
+def get_all_tactics(ctx: Context, include_description: bool = False,
+                    limit: int = DEFAULT_PAGE_SIZE, offset: int = 0) -> str:
     """Get all tactics in the MITRE ATT&CK framework.
     
     Args:
         ctx: FastMCP context object
         include_description: Whether to include descriptions (default: False)
+        limit: Rows per page (default: 100, at most 1000)
+        offset: Rows to skip; use the `next offset` from the previous page (default: 0)
     """
     query = """
     PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>
@@ -780,12 +2034,12 @@ def get_all_tactics(ctx: Context, include_description: bool = False) -> str:
         ?tactic a attack:Tactic .
         ?tactic dcterm:title ?label .
     }
-    ORDER BY ?label
+    ORDER BY ?label ?tactic
     """
     
-    return execute_sparql_query(query, ctx, include_description)
+    return run_sparql_page(query, ctx, include_description, limit, offset)
 
-@mcp.tool()
+@tool()
 def get_tactics_by_keyword(ctx: Context, keyword:str, include_description: bool = False) -> str:
     """Get all tactics in the MITRE ATT&CK framework.
     
@@ -793,23 +2047,26 @@ def get_tactics_by_keyword(ctx: Context, keyword:str, include_description: bool
         ctx: FastMCP context object
         include_description: Whether to include descriptions (default: False)
     """
+    candidates = keyword_candidates(ctx, keyword, ("title",))
     query = f"""
     PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>
     PREFIX dcterm: <http://purl.org/dc/terms/>
     
     SELECT ?tactic ?label WHERE {{
+        {candidate_slot("tactic")}
         ?tactic a attack:Tactic .
         ?tactic dcterm:title ?label .
         FILTER(
-            CONTAINS(LCASE(?label), LCASE("{keyword}"))
+            CONTAINS(LCASE(?label), LCASE($keyword))
         )
     }}
     ORDER BY ?label
     """
     
-    return execute_sparql_query(query, ctx, include_description)
+    return run_sparql(query, ctx, include_description, bindings={"keyword": keyword},
+                      candidates={"tactic": candidates})
 
-@mcp.tool()
+@tool()
 def get_tactics_for_technique(technique_name: str, ctx: Context, include_description: bool = False) -> str:
     """Get all tactics accomplished by a specific technique.
     
@@ -818,33 +2075,36 @@ def get_tactics_for_technique(technique_name: str, ctx: Context, include_descrip
         ctx: FastMCP context object
         include_description: Whether to include descriptions (default: False)
     """
-    query = f"""
+    query = """
     PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>
     PREFIX dcterm: <http://purl.org/dc/terms/>
     
-    SELECT ?technique ?techniqueLabel ?tactic ?tacticLabel WHERE {{
+    SELECT ?technique ?techniqueLabel ?tactic ?tacticLabel WHERE {
         ?technique a attack:Technique .
         ?technique dcterm:title ?techniqueLabel .
         ?technique attack:accomplishesTactic ?tactic .
         ?tactic dcterm:title ?tacticLabel .
-        FILTER(CONTAINS(LCASE(?techniqueLabel), LCASE("{technique_name}")))
-    }}
+        FILTER(CONTAINS(LCASE(?techniqueLabel), LCASE($technique_name)))
+    }
     ORDER BY ?tacticLabel
     """
     
-    return execute_sparql_query(query, ctx, include_description)
+    return run_sparql(query, ctx, include_description, bindings={"technique_name": technique_name})
 
 #################################################################
 # Asset Query Tools (for ICS)
 #################################################################
 
-@mcp.tool()
-def get_all_assets(ctx: Context, include_description: bool = False) -> str:
+@tool(ttl=CATALOG_TTL)
+def get_all_assets(ctx: Context, include_description: bool = False,
+                   limit: int = DEFAULT_PAGE_SIZE, offset: int = 0) -> str:
     """Get all assets in the MITRE ATT&CK framework.
     
     Args:
         ctx: FastMCP context object
         include_description: Whether to include descriptions (default: False)
+        limit: Rows per page (default: 100, at most 1000)
+        offset: Rows to skip; use the `next offset` from the previous page (default: 0)
     """
     query = """
     PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>
@@ -854,12 +2114,12 @@ def get_all_assets(ctx: Context, include_description: bool = False) -> str:
         ?asset a attack:Asset .
         ?asset dcterm:title ?label .
     }
-    ORDER BY ?label
+    ORDER BY ?label ?asset
     """
     
-    return execute_sparql_query(query, ctx, include_description)
+    return run_sparql_page(query, ctx, include_description, limit, offset)
 
-@mcp.tool()
+@tool()
 def get_assets_by_keyword(ctx: Context, keyword:str, include_description: bool = False) -> str:
     """Get all assets in the MITRE ATT&CK framework.
     
@@ -867,24 +2127,27 @@ def get_assets_by_keyword(ctx: Context, keyword:str, include_description: bool =
         ctx: FastMCP context object
         include_description: Whether to include descriptions (default: False)
     """
+    candidates = keyword_candidates(ctx, keyword, ("title", "description"))
     query = f"""
     PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>
     PREFIX dcterm: <http://purl.org/dc/terms/>
     
     SELECT ?asset ?label WHERE {{
+        {candidate_slot("asset")}
         ?asset a attack:Asset .
         ?asset dcterm:title ?label .
         FILTER(
-            CONTAINS(LCASE(?label), LCASE("{keyword}")) ||
-            CONTAINS(LCASE(?description), LCASE("{keyword}"))
+            CONTAINS(LCASE(?label), LCASE($keyword)) ||
+            CONTAINS(LCASE(?description), LCASE($keyword))
         )
     }}
     ORDER BY ?label
     """
     
-    return execute_sparql_query(query, ctx, include_description)
+    return run_sparql(query, ctx, include_description, bindings={"keyword": keyword},
+                      candidates={"asset": candidates})
 
-@mcp.tool()
+@tool()
 def get_techniques_targeting_asset(asset_name: str, ctx: Context, include_description: bool = False) -> str:
     """Get all techniques that target a specific asset.
     
@@ -893,32 +2156,35 @@ def get_techniques_targeting_asset(asset_name: str, ctx: Context, include_descri
         ctx: FastMCP context object
         include_description: Whether to include descriptions (default: False)
     """
-    query = f"""
+    query = """
     PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>
     PREFIX dcterm: <http://purl.org/dc/terms/>
     
-    SELECT ?technique ?techniqueLabel ?asset ?assetLabel WHERE {{
+    SELECT ?technique ?techniqueLabel ?asset ?assetLabel WHERE {
         ?technique a attack:Technique .
         ?technique dcterm:title ?techniqueLabel .
         ?technique attack:targetsAsset ?asset .
         ?asset dcterm:title ?assetLabel .
-        FILTER(CONTAINS(LCASE(?assetLabel), LCASE("{asset_name}")))
-    }}
+        FILTER(CONTAINS(LCASE(?assetLabel), LCASE($asset_name)))
+    }
     ORDER BY ?techniqueLabel
     """
     
-    return execute_sparql_query(query, ctx, include_description)
+    return run_sparql(query, ctx, include_description, bindings={"asset_name": asset_name})
 
 #################################################################
 # Data Source and Component Query Tools
 #################################################################
 
-@mcp.tool()
-async def get_all_data_sources(ctx: Context, include_description: bool = False) -> str:
+@tool(ttl=CATALOG_TTL)
+def get_all_data_sources(ctx: Context, include_description: bool = False,
+                         limit: int = DEFAULT_PAGE_SIZE, offset: int = 0) -> str:
     """Get all data sources in the MITRE ATT&CK framework.
     
     Args:
         include_description: Whether to include descriptions (default: False)
+        limit: Rows per page (default: 100, at most 1000)
+        offset: Rows to skip; use the `next offset` from the previous page (default: 0)
     """
      
     query = """
@@ -929,41 +2195,47 @@ async def get_all_data_sources(ctx: Context, include_description: bool = False)
         ?dataSource a attack:DataSource .
         ?dataSource dcterm:title ?label .
     }
-    ORDER BY ?label
+    ORDER BY ?label ?dataSource
     """
     
-    return format_sparql_results(query, ctx, include_description)
+    return run_sparql_page(query, ctx, include_description, limit, offset)
 
-@mcp.tool()
-async def get_data_sources_by_keyword(ctx: Context, keyword:str, include_description: bool = False) -> str:
+@tool()
+def get_data_sources_by_keyword(ctx: Context, keyword:str, include_description: bool = False) -> str:
     """Get all data sources in the MITRE ATT&CK framework.
     
     Args:
         include_description: Whether to include descriptions (default: False)
     """
      
+    candidates = keyword_candidates(ctx, keyword, ("title",))
     query = f"""
     PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>
     PREFIX dcterm: <http://purl.org/dc/terms/>
     
     SELECT ?dataSource ?label WHERE {{
+        {candidate_slot("dataSource")}
         ?dataSource a attack:DataSource .
         ?dataSource dcterm:title ?label .
         FILTER(
-            CONTAINS(LCASE(?label), LCASE("{keyword}"))
+            CONTAINS(LCASE(?label), LCASE($keyword))
         )
     }}
     ORDER BY ?label
     """
     
-    return format_sparql_results(query, ctx, include_description)
+    return run_sparql(query, ctx, include_description, bindings={"keyword": keyword},
+                      candidates={"dataSource": candidates})
 
-@mcp.tool()
-async def get_all_data_components(ctx: Context, include_description: bool = False) -> str:
+@tool(ttl=CATALOG_TTL)
+def get_all_data_components(ctx: Context, include_description: bool = False,
+                            limit: int = DEFAULT_PAGE_SIZE, offset: int = 0) -> str:
     """Get all data components in the MITRE ATT&CK framework.
     
     Args:
         include_description: Whether to include descriptions (default: False)
+        limit: Rows per page (default: 100, at most 1000)
+        offset: Rows to skip; use the `next offset` from the previous page (default: 0)
     """    
     query = """
     PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>
@@ -973,61 +2245,61 @@ async def get_all_data_components(ctx: Context, include_description: bool = Fals
         ?dataComponent a attack:DataComponent .
         ?dataComponent dcterm:title ?label .
     }
-    ORDER BY ?label
+    ORDER BY ?label ?dataComponent
     """
     
 
-    return format_sparql_results(query, ctx, include_description)
+    return run_sparql_page(query, ctx, include_description, limit, offset)
 
 #################################################################
 # Complex Relationship Queries
 #################################################################
 
-@mcp.tool()
-async def get_technique_relationships(technique_name: str, ctx: Context, include_description: bool = False) -> str:
+@tool()
+def get_technique_relationships(technique_name: str, ctx: Context, include_description: bool = False) -> str:
     """Get comprehensive relationships for a specific technique.
     
     Args:
         technique_name: Name of the technique
         include_description: Whether to include descriptions (default: False)
     """
-    query = f"""
+    query = """
     PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>
     PREFIX dcterm: <http://purl.org/dc/terms/>
     
-    SELECT ?technique ?techniqueLabel ?relationshipType ?relatedEntity ?relatedLabel WHERE {{
+    SELECT ?technique ?techniqueLabel ?relationshipType ?relatedEntity ?relatedLabel WHERE {
         ?technique a attack:Technique .
         ?technique dcterm:title ?techniqueLabel .
-        FILTER(CONTAINS(LCASE(?techniqueLabel), LCASE("{technique_name}")))
+        FILTER(CONTAINS(LCASE(?techniqueLabel), LCASE($technique_name)))
         
-        {{
+        {
             ?technique attack:accomplishesTactic ?relatedEntity .
             ?relatedEntity dcterm:title ?relatedLabel .
             BIND("accomplishes_tactic" AS ?relationshipType)
-        }} UNION {{
+        } UNION {
             ?technique attack:hasMitigation ?relatedEntity .
             ?relatedEntity dcterm:title ?relatedLabel .
             BIND("has_mitigation" AS ?relationshipType)
-        }} UNION {{
+        } UNION {
             ?technique attack:hasSoftware ?relatedEntity .
             ?relatedEntity dcterm:title ?relatedLabel .
             BIND("has_software" AS ?relationshipType)
-        }} UNION {{
+        } UNION {
             ?relatedEntity attack:usesTechnique ?technique .
             ?relatedEntity dcterm:title ?relatedLabel .
             BIND("used_by_group" AS ?relationshipType)
-        }} UNION {{
+        } UNION {
             ?technique attack:targetsAsset ?relatedEntity .
             ?relatedEntity dcterm:title ?relatedLabel .
             BIND("targets_asset" AS ?relationshipType)
-        }}
-    }}
+        }
+    }
     ORDER BY ?relationshipType ?relatedLabel
     """
-    return format_sparql_results(query, ctx, include_description)
+    return run_sparql(query, ctx, include_description, bindings={"technique_name": technique_name})
 
-@mcp.tool()
-async def get_group_capabilities(group_name: str, ctx: Context, include_description: bool = False) -> str:
+@tool()
+def get_group_capabilities(group_name: str, ctx: Context, include_description: bool = False) -> str:
     """Get comprehensive capabilities (techniques, software, malware) for an adversary group.
     
     Args:
@@ -1035,77 +2307,47 @@ async def get_group_capabilities(group_name: str, ctx: Context, include_descript
         include_description: Whether to include descriptions (default: False)
     """
    
-    query = f"""
+    query = """
     PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>
     PREFIX dcterm: <http://purl.org/dc/terms/>
     
-    SELECT ?group ?groupLabel ?capabilityType ?capability ?capabilityLabel WHERE {{
+    SELECT ?group ?groupLabel ?capabilityType ?capability ?capabilityLabel WHERE {
         ?group a attack:AdversaryGroup .
         ?group dcterm:title ?groupLabel .
-        FILTER(CONTAINS(LCASE(?groupLabel), LCASE("{group_name}")))
+        FILTER(CONTAINS(LCASE(?groupLabel), LCASE($group_name)))
         
-        {{
+        {
             ?group attack:usesTechnique ?capability .
             ?capability dcterm:title ?capabilityLabel .
             BIND("technique" AS ?capabilityType)
-        }} UNION {{
+        } UNION {
             ?group attack:usesSoftware ?capability .
             ?capability dcterm:title ?capabilityLabel .
             BIND("software" AS ?capabilityType)
-        }} UNION {{
+        } UNION {
             ?group attack:usesMalware ?capability .
             ?capability dcterm:title ?capabilityLabel .
             BIND("malware" AS ?capabilityType)
-        }}
-    }}
-    ORDER BY ?capabilityType ?capabilityLabel
-    """
-    return format_sparql_results(query, ctx, include_description)
-
-#################################################################
-# Statistics and Summary Tools
-#################################################################
-
-@mcp.tool()
-async def get_attack_statistics() -> str:
-    """Get statistical summary of the MITRE ATT&CK knowledge base."""
-    
-    query = """
-    PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>
-    
-    SELECT 
-        (COUNT(DISTINCT ?technique) AS ?techniqueCount)
-        (COUNT(DISTINCT ?subtechnique) AS ?subtechniqueCount)
-        (COUNT(DISTINCT ?group) AS ?groupCount)
-        (COUNT(DISTINCT ?software) AS ?softwareCount)
-        (COUNT(DISTINCT ?malware) AS ?malwareCount)
-        (COUNT(DISTINCT ?mitigation) AS ?mitigationCount)
-        (COUNT(DISTINCT ?tactic) AS ?tacticCount)
-        (COUNT(DISTINCT ?asset) AS ?assetCount)
-    WHERE {
-        OPTIONAL { ?technique a attack:Technique }
-        OPTIONAL { ?subtechnique a attack:SubTechnique }
-        OPTIONAL { ?group a attack:AdversaryGroup }
-        OPTIONAL { ?software a attack:Software }
-        OPTIONAL { ?malware a attack:Malware }
-        OPTIONAL { ?mitigation a attack:Mitigation }
-        OPTIONAL { ?tactic a attack:Tactic }
-        OPTIONAL { ?asset a attack:Asset }
+        }
     }
+    ORDER BY ?capabilityType ?capabilityLabel
     """
-    return format_sparql_results(query)
+    return run_sparql(query, ctx, include_description, bindings={"group_name": group_name})
 
 #################################################################
 # CVE Query Tools
 #################################################################
 
-@mcp.tool()
-def get_all_cves(ctx: Context, include_description: bool = False) -> str:
+@tool()
+def get_all_cves(ctx: Context, include_description: bool = False,
+                 limit: int = DEFAULT_PAGE_SIZE, offset: int = 0) -> str:
     """Get all CVEs in the knowledge base.
     
     Args:
         ctx: FastMCP context object
         include_description: Whether to include descriptions (default: False)
+        limit: Rows per page (default: 100, at most 1000)
+        offset: Rows to skip; use the `next offset` from the previous page (default: 0)
     """
     query = """
     PREFIX cve: <http://w3id.org/sepses/vocab/ref/cve#>
@@ -1118,12 +2360,11 @@ def get_all_cves(ctx: Context, include_description: bool = False) -> str:
                  dcterms:description ?description .
         }
     }
-    ORDER BY ?cveId
-    LIMIT 50
+    ORDER BY ?cveId ?description
     """
-    return execute_sparql_query(query, ctx, include_description)
+    return run_sparql_page(query, ctx, include_description, limit, offset)
 
-@mcp.tool()
+@tool()
 def get_cve_by_id(cve_id: str, ctx: Context, include_description: bool = False) -> str:
     """Get detailed information about a specific CVE.
     
@@ -1132,25 +2373,25 @@ def get_cve_by_id(cve_id: str, ctx: Context, include_description: bool = False)
         ctx: FastMCP context object
         include_description: Whether to include descriptions (default: False)
     """
-    query = f"""
+    query = """
     PREFIX cve: <http://w3id.org/sepses/vocab/ref/cve#>
     PREFIX dcterms: <http://purl.org/dc/terms/>
     
-    SELECT ?cveId ?description ?issued ?modified WHERE {{
-        GRAPH ?g {{
+    SELECT ?cveId ?description ?issued ?modified WHERE {
+        GRAPH ?g {
             ?cve a cve:CVE ;
                  cve:id ?cveId ;
                  dcterms:description ?description ;
                  dcterms:issued ?issued ;
                  dcterms:modified ?modified .
-            FILTER(CONTAINS(LCASE(?cveId), LCASE("{cve_id}")))
-        }}
-    }}
+            FILTER(CONTAINS(LCASE(?cveId), LCASE($cve_id)))
+        }
+    }
     """
     
-    return execute_sparql_query(query, ctx, include_description)
+    return run_sparql(query, ctx, include_description, bindings={"cve_id": cve_id})
 
-@mcp.tool()
+@tool()
 def search_cves_by_keyword(keyword: str, ctx: Context, include_description: bool = False) -> str:
     """Search CVEs by keyword in title or description.
     
@@ -1159,6 +2400,7 @@ def search_cves_by_keyword(keyword: str, ctx: Context, include_description: bool
         ctx: FastMCP context object
         include_description: Whether to include descriptions (default: False)
     """
+    candidates = keyword_candidates(ctx, keyword, ("description",))
     query = f"""
     PREFIX cve: <http://w3id.org/sepses/vocab/ref/cve#>
     PREFIX cvss: <http://w3id.org/sepses/vocab/ref/cvss#>
@@ -1166,10 +2408,11 @@ def search_cves_by_keyword(keyword: str, ctx: Context, include_description: bool
     
     SELECT DISTINCT ?cveId ?description ?score WHERE {{
         GRAPH ?g1 {{
+            {candidate_slot("cve")}
             ?cve a cve:CVE ;
                  cve:id ?cveId ;
                  dcterms:description ?description .
-            FILTER(CONTAINS(LCASE(?description), LCASE("{keyword}")))
+            FILTER(CONTAINS(LCASE(?description), LCASE($keyword)))
         }}
         OPTIONAL {{
             GRAPH ?g2 {{
@@ -1187,13 +2430,14 @@ def search_cves_by_keyword(keyword: str, ctx: Context, include_description: bool
     LIMIT 50
     """
     
-    return execute_sparql_query(query, ctx, include_description)
+    return run_sparql(query, ctx, include_description, bindings={"keyword": keyword},
+                      candidates={"cve": candidates})
 
 #################################################################
 # CVSS Query Tools
 #################################################################
 
-@mcp.tool()
+@tool()
 def get_cves_by_cvss_score(min_score: float, max_score: float, ctx:Context, include_description: bool = False) -> str:
     """Get CVEs within a specific CVSS score range.
     
@@ -1203,30 +2447,30 @@ def get_cves_by_cvss_score(min_score: float, max_score: float, ctx:Context, incl
         ctx: FastMCP context object
         include_description: Whether to include descriptions (default: False)
     """
-    query = f"""
+    query = """
         PREFIX cve: <http://w3id.org/sepses/vocab/ref/cve#>
         PREFIX cvss: <http://w3id.org/sepses/vocab/ref/cvss#>
         PREFIX dcterms: <http://purl.org/dc/terms/>
         
-        SELECT DISTINCT ?cveId ?score ?description WHERE {{
-            GRAPH ?g1 {{
+        SELECT DISTINCT ?cveId ?score ?description WHERE {
+            GRAPH ?g1 {
                 ?cve a cve:CVE ;
                      cve:id ?cveId ;
                      dcterms:description ?description ;
                      cve:hasCVSS3BaseMetric ?cvss3 .
-            }}
-            GRAPH ?g2 {{
+            }
+            GRAPH ?g2 {
                 ?cvss3 cvss:baseScore ?score .
-            }}
-            FILTER(?score >= {min_score} && ?score <= {max_score})
-        }}
+            }
+            FILTER(?score >= $min_score && ?score <= $max_score)
+        }
         ORDER BY DESC(?score)
         LIMIT 30
         """
     
-    return execute_sparql_query(query, ctx, include_description)
+    return run_sparql(query, ctx, include_description, bindings={"min_score": min_score, "max_score": max_score})
 
-@mcp.tool()
+@tool()
 def get_high_severity_cves(ctx: Context, include_description: bool = False) -> str:
     """Get CVEs with high severity (CVSS score >= 7.0).
     
@@ -1257,7 +2501,7 @@ def get_high_severity_cves(ctx: Context, include_description: bool = False) -> s
     
     return execute_sparql_query(query, ctx, include_description)
 
-@mcp.tool()
+@tool()
 def get_critical_cves(ctx: Context, include_description: bool = False) -> str:
     """Get CVEs with critical severity (CVSS score >= 9.0).
     
@@ -1292,7 +2536,7 @@ def get_critical_cves(ctx: Context, include_description: bool = False) -> str:
 # Reference Query Tools
 #################################################################
 
-@mcp.tool()
+@tool()
 def get_references_for_cve(cve_id: str, ctx: Context, include_description: bool = False) -> str:
     """Get all references for a specific CVE.
     
@@ -1301,28 +2545,28 @@ def get_references_for_cve(cve_id: str, ctx: Context, include_description: bool
         ctx: FastMCP context object
         include_description: Whether to include descriptions (default: False)
     """
-    query = f"""
+    query = """
     PREFIX cve: <http://w3id.org/sepses/vocab/ref/cve#>
     PREFIX dcterms: <http://purl.org/dc/terms/>
     
-    SELECT ?cve ?reference ?referenceUrl ?referenceSource ?referenceType WHERE {{
+    SELECT ?cve ?reference ?referenceUrl ?referenceSource ?referenceType WHERE {
         ?cve a cve:CVE .
         ?cve cve:hasReference ?reference .
-        FILTER(CONTAINS(STR(?cve), "{cve_id}"))
-        OPTIONAL {{ ?reference cve:referenceUrl ?referenceUrl }}
-        OPTIONAL {{ ?reference cve:referenceSource ?referenceSource }}
-        OPTIONAL {{ ?reference cve:referenceType ?referenceType }}
-    }}
+        FILTER(CONTAINS(STR(?cve), $cve_id))
+        OPTIONAL { ?reference cve:referenceUrl ?referenceUrl }
+        OPTIONAL { ?reference cve:referenceSource ?referenceSource }
+        OPTIONAL { ?reference cve:referenceType ?referenceType }
+    }
     ORDER BY ?reference
     """
     
-    return execute_sparql_query(query, ctx, include_description)
+    return run_sparql(query, ctx, include_description, bindings={"cve_id": cve_id})
 
 #################################################################
 # Time-based Query Tools
 #################################################################
 
-@mcp.tool()
+@tool()
 def get_recent_cves(days: int = 30, ctx: Context = None, include_description: bool = False) -> str:
     """Get CVEs published in the last N days.
     
@@ -1337,27 +2581,30 @@ def get_recent_cves(days: int = 30, ctx: Context = None, include_description: bo
     cutoff_date = datetime.now() - timedelta(days=days)
     cutoff_date_str = cutoff_date.strftime("%Y-%m-%dT00:00:00")
     
-    query = f"""
+    query = """
     PREFIX cve: <http://w3id.org/sepses/vocab/ref/cve#>
     PREFIX dcterms: <http://purl.org/dc/terms/>
     PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
     
-    SELECT DISTINCT ?cveId ?description ?issued WHERE {{
-        GRAPH ?g {{
+    SELECT DISTINCT ?cveId ?description ?issued WHERE {
+        GRAPH ?g {
             ?cve a cve:CVE ;
                  cve:id ?cveId ;
                  dcterms:description ?description ;
                  dcterms:issued ?issued .
-        }}
-        FILTER(?issued >= "{cutoff_date_str}"^^xsd:dateTime)
-    }}
+        }
+        FILTER(?issued >= $cutoff_date)
+    }
     ORDER BY DESC(?issued)
     LIMIT 100
     """
     
-    return execute_sparql_query(query, ctx, include_description)
+    return run_sparql(
+        query, ctx, include_description,
+        bindings={"cutoff_date": rdflib.Literal(cutoff_date_str, datatype=rdflib.XSD.dateTime)},
+    )
 
-@mcp.tool()
+@tool()
 def get_cves_by_year(year: int, ctx: Context, include_description: bool = False) -> str:
     """Get CVEs published in a specific year.
     
@@ -1366,36 +2613,272 @@ def get_cves_by_year(year: int, ctx: Context, include_description: bool = False)
         ctx: FastMCP context object
         include_description: Whether to include descriptions (default: False)
     """
-    query = f"""
+    query = """
     PREFIX cve: <http://w3id.org/sepses/vocab/ref/cve#>
     PREFIX dcterms: <http://purl.org/dc/terms/>
     PREFIX cvss: <http://w3id.org/sepses/vocab/ref/cvss#>
     
-    SELECT DISTINCT ?cveId ?description ?issued ?baseScore WHERE {{
-        GRAPH ?g1 {{
+    SELECT DISTINCT ?cveId ?description ?issued ?baseScore WHERE {
+        GRAPH ?g1 {
             ?cve a cve:CVE ;
                  cve:id ?cveId ;
                  dcterms:description ?description ;
                  dcterms:issued ?issued .
-        }}
-        OPTIONAL {{
-            GRAPH ?g2 {{
-                {{
+        }
+        OPTIONAL {
+            GRAPH ?g2 {
+                {
                     ?cve cve:hasCVSS3BaseMetric ?cvss3 .
                     ?cvss3 cvss:baseScore ?baseScore .
-                }} UNION {{
+                } UNION {
                     ?cve cve:hasCVSS2BaseMetric ?cvss2 .
                     ?cvss2 cvss:baseScore ?baseScore .
+                }
+            }
+        }
+        FILTER(YEAR(?issued) = $year)
+    }
+    ORDER BY DESC(?issued) DESC(?baseScore)
+    LIMIT 500
+    """
+    
+    return run_sparql(query, ctx, include_description, bindings={"year": year})
+
+#################################################################
+# Composite Tools
+#################################################################
+
+DOSSIER_MAX_CVES = 50
+CVE_ID_PATTERN = re.compile(r"^CVE-\d{4}-\d{4,}$")
+
+# One query walks CVE -> CWE -> CAPEC -> ATT&CK technique -> mitigation. Each
+# hop is OPTIONAL inside the previous one, so a missing link keeps the rest of
+# the chain, and VALUES seeds it with the requested IDs instead of a scan.
+# The CWE -> CAPEC link is matched in either direction. The SEPSES endpoint
+# keeps CVEs in named graphs; a local file or store is one default graph, on
+# which rdflib rejects GRAPH patterns, so {cve_graph}/{cwe_graph} are empty there.
+DOSSIER_QUERY = """
+PREFIX cve: <http://w3id.org/sepses/vocab/ref/cve#>
+PREFIX cwe: <http://w3id.org/sepses/vocab/ref/cwe#>
+PREFIX capec: <http://w3id.org/sepses/vocab/ref/capec#>
+PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>
+PREFIX dcterms: <http://purl.org/dc/terms/>
+
+SELECT DISTINCT ?cveId ?cwe ?cweId ?capec ?capecId ?capecLabel
+                ?technique ?techniqueLabel ?mitigation ?mitigationLabel WHERE {{
+    VALUES ?cveId {{ {cve_ids} }}
+    {cve_graph} {{
+        ?cve cve:id ?cveId .
+    }}
+    OPTIONAL {{
+        {cwe_graph} {{
+            ?cve cve:hasCWE ?cwe .
+        }}
+        OPTIONAL {{ ?cwe cwe:id ?cweId }}
+        OPTIONAL {{
+            ?cwe (cwe:hasCAPEC|^capec:hasCWE) ?capec .
+            OPTIONAL {{ ?capec capec:id ?capecId }}
+            OPTIONAL {{ ?capec dcterms:title ?capecLabel }}
+            OPTIONAL {{
+                ?technique attack:hasCAPEC ?capec ;
+                           dcterms:title ?techniqueLabel .
+                OPTIONAL {{
+                    ?technique attack:hasMitigation ?mitigation .
+                    ?mitigation dcterms:title ?mitigationLabel .
                 }}
             }}
         }}
-        FILTER(YEAR(?issued) = {year})
     }}
-    ORDER BY DESC(?issued) DESC(?baseScore)
-    LIMIT 500
+}}
+"""
+
+def local_name(value) -> Optional[str]:
+    """Local name of a URI (as format_row shows it), or the literal text."""
+    if value is None:
+        return None
+    text = str(value)
+    if isinstance(value, rdflib.URIRef):
+        return text.split('#')[-1] if '#' in text else text.split('/')[-1]
+    return text
+
+def build_dossiers(rows, cve_ids: List[str]) -> Dict[str, Any]:
+    """Group the flat chain rows into one nested dossier per CVE."""
+    dossiers: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        values = row.asdict()
+        cve = dossiers.setdefault(str(values["cveId"]), {"cwes": {}})
+        if values.get("cwe") is None:
+            continue
+        cwe = cve["cwes"].setdefault(str(values["cwe"]), {
+            "id": local_name(values.get("cweId") or values["cwe"]), "capecs": {},
+        })
+        if values.get("capec") is None:
+            continue
+        capec = cwe["capecs"].setdefault(str(values["capec"]), {
+            "id": local_name(values.get("capecId") or values["capec"]),
+            "label": local_name(values.get("capecLabel")),
+            "techniques": {},
+        })
+        if values.get("technique") is None:
+            continue
+        technique = capec["techniques"].setdefault(str(values["technique"]), {
+            "id": local_name(values["technique"]),
+            "label": local_name(values.get("techniqueLabel")),
+            "mitigations": {},
+        })
+        if values.get("mitigation") is not None:
+            technique["mitigations"][str(values["mitigation"])] = {
+                "id": local_name(values["mitigation"]),
+                "label": local_name(values.get("mitigationLabel")),
+            }
+
+    def as_lists(node):
+        # The URI-keyed dicts only deduplicate rows; emit plain lists.
+        if isinstance(node, dict):
+            return {key: (list(map(as_lists, value.values())) if key in ("cwes", "capecs", "techniques", "mitigations")
+                          else as_lists(value)) for key, value in node.items()}
+        return node
+
+    return {cve_id: as_lists(dossiers[cve_id]) for cve_id in cve_ids if cve_id in dossiers}
+
+@tool()
+def get_cve_dossier(cve_ids: List[str], ctx: Context) -> str:
+    """Resolve CVEs to their weaknesses, attack patterns, ATT&CK techniques and mitigations in one call.
+    
+    Use this instead of chaining get_cve_by_id and ad-hoc queries for the
+    CVE -> CWE -> CAPEC -> ATT&CK chain.
+
+    Args:
+        cve_ids: Up to 50 CVE identifiers (e.g., ["CVE-2021-44228"])
+        ctx: FastMCP context object
+        
+    Returns:
+        JSON object {"dossiers": {cveId: {"cwes": [{"id", "capecs": [{"id", "label",
+        "techniques": [{"id", "label", "mitigations": [...]}]}]}]}}, "not_found": [...]}
+    """
+    cve_ids = list(dict.fromkeys(cve_id.strip().upper() for cve_id in cve_ids if cve_id.strip()))
+    if not cve_ids:
+        return "Error: no CVE IDs given."
+    if len(cve_ids) > DOSSIER_MAX_CVES:
+        return f"Error: at most {DOSSIER_MAX_CVES} CVE IDs per call ({len(cve_ids)} given)."
+    invalid = [cve_id for cve_id in cve_ids if not CVE_ID_PATTERN.match(cve_id)]
+    if invalid:
+        return f"Error: invalid CVE IDs: {', '.join(invalid)} (expected CVE-YYYY-NNNN)."
+
+    context = ctx.request_context.lifespan_context
+    named_graphs = context["is_sparql_endpoint"]
+    query = DOSSIER_QUERY.format(
+        cve_ids=" ".join(rdflib.Literal(cve_id).n3() for cve_id in cve_ids),
+        cve_graph="GRAPH ?g1" if named_graphs else "",
+        cwe_graph="GRAPH ?g2" if named_graphs else "",
+    )
+    max_tokens = session_setting(ctx, "max_tokens")
+    key = (query, "dossier", max_tokens)
+    cached = sparql_cache.get(key, cache_ttl())
+    if cached is not None:
+        return cached
+
+    start_time = time.time()
+    try:
+        rows = list(context["graph"].query(query))
+        tool_metrics.record_rows(current_tool.get() or "get_cve_dossier", len(rows))
+        dossiers = build_dossiers(rows, cve_ids)
+        context["metrics"]["queries"] += 1
+        context["metrics"]["total_time"] += time.time() - start_time
+    except Exception as e:
+        logger.error(f"Dossier query error: {str(e)}")
+        return f"Error executing SPARQL query: {str(e)}"
+
+    # Keep whole dossiers within the token budget; list the ones left out.
+    included, omitted, used = {}, [], 0
+    for cve_id, dossier in dossiers.items():
+        used += count_tokens(json.dumps(dossier, separators=(",", ":")))
+        if max_tokens is not None and used > max_tokens and included:
+            omitted.append(cve_id)
+            continue
+        included[cve_id] = dossier
+    result = {"dossiers": included, "not_found": [cve_id for cve_id in cve_ids if cve_id not in dossiers]}
+    if omitted:
+        result["omitted"] = {"cve_ids": omitted, "reason": f"token budget of {max_tokens} reached"}
+    formatted = json.dumps(result, separators=(",", ":"))
+    sparql_cache.put(key, formatted)
+    return formatted
+
+#################################################################
+# Batch Tools
+#################################################################
+
+BATCH_MAX_CALLS = 20
+
+async def run_batch_call(call: Dict[str, Any], ctx: Context) -> str:
+    """Run one batch_execute entry as a call of the registered tool and return its result.
+
+    The arguments are validated against the tool's schema, and the call takes
+    a concurrency slot and is counted per client and per tool like a direct call.
     """
+    if not isinstance(call, dict):
+        return "Error: each call must be an object with 'tool' and 'args', or 'sparql'."
+    if "sparql" in call:
+        name = "execute_sparql_query"
+        arguments = {"query": call["sparql"], "include_description": call.get("include_description", False)}
+    else:
+        name = call.get("tool")
+        arguments = call.get("args") or {}
+    registered = mcp._tool_manager.get_tool(name) if name != "batch_execute" else None
+    if registered is None:
+        return f"Error: unknown tool '{name}'."
+    if not isinstance(arguments, dict):
+        return f"Error: 'args' for {name} must be an object."
+
+    # Each call gets its own tool name for cache TTLs, as if called directly.
+    token = current_tool.set(None)
+    try:
+        return await registered.run(arguments, context=ctx)
+    except Exception as e:
+        logger.error(f"Batch call {name} failed: {str(e)}")
+        return f"Error: {str(e)}"
+    finally:
+        current_tool.reset(token)
+
+@tool(bounded=False)
+async def batch_execute(calls: List[Dict[str, Any]], ctx: Context) -> str:
+    """Run several lookups concurrently and return all results in one response.
     
-    return execute_sparql_query(query, ctx, include_description)
+    Use this instead of one tool call per lookup, e.g. to fetch a technique's
+    tactics, mitigations and groups together.
+
+    Args:
+        calls: Up to 20 entries, each either {"tool": "<tool name>", "args": {...}}
+            or {"sparql": "<SPARQL query>", "include_description": false}
+        ctx: FastMCP context object
+        
+    Returns:
+        One `### [n] ...` section per call, in the order given
+    """
+    if not calls:
+        return "Error: no calls given."
+    if len(calls) > BATCH_MAX_CALLS:
+        return f"Error: at most {BATCH_MAX_CALLS} calls per batch ({len(calls)} given)."
+
+    results = await asyncio.gather(*(run_batch_call(call, ctx) for call in calls))
+
+    # Each result is budgeted on its own; keep the combined response within budget too.
+    max_tokens = session_setting(ctx, "max_tokens")
+    sections, used = [], 0
+    for index, (call, result) in enumerate(zip(calls, results), 1):
+        if isinstance(call, dict) and "sparql" in call:
+            title = "sparql"
+        elif isinstance(call, dict):
+            title = f"{call.get('tool')}({json.dumps(call.get('args') or {})})"
+        else:
+            title = "invalid call"
+        section = f"### [{index}] {title}\n{result}"
+        used += count_tokens(section)
+        if max_tokens is not None and used > max_tokens and sections:
+            sections.append(f"[omitted calls {index}-{len(calls)}: token budget of {max_tokens} reached]")
+            break
+        sections.append(section)
+    return "\n\n".join(sections)
 
 #################################################################
 # MCP Resources - Schema Documentation
@@ -1493,57 +2976,24 @@ ORDER BY DESC(?baseScore)
 - ❌ `NOW()` function (not supported, calculate dates in Python)
 """
 
+@mcp.resource("sepses://metrics")
+def get_metrics_resource() -> str:
+    """Per-tool call, error, latency, row and byte metrics of this server process."""
+    return json.dumps(server_metrics(_shared_context), indent=2)
+
 # Run the server
 if __name__ == "__main__":
-    logger.info("Starting mcp.run()")
+    if args.build_store:
+        if not (args.rdf_file and args.store_path):
+            parser.error("--build-store requires --rdf-file and --store-path")
+        build_store(args.rdf_file, args.store_path)
+        sys.exit(0)
+    logger.info(f"Starting mcp.run() with transport={args.transport}")
+    if args.transport != "stdio":
+        logger.info(f"Serving on http://{args.host}:{args.port} (max concurrency {args.max_concurrency})")
     try:
-        mcp.run()
+        mcp.run(transport=args.transport)
     except Exception as e:
         logger.error(f"Failed to start RDF Explorer: {str(e)}")
         sys.exit(1)
     logger.info("mcp.run() completed")
-
-@mcp.prompt()
-def text_to_sparql(prompt: str, ctx: Context, include_description: bool = False) -> str:
-    """Execute an arbitrary SPARQL query supplied in the prompt text.
-
-    The MCP agent should pass the full SPARQL statement (SELECT/ASK/CONSTRUCT/DESCRIBE).
-    This helper enforces the configured token budget and runs the query against
-    whichever data source (local file or SEPSES endpoint) is active.
-    """
-    sanitized = prompt.strip()
-    if not sanitized:
-        return "Error: Empty prompt. Provide a full SPARQL query."
-
-    upper_prompt = sanitized.lstrip().upper()
-    if not upper_prompt.startswith(("SELECT", "ASK", "CONSTRUCT", "DESCRIBE")):
-        return (
-            "Error: text_to_sparql expects a complete SPARQL query beginning with "
-            "SELECT/ASK/CONSTRUCT/DESCRIBE. Provide the query you want to execute."
-        )
-
-    encoder = tiktoken.get_encoding("gpt2")
-    max_tokens = ctx.request_context.lifespan_context.get("max_tokens", 10000)
-    prepared_query = prepare_query(sanitized)
-    input_tokens = len(encoder.encode(prepared_query))
-    if input_tokens > max_tokens:
-        return (
-            f"Error: Input exceeds token limit ({input_tokens} tokens > {max_tokens}). "
-            "Shorten your query or increase MAX_TOKENS with 'set_max_tokens'."
-        )
-
-    start_time = time.time()
-    try:
-        results = execute_sparql_query(prepared_query, ctx, include_description)
-    except Exception as exc:
-        logger.error(f"Failed to run custom SPARQL query: {exc}")
-        return f"Error executing SPARQL query: {exc}"
-
-    output_tokens = len(encoder.encode(results))
-    total_tokens = input_tokens + output_tokens
-    exec_time = time.time() - start_time
-    usage_stats = (
-        f"[Resource Usage: Input Tokens: {input_tokens}, "
-        f"Output Tokens: {output_tokens}, Total: {total_tokens}, Time: {exec_time:.2f}s]"
-    )
-    return f"{results}\n\n{usage_stats}"
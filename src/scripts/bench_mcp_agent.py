@@ -0,0 +1,101 @@
+"""
+Benchmark the MCP RDF agent node per question: a fresh MCPAgent per question
+that connects, lists tools and disconnects (cold) versus the persistent agent
+in src/agents/mcp_rdf_agent.py (warm).
+
+Usage:
+    uv run python -m scripts.bench_mcp_agent
+    uv run python -m scripts.bench_mcp_agent --questions "List CAPEC attack patterns for CWE-79" --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from mcp_use import MCPAgent
+
+from src.agents.mcp_rdf_agent import (
+    close_mcp_agent,
+    get_mcp_client,
+    mcp_stats,
+    run_mcp_agent,
+    strict_system_prompt,
+)
+from src.config.settings import llm
+
+DEFAULT_QUESTIONS = [
+    "What is CWE-79?",
+    "List CAPEC attack patterns related to SQL injection.",
+    "Give me the description of CVE-2014-0160.",
+]
+
+
+async def run_cold(question: str) -> tuple[float, float]:
+    """Build, initialize and close an MCPAgent for one question."""
+    start_time = time.perf_counter()
+    agent = MCPAgent(
+        llm=llm,
+        client=get_mcp_client(),
+        max_steps=30,
+        verbose=False,
+        system_prompt=strict_system_prompt,
+    )
+    await agent.initialize()
+    init_ms = (time.perf_counter() - start_time) * 1000
+    try:
+        await agent.run(question, manage_connector=False)
+    finally:
+        await agent.close()
+    return (time.perf_counter() - start_time) * 1000, init_ms
+
+
+async def run_warm(question: str) -> float:
+    start_time = time.perf_counter()
+    await run_mcp_agent(question)
+    return (time.perf_counter() - start_time) * 1000
+
+
+def summarize(label: str, samples: list[float]) -> None:
+    print(
+        f"{label:<24} n={len(samples):<3} mean={statistics.mean(samples):9.1f} ms  "
+        f"median={statistics.median(samples):9.1f} ms  max={max(samples):9.1f} ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark MCP agent overhead per question.")
+    parser.add_argument("--questions", nargs="+", default=DEFAULT_QUESTIONS, help="Questions to run")
+    parser.add_argument("--repeat", type=int, default=1, help="Passes over the question list (default: 1)")
+    args = parser.parse_args()
+
+    questions = args.questions * args.repeat
+    cold, cold_init = [], []
+    for question in questions:
+        total_ms, init_ms = await run_cold(question)
+        cold.append(total_ms)
+        cold_init.append(init_ms)
+
+    warm = []
+    try:
+        for question in questions:
+            warm.append(await run_warm(question))
+    finally:
+        await close_mcp_agent()
+
+    print()
+    summarize("cold: per-question agent", cold)
+    summarize("cold: connect + tools", cold_init)
+    summarize("warm: persistent agent", warm)
+    print(
+        f"\npersistent agent: {mcp_stats['initializations']} initialization(s) "
+        f"({mcp_stats['init_ms']:.1f} ms total), {mcp_stats['reconnects']} reconnect(s)"
+    )
+    print(f"saved per question: {statistics.mean(cold) - statistics.mean(warm):.1f} ms (mean)")
+    print("LLM latency dominates both paths; compare the medians over several repeats.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,109 @@
+"""
+Compare the size of SEPSES MCP tool results in each output format (text, tsv,
+json) on representative tools.
+
+The tools run in-process against a generated ATT&CK-like graph: techniques with
+descriptions, tactics, mitigations and groups, linked many-to-many so that
+labels repeat across rows the way they do in the SEPSES dump. For each tool and
+format the script reports response bytes and tokens, and the saving relative to
+the text format. Results are not cut off at the token budget.
+
+Usage:
+    uv run python -m scripts.bench_output_formats
+    uv run python -m scripts.bench_output_formats --techniques 1000 --mitigations 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import random
+from types import SimpleNamespace
+
+import rdflib
+
+from scripts.run_sepses_mcp import load_server
+
+# (label, tool name, arguments) -- listings, one-to-many and keyword lookups.
+TOOL_CALLS = [
+    ("all techniques", "get_all_techniques", {"limit": 200}),
+    ("techniques by tactic", "get_techniques_by_tactic", {"tactic_name": "tactic 0001"}),
+    ("mitigations for technique", "get_mitigations_for_technique", {"technique_name": "technique 00"}),
+    ("techniques used by group", "get_techniques_used_by_group", {"group_name": "group 0001"}),
+    ("technique relationships", "get_technique_relationships", {"technique_name": "technique 0001"}),
+]
+
+
+def build_graph(techniques: int, tactics: int, mitigations: int, groups: int, seed: int = 7) -> rdflib.Graph:
+    attack = rdflib.Namespace("http://w3id.org/sepses/vocab/ref/attack#")
+    resource = rdflib.Namespace("http://w3id.org/sepses/resource/attack/")
+    title = rdflib.URIRef("http://purl.org/dc/terms/title")
+    description = rdflib.URIRef("http://purl.org/dc/terms/description")
+    rng = random.Random(seed)
+    graph = rdflib.Graph()
+
+    def entity(kind: str, cls: rdflib.URIRef, count: int) -> list[rdflib.URIRef]:
+        nodes = []
+        for i in range(count):
+            node = resource[f"{kind}/{kind[0].upper()}{i:04d}"]
+            graph.add((node, rdflib.RDF.type, cls))
+            graph.add((node, title, rdflib.Literal(f"{kind} {i:04d}")))
+            nodes.append(node)
+        return nodes
+
+    tactic_nodes = entity("tactic", attack.Tactic, tactics)
+    mitigation_nodes = entity("mitigation", attack.Mitigation, techniques // 4 or 1)
+    group_nodes = entity("group", attack.AdversaryGroup, groups)
+    for i, technique in enumerate(entity("technique", attack.Technique, techniques)):
+        graph.add((technique, description, rdflib.Literal(f"Adversaries may use technique {i:04d} to gain access.")))
+        graph.add((technique, attack.accomplishesTactic, rng.choice(tactic_nodes)))
+        for mitigation in rng.sample(mitigation_nodes, min(mitigations, len(mitigation_nodes))):
+            graph.add((technique, attack.hasMitigation, mitigation))
+        for group in rng.sample(group_nodes, min(3, len(group_nodes))):
+            graph.add((group, attack.usesTechnique, technique))
+    return graph
+
+
+def cell(size, baseline) -> str:
+    saving = 1 - size[1] / baseline[1] if baseline[1] else 0.0
+    return f"{size[0]:>9} / {size[1]:>6} {saving:>5.0%}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare tool result sizes across output formats.")
+    parser.add_argument("--techniques", type=int, default=500, help="Generated techniques (default: 500)")
+    parser.add_argument("--tactics", type=int, default=14, help="Generated tactics (default: 14)")
+    parser.add_argument("--mitigations", type=int, default=4, help="Mitigations per technique (default: 4)")
+    parser.add_argument("--groups", type=int, default=40, help="Generated groups (default: 40)")
+    args = parser.parse_args()
+
+    server = load_server()
+    # The server logs every query it runs; keep the table readable.
+    logging.getLogger(server.logger.name).setLevel(logging.WARNING)
+    graph = build_graph(args.techniques, args.tactics, args.mitigations, args.groups)
+    context = {
+        "graph": graph,
+        "metrics": {"queries": 0, "total_time": 0.0},
+        "max_tokens": None,
+        "keyword_index": None,
+        "is_sparql_endpoint": False,
+    }
+    ctx = SimpleNamespace(request_context=SimpleNamespace(lifespan_context=context))
+    print(f"[bench] {len(graph)} triples; sizes as bytes / tokens, saving relative to text\n")
+    print(f"{'tool':<28}" + "".join(f"{output_format:>24}" for output_format in server.OUTPUT_FORMATS))
+
+    totals = {output_format: [0, 0] for output_format in server.OUTPUT_FORMATS}
+    for label, name, tool_args in TOOL_CALLS:
+        sizes = {}
+        for output_format in server.OUTPUT_FORMATS:
+            context["output_format"] = output_format
+            result = server.tool_functions[name](ctx=ctx, **tool_args)
+            sizes[output_format] = (len(result.encode("utf-8")), server.count_tokens(result))
+            totals[output_format][0] += sizes[output_format][0]
+            totals[output_format][1] += sizes[output_format][1]
+        print(f"{label:<28}" + "".join(cell(sizes[f], sizes["text"]) for f in server.OUTPUT_FORMATS))
+    print(f"{'total':<28}" + "".join(cell(totals[f], totals["text"]) for f in server.OUTPUT_FORMATS))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark the prepared SPARQL templates of the SEPSES MCP server against the
+f-string queries they replace, on a local in-memory graph.
+
+The f-string path interpolates the argument into the query text and hands it to
+rdflib, which parses and translates it on every call. The prepared path parses
+the `$name` template once and evaluates it with `initBindings`. Both run the
+same keyword lookups over a generated ATT&CK graph (or --rdf-file), so the
+difference is the per-call parse cost.
+
+Usage:
+    uv run python -m scripts.bench_prepared_queries
+    uv run python -m scripts.bench_prepared_queries --techniques 2000 --calls 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+import rdflib
+
+from scripts.bench_sparql_endpoint import build_graph
+from scripts.run_sepses_mcp import load_server
+
+TEMPLATE = """
+PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>
+PREFIX dcterm: <http://purl.org/dc/terms/>
+SELECT ?technique ?label WHERE {
+    ?technique a attack:Technique ;
+               dcterm:title ?label .
+    FILTER(CONTAINS(LCASE(?label), LCASE($keyword)))
+}
+ORDER BY ?label
+LIMIT 50
+"""
+
+
+def run(execute, keywords: list[str]) -> tuple[list[float], int]:
+    """Return per-call latencies (ms) and the total number of rows."""
+    latencies, rows = [], 0
+    for keyword in keywords:
+        start_time = time.perf_counter()
+        rows += len(list(execute(keyword)))
+        latencies.append((time.perf_counter() - start_time) * 1000)
+    return latencies, rows
+
+
+def report(label: str, latencies: list[float], rows: int) -> None:
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+    print(
+        f"{label:<22} mean={statistics.mean(ordered):7.2f} ms  p50={statistics.median(ordered):7.2f} ms  "
+        f"p95={p95:7.2f} ms  rows={rows}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark prepared SPARQL templates against f-string queries.")
+    parser.add_argument("--rdf-file", type=Path, help="Turtle file to query (default: generated ATT&CK-like graph)")
+    parser.add_argument("--techniques", type=int, default=500, help="Generated techniques (default: 500)")
+    parser.add_argument("--calls", type=int, default=100, help="Queries per path (default: 100)")
+    args = parser.parse_args()
+
+    graph = build_graph(args.rdf_file, args.techniques)
+    keywords = [f"{i % 100:02d}" for i in range(args.calls)]
+    print(f"[bench] {len(graph)} triples; {args.calls} keyword queries per path")
+
+    server = load_server()
+    template = server.sparql_template(TEMPLATE)
+    start_time = time.perf_counter()
+    prepared = template.prepared
+    print(f"[bench] one-off template parse: {(time.perf_counter() - start_time) * 1000:.1f} ms")
+
+    def interpolated(keyword: str):
+        return graph.query(TEMPLATE.replace("$keyword", f'"{keyword}"'))
+
+    def bound(keyword: str):
+        return graph.query(prepared, initBindings={"keyword": rdflib.Literal(keyword)})
+
+    # Warm both paths (rdflib plugin loading, regex and term caches) before timing.
+    run(interpolated, keywords[:5])
+    run(bound, keywords[:5])
+    fstring_latencies, fstring_rows = run(interpolated, keywords)
+    prepared_latencies, prepared_rows = run(bound, keywords)
+    report("f-string (parse/call)", fstring_latencies, fstring_rows)
+    report("prepared template", prepared_latencies, prepared_rows)
+    saved = statistics.mean(fstring_latencies) - statistics.mean(prepared_latencies)
+    print(f"\n[bench] saved {saved:.2f} ms per call ({saved * args.calls:.0f} ms over {args.calls} calls)")
+    if fstring_rows != prepared_rows:
+        print(f"[bench] WARNING: row counts differ ({fstring_rows} vs {prepared_rows})")
+
+
+if __name__ == "__main__":
+    main()
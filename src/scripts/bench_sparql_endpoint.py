@@ -0,0 +1,180 @@
+"""
+Benchmark the pooled SPARQL endpoint transport of the SEPSES MCP server against
+rdflib's default SPARQLStore, using a local stand-in SPARQL endpoint.
+
+The stand-in serves SPARQL JSON results over HTTP from a small generated ATT&CK
+graph (or --rdf-file) and gzip-compresses responses when asked. To mimic a remote
+endpoint it adds a per-connection setup delay (TCP + TLS handshake), a
+per-request delay, and optionally fails a fraction of requests with 503.
+
+Usage:
+    uv run python -m scripts.bench_sparql_endpoint
+    uv run python -m scripts.bench_sparql_endpoint --requests 200 --workers 8 --handshake-ms 80 --fail-rate 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import rdflib
+from rdflib.plugins.stores.sparqlstore import SPARQLStore
+
+from scripts.run_sepses_mcp import load_server
+
+BENCH_QUERY = """
+PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>
+PREFIX dcterm: <http://purl.org/dc/terms/>
+SELECT ?technique ?label WHERE {
+    ?technique a attack:Technique ;
+               dcterm:title ?label .
+}
+ORDER BY ?label
+LIMIT 200
+"""
+
+
+def build_graph(rdf_file: Path | None, techniques: int) -> rdflib.Graph:
+    graph = rdflib.Graph()
+    if rdf_file:
+        graph.parse(rdf_file, format="turtle")
+        return graph
+    attack = rdflib.Namespace("http://w3id.org/sepses/vocab/ref/attack#")
+    title = rdflib.URIRef("http://purl.org/dc/terms/title")
+    for i in range(techniques):
+        technique = attack[f"T{i:04d}"]
+        graph.add((technique, rdflib.RDF.type, attack.Technique))
+        graph.add((technique, title, rdflib.Literal(f"Technique {i:04d}")))
+    return graph
+
+
+def start_stand_in(graph: rdflib.Graph, delay_ms: float, handshake_ms: float, fail_rate: float) -> ThreadingHTTPServer:
+    """Serve SPARQL SELECT results as JSON on an ephemeral local port."""
+    # Answers are memoized per query so the benchmark measures the transport,
+    # not rdflib's query engine (which is also not thread-safe).
+    lock = threading.Lock()
+    answers: dict[str, bytes] = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are separate writes; without this, keep-alive
+        # responses stall on Nagle + delayed ACK like no real endpoint does.
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            # Paid once per TCP connection, so only connection reuse avoids it.
+            if handshake_ms:
+                time.sleep(handshake_ms / 1000)
+            super().setup()
+
+        def _answer(self, query: str) -> None:
+            if delay_ms:
+                time.sleep(delay_ms / 1000)
+            if fail_rate and random.random() < fail_rate:
+                self.send_response(503)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            with lock:
+                if query not in answers:
+                    answers[query] = graph.query(query).serialize(format="json")
+                body = answers[query]
+            headers = {"Content-Type": "application/sparql-results+json"}
+            if "gzip" in self.headers.get("Accept-Encoding", ""):
+                body = gzip.compress(body)
+                headers["Content-Encoding"] = "gzip"
+            self.send_response(200)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self._answer(parse_qs(urlparse(self.path).query)["query"][0])
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            payload = self.rfile.read(length).decode("utf-8")
+            if self.headers.get("Content-Type", "").startswith("application/sparql-query"):
+                self._answer(payload)
+            else:
+                self._answer(parse_qs(payload)["query"][0])
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(client, total: int, workers: int) -> tuple[list[float], int, float]:
+    """Return successful request latencies (ms), the failure count and wall time."""
+    def one(_):
+        start_time = time.perf_counter()
+        try:
+            list(client.query(BENCH_QUERY))
+        except Exception:
+            return None
+        return (time.perf_counter() - start_time) * 1000
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(one, range(total)))
+    latencies = [latency for latency in results if latency is not None]
+    return latencies, len(results) - len(latencies), time.perf_counter() - start_time
+
+
+def report(label: str, latencies: list[float], failures: int, wall: float) -> None:
+    ordered = sorted(latencies) or [0.0]
+    p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+    print(
+        f"{label:<26} mean={statistics.mean(ordered):7.1f} ms  p50={statistics.median(ordered):7.1f} ms  "
+        f"p95={p95:7.1f} ms  throughput={len(latencies) / wall:7.1f} req/s  failed={failures}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark SPARQL endpoint transports against a local stand-in.")
+    parser.add_argument("--rdf-file", type=Path, help="Turtle file to serve (default: generated ATT&CK-like graph)")
+    parser.add_argument("--techniques", type=int, default=500, help="Generated techniques (default: 500)")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per transport (default: 100)")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent client threads (default: 4)")
+    parser.add_argument("--delay-ms", type=float, default=5.0, help="Endpoint delay per request (default: 5)")
+    parser.add_argument("--handshake-ms", type=float, default=40.0, help="Delay per new connection (default: 40)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    args = parser.parse_args()
+
+    stand_in = start_stand_in(
+        build_graph(args.rdf_file, args.techniques), args.delay_ms, args.handshake_ms, args.fail_rate
+    )
+    endpoint = f"http://127.0.0.1:{stand_in.server_address[1]}/sparql"
+    print(f"[bench] stand-in endpoint at {endpoint}; {args.requests} requests, {args.workers} workers")
+
+    server = load_server()
+    pooled = server.SparqlEndpoint(endpoint, pool_size=max(args.workers, 1), backoff=0.05)
+    default = SPARQLStore(query_endpoint=endpoint, returnFormat="json")
+    try:
+        report("SPARQLStore (default)", *run(default, args.requests, args.workers))
+        report("SparqlEndpoint (pooled)", *run(pooled, args.requests, args.workers))
+        snapshot = pooled.snapshot()
+        print(
+            f"\n[bench] pooled transport: {snapshot['requests']} requests, {snapshot['errors']} errors, "
+            f"{snapshot['bytes']} bytes decoded, p50 {snapshot['p50_ms']} ms, p95 {snapshot['p95_ms']} ms"
+        )
+    finally:
+        pooled.close()
+        stand_in.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Index advisor for the Cypher queries generated by the Cypher agent.
+
+Reads the executed-query log written by `src/agents/cypher_agent.py`, aggregates
+the label/property predicates the queries filter and sort on, and proposes range,
+text and fulltext indexes that do not exist yet. Case-insensitive string
+predicates (toLower(x) CONTAINS ...) get a fulltext index plus advice to query it
+through db.index.fulltext.queryNodes; case-insensitive equality cannot use any
+index and is reported as query-rewrite advice only. With --apply the indexes are
+created and the logged queries are replayed before and after to report latency.
+
+Usage:
+    uv run python -m scripts.index_advisor
+    uv run python -m scripts.index_advisor --apply --replay 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import statistics
+import time
+from collections import Counter
+from pathlib import Path
+
+from scripts.ingest_cve_dataset import cache_dir, parse_env
+from src.config.neo4j_driver import create_driver
+from src.utils.cypher_log import read_executed_queries
+
+NODE_PATTERN = re.compile(r"\(\s*(\w+)\s*:\s*`?(\w+)`?")
+INLINE_PROPERTY_PATTERN = re.compile(r"\(\s*(\w+)\s*:\s*`?\w+`?\s*\{\s*(\w+)\s*:")
+LOWERED_PREDICATE_PATTERN = re.compile(
+    r"to(?:Lower|Upper)\(\s*(\w+)\.(\w+)\s*\)\s*(CONTAINS|STARTS\s+WITH|ENDS\s+WITH|=|IN\b)",
+    re.IGNORECASE,
+)
+PREDICATE_PATTERN = re.compile(
+    r"\b(\w+)\.(\w+)\s*(CONTAINS|STARTS\s+WITH|ENDS\s+WITH|IS\s+NOT\s+NULL|IS\s+NULL|IN\b|<>|>=|<=|=|>|<)",
+    re.IGNORECASE,
+)
+ORDER_BY_PATTERN = re.compile(r"ORDER\s+BY\s+(\w+)\.(\w+)", re.IGNORECASE)
+
+# How each access pattern is best served by an index.
+INDEX_FOR_KIND = {
+    "equality": "RANGE",
+    "range": "RANGE",
+    "order": "RANGE",
+    "string": "TEXT",
+    "lowered_string": "FULLTEXT",
+}
+
+# Printed with a proposal: the planner never uses a fulltext index for a
+# predicate, so the query has to call it explicitly to benefit.
+NOTES = {
+    "lowered_string": "toLower(x) CONTAINS ... cannot use a range or text index; query this fulltext "
+    "index via CALL db.index.fulltext.queryNodes('{name}', $keyword) instead",
+}
+
+# Access patterns no index can serve: the query has to be rewritten instead, so
+# they are reported as advice and never created with --apply.
+REWRITE_ADVICE = {
+    "lowered_equality": "toLower(x) = ... cannot use an index; compare against the stored value instead",
+}
+
+
+def classify(operator: str) -> str:
+    operator = " ".join(operator.upper().split())
+    if operator in {"CONTAINS", "STARTS WITH", "ENDS WITH"}:
+        return "string"
+    if operator in {"=", "IN", "IS NULL", "IS NOT NULL"}:
+        return "equality"
+    return "range"
+
+
+def extract_access_patterns(query: str) -> list[tuple[str, str, str]]:
+    """Return (label, property, kind) tuples for the predicates in one query."""
+    aliases = {}
+    for alias, label in NODE_PATTERN.findall(query):
+        aliases.setdefault(alias, label)
+
+    patterns = []
+    remaining = query
+    for match in LOWERED_PREDICATE_PATTERN.finditer(query):
+        alias, prop, operator = match.groups()
+        kind = "lowered_string" if classify(operator) == "string" else "lowered_equality"
+        patterns.append((alias, prop, kind))
+    remaining = LOWERED_PREDICATE_PATTERN.sub(" ", remaining)
+
+    for alias, prop, operator in PREDICATE_PATTERN.findall(remaining):
+        patterns.append((alias, prop, classify(operator)))
+    for alias, prop in INLINE_PROPERTY_PATTERN.findall(remaining):
+        patterns.append((alias, prop, "equality"))
+    for alias, prop in ORDER_BY_PATTERN.findall(remaining):
+        patterns.append((alias, prop, "order"))
+
+    return [(aliases[alias], prop, kind) for alias, prop, kind in patterns if alias in aliases]
+
+
+def existing_indexes(session) -> set[tuple[str, str, str]]:
+    """Return (type, label, property) for every single-label node index."""
+    indexes = set()
+    for record in session.run("SHOW INDEXES YIELD type, entityType, labelsOrTypes, properties"):
+        if record["entityType"] != "NODE" or not record["labelsOrTypes"]:
+            continue
+        for label in record["labelsOrTypes"]:
+            for prop in record["properties"] or []:
+                indexes.add((record["type"], label, prop))
+    return indexes
+
+
+def index_name(index_type: str, label: str, prop: str) -> str:
+    return f"advisor_{label.lower()}_{prop.lower()}_{index_type.lower()}"
+
+
+def index_statement(index_type: str, label: str, prop: str) -> str:
+    name = index_name(index_type, label, prop)
+    if index_type == "FULLTEXT":
+        return f"CREATE FULLTEXT INDEX {name} IF NOT EXISTS FOR (n:{label}) ON EACH [n.{prop}]"
+    return f"CREATE {index_type} INDEX {name} IF NOT EXISTS FOR (n:{label}) ON (n.{prop})"
+
+
+def propose_indexes(records: list[dict], existing: set, min_count: int) -> list[dict]:
+    """Aggregate the logged access patterns into index proposals."""
+    usage = Counter()
+    for record in records:
+        for label, prop, kind in set(extract_access_patterns(record["query"])):
+            usage[(label, prop, kind)] += 1
+
+    proposals = {}
+    for (label, prop, kind), count in usage.most_common():
+        index_type = INDEX_FOR_KIND.get(kind)
+        if index_type is None or count < min_count or (index_type, label, prop) in existing:
+            continue
+        proposal = proposals.setdefault(
+            (index_type, label, prop),
+            {
+                "type": index_type,
+                "label": label,
+                "property": prop,
+                "queries": 0,
+                "kinds": set(),
+                "statement": index_statement(index_type, label, prop),
+            },
+        )
+        proposal["queries"] += count
+        proposal["kinds"].add(kind)
+    return sorted(proposals.values(), key=lambda el: el["queries"], reverse=True)
+
+
+def propose_rewrites(records: list[dict], min_count: int) -> list[dict]:
+    """Aggregate the logged access patterns that need a query rewrite, not an index."""
+    usage = Counter()
+    for record in records:
+        for label, prop, kind in set(extract_access_patterns(record["query"])):
+            if kind in REWRITE_ADVICE:
+                usage[(label, prop, kind)] += 1
+    return [
+        {"label": label, "property": prop, "kind": kind, "queries": count, "advice": REWRITE_ADVICE[kind]}
+        for (label, prop, kind), count in usage.most_common()
+        if count >= min_count
+    ]
+
+
+def replay(session, queries: list[tuple[str, dict]], repeat: int) -> list[float]:
+    """Return the median wall time in ms of each query, run as read transactions."""
+    timings = []
+    for query, params in queries:
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            session.execute_read(lambda tx: tx.run(query, params).consume())
+            samples.append((time.perf_counter() - start) * 1000)
+        timings.append(statistics.median(samples))
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Propose Neo4j indexes from logged agent Cypher.")
+    parser.add_argument(
+        "--log",
+        type=Path,
+        default=cache_dir() / "cypher_log.jsonl",
+        help="Executed-Cypher log written by the Cypher agent (default: src/.cache/cypher_log.jsonl)",
+    )
+    parser.add_argument("--min-count", type=int, default=2, help="Minimum queries using a predicate (default: 2)")
+    parser.add_argument("--apply", action="store_true", help="Create the proposed indexes")
+    parser.add_argument("--replay", type=int, default=20, help="Distinct logged queries to replay with --apply (default: 20)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per replayed query (default: 3)")
+    args = parser.parse_args()
+
+    records = read_executed_queries(args.log)
+    if not records:
+        raise SystemExit(f"No executed Cypher found in {args.log}. Run some questions through the agent first.")
+    print(f"[advisor] analysed {len(records)} executed queries from {args.log}")
+
+    creds = parse_env()
+    driver = create_driver(creds["uri"], creds["user"], creds["password"])
+    try:
+        with driver.session(database=creds["database"]) as session:
+            proposals = propose_indexes(records, existing_indexes(session), args.min_count)
+            for rewrite in propose_rewrites(records, args.min_count):
+                print(f"\n[REWRITE] {rewrite['label']}.{rewrite['property']} "
+                      f"used by {rewrite['queries']} queries ({rewrite['kind']})")
+                print(f"    {rewrite['advice']}")
+            if not proposals:
+                print("[advisor] existing indexes already cover the indexable access patterns")
+                return
+
+            for proposal in proposals:
+                kinds = ", ".join(sorted(proposal["kinds"]))
+                print(f"\n[{proposal['type']}] {proposal['label']}.{proposal['property']} "
+                      f"used by {proposal['queries']} queries ({kinds})")
+                print(f"    {proposal['statement']}")
+                for kind in sorted(proposal["kinds"]):
+                    if kind in NOTES:
+                        name = index_name(proposal["type"], proposal["label"], proposal["property"])
+                        print(f"    note: {NOTES[kind].format(name=name)}")
+
+            if not args.apply:
+                print("\n[advisor] re-run with --apply to create these indexes and measure latency")
+                return
+
+            replayed = []
+            for record in records:
+                candidate = (record["query"], record.get("params") or {})
+                if candidate not in replayed:
+                    replayed.append(candidate)
+            replayed = replayed[: args.replay]
+
+            before = replay(session, replayed, args.repeat)
+            for proposal in proposals:
+                session.run(proposal["statement"]).consume()
+                print(f"[advisor] created {proposal['type']} index on {proposal['label']}.{proposal['property']}")
+            session.run("CALL db.awaitIndexes(300)").consume()
+            after = replay(session, replayed, args.repeat)
+
+            print("\nbefore_ms  after_ms  speedup  query")
+            for (query, _), before_ms, after_ms in zip(replayed, before, after):
+                speedup = before_ms / after_ms if after_ms else float("inf")
+                print(f"{before_ms:9.1f} {after_ms:9.1f} {speedup:7.2f}x  {' '.join(query.split())[:80]}")
+            print(f"\n[advisor] total {sum(before):.1f} ms -> {sum(after):.1f} ms over {len(replayed)} queries")
+    finally:
+        driver.close()
+
+
+if __name__ == "__main__":
+    main()
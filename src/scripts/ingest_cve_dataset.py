@@ -15,10 +15,13 @@ from pathlib import Path
 from typing import Iterable, List, Sequence
 
 from dotenv import find_dotenv, load_dotenv
-from neo4j import GraphDatabase, Session
+from neo4j import Session
 from neo4j.exceptions import Neo4jError
 from sentence_transformers import SentenceTransformer
 
+from src.config.neo4j_driver import create_driver
+from src.utils.query_cache import bump_epoch
+
 BATCH_SIZE = 50
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 
@@ -55,7 +58,7 @@ def parse_env() -> dict:
 
 
 def ensure_indexes(session: Session) -> None:
-    """Create required vector and fulltext indexes if they do not exist."""
+    """Create required vector, fulltext, and metadata range indexes if they do not exist."""
     statements = {
         "vector": """
             CREATE VECTOR INDEX vector IF NOT EXISTS
@@ -73,6 +76,28 @@ def ensure_indexes(session: Session) -> None:
             CREATE FULLTEXT INDEX entities IF NOT EXISTS
             FOR (entity:Document) ON EACH [entity.fileName, entity.description]
         """,
+        # Range indexes back exact identifier lookups and the MERGE keys below.
+        "document_id": """
+            CREATE RANGE INDEX document_id IF NOT EXISTS
+            FOR (doc:Document) ON (doc.id)
+        """,
+        "chunk_id": """
+            CREATE RANGE INDEX chunk_id IF NOT EXISTS
+            FOR (chunk:Chunk) ON (chunk.id)
+        """,
+        # Range indexes back the metadata pre-filters used by the vector agent.
+        "chunk_severity": """
+            CREATE RANGE INDEX chunk_severity IF NOT EXISTS
+            FOR (chunk:Chunk) ON (chunk.severity)
+        """,
+        "chunk_score": """
+            CREATE RANGE INDEX chunk_score IF NOT EXISTS
+            FOR (chunk:Chunk) ON (chunk.score)
+        """,
+        "chunk_published": """
+            CREATE RANGE INDEX chunk_published IF NOT EXISTS
+            FOR (chunk:Chunk) ON (chunk.published)
+        """,
     }
 
     for name, statement in statements.items():
@@ -130,13 +155,13 @@ def persist_rows(driver, database: str, rows: list[dict]) -> None:
           doc.description = row.description,
           doc.published = row.published,
           doc.severity = row.severity,
-          doc.score = row.score
+          doc.score = toFloat(row.score)
     MERGE (chunk:Chunk {id: row.chunk_id})
       SET chunk.text = row.description,
           chunk.embedding = row.embedding,
           chunk.published = row.published,
           chunk.severity = row.severity,
-          chunk.score = row.score
+          chunk.score = toFloat(row.score)
     MERGE (chunk)-[:PART_OF]->(doc)
     MERGE (chunk)-[:HAS_ENTITY]->(doc)
     """
@@ -147,6 +172,11 @@ def persist_rows(driver, database: str, rows: list[dict]) -> None:
             print(f"[neo4j] inserted/updated {len(batch)} rows")
 
 
+def cache_dir() -> Path:
+    """Return the agents' cache directory (AGENT_CACHE_DIR or src/.cache)."""
+    return Path(os.environ.get("AGENT_CACHE_DIR") or Path(__file__).resolve().parents[1] / ".cache")
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Ingest CVE dataset into Neo4j.")
     parser.add_argument(
@@ -163,11 +193,13 @@ def main() -> None:
     creds = parse_env()
     rows = embed_rows(load_rows(args.csv))
 
-    driver = GraphDatabase.driver(creds["uri"], auth=(creds["user"], creds["password"]))
+    driver = create_driver(creds["uri"], creds["user"], creds["password"])
     try:
         with driver.session(database=creds["database"]) as session:
             ensure_indexes(session)
         persist_rows(driver, creds["database"], rows)
+        epoch = bump_epoch(cache_dir())
+        print(f"[cache] bumped ingest epoch to {epoch}; cached query results are invalidated")
         print("Ingestion complete.")
     finally:
         driver.close()
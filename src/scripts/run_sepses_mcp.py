@@ -3,26 +3,48 @@ Helper entry point to launch the SEPSES Cybersecurity Knowledge Graph MCP server
 
 This wrapper simply forwards all CLI arguments to the bundled FastMCP server
 (`src/mcp-cskg-rdf/src/mcp-cskg-rdf/server.py`) so it can be started with `python -m`.
+`load_server()` imports the same module without starting it, for in-process tool mode.
 """
 
 from __future__ import annotations
 
+import importlib.util
 import runpy
 import sys
 from pathlib import Path
+from types import ModuleType
+
+SERVER_PATH = Path(__file__).resolve().parents[1] / "mcp-cskg-rdf" / "src" / "mcp-cskg-rdf" / "server.py"
+# The server directory name is not a valid package name, so it is loaded by path.
+SERVER_MODULE_NAME = "sepses_mcp_server"
+
+
+def load_server() -> ModuleType:
+    """Import the server module (tools registered, server not started) once per process."""
+    if SERVER_MODULE_NAME in sys.modules:
+        return sys.modules[SERVER_MODULE_NAME]
+    if not SERVER_PATH.exists():
+        raise FileNotFoundError(f"MCP server not found at {SERVER_PATH}")
+
+    spec = importlib.util.spec_from_file_location(SERVER_MODULE_NAME, SERVER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[SERVER_MODULE_NAME] = module
+    try:
+        spec.loader.exec_module(module)
+    except Exception:
+        del sys.modules[SERVER_MODULE_NAME]
+        raise
+    return module
 
 
 def main() -> None:
     """Resolve the server path and execute it with the provided CLI arguments."""
-    repo_root = Path(__file__).resolve().parents[1]
-    server_path = repo_root / "mcp-cskg-rdf" / "src" / "mcp-cskg-rdf" / "server.py"
-
-    if not server_path.exists():
-        raise FileNotFoundError(f"MCP server not found at {server_path}")
+    if not SERVER_PATH.exists():
+        raise FileNotFoundError(f"MCP server not found at {SERVER_PATH}")
 
     # Preserve any user supplied CLI args while replacing argv[0] so argparse works.
-    sys.argv = [str(server_path), *sys.argv[1:]]
-    runpy.run_path(str(server_path), run_name="__main__")
+    sys.argv = [str(SERVER_PATH), *sys.argv[1:]]
+    runpy.run_path(str(SERVER_PATH), run_name="__main__")
 
 
 if __name__ == "__main__":
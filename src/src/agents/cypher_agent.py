@@ -1,8 +1,17 @@
 # src/agents/cypher_agent.py
-from langchain_core.prompts import PromptTemplate
-from langchain_neo4j.chains.graph_qa.cypher import GraphCypherQAChain
+import time
+from langchain_core.example_selectors import SemanticSimilarityExampleSelector
+from langchain_core.prompts import FewShotPromptTemplate, PromptTemplate
+from langchain_core.vectorstores import InMemoryVectorStore
+from langchain_neo4j.chains.graph_qa.cypher import GraphCypherQAChain, extract_cypher, get_function_response
 from langchain_google_genai import ChatGoogleGenerativeAI
-from src.config.settings import graph
+from src.config.settings import graph, embeddings, query_cache, CACHE_DIR
+from src.utils.cypher_cache import CypherQueryCache
+from src.utils.cypher_guard import guard_cypher
+from src.utils.cypher_log import ACCEPTED_SOURCE, append_cypher_log, successful_queries
+
+# Every executed query is logged for scripts/index_advisor.py and few-shot seeding.
+CYPHER_LOG_PATH = CACHE_DIR / "cypher_log.jsonl"
 
 # --- Cypher Generation Prompt Template ---
 cypher_generation_template = """
@@ -27,70 +36,121 @@ Do not respond to any questions that might ask anything other than for you to co
 Do not run any queries that would add to or delete from the database.
 
 Examples:
+"""
 
-1.  Question: Which vulnerabilities have the highest CVSS scores?
-    Query:
-    MATCH (cve:CVE)
-    WHERE cve.cvss_score IS NOT NULL
-    RETURN cve.id AS cveId, cve.cvss_score AS cvssScore, cve.description AS description
-    ORDER BY cvssScore DESC
-    LIMIT 10
-
-2.  Question: List all attack patterns (CAPEC) associated with a specific weakness type.
-    Query:
-    MATCH (cwe:CWE)-[r:HAS_CAPEC|RELATED_TO]->(capec:CAPEC)
-    RETURN cwe.id AS cweId, cwe.name AS weaknessName, type(r) AS relationship, capec.id AS capecId, capec.name AS attackPattern
-    LIMIT 20
-
-3.  Question: Show the full vulnerability chain from CVE to CWE to CAPEC for critical vulnerabilities
-    Query:
-    MATCH (cve:CVE)-[r1:HAS_CWE]->(cwe:CWE)-[r2:HAS_CAPEC]->(capec:CAPEC)
-    WHERE cve.cvss_score >= 9.0
-    RETURN
-        cve.id AS cveId,
-        cve.cvss_score AS cvssScore,
-        type(r1) AS cveToWeakness,
-        cwe.id AS cweId,
-        cwe.name AS weaknessName,
-        type(r2) AS weaknessToAttack,
-        capec.id AS capecId,
-        capec.name AS attackPattern
-    LIMIT 15
-        
-4.  Question: Give me information about CVE-2024-1234 vulnerability?
-    Query:
-    MATCH (cve:CVE)-[r]->(n)
-    WHERE toLower(cve.id) = 'cve-2024-1234'
-    RETURN cve.id AS vulnerability, type(r) as relationship, labels(n) AS relatedEntityType, n.id as entityId, n.name as entityName
-
-5.  Question: Which products or vendors are affected by the most critical vulnerabilities?
-    Query:
-    MATCH (cve:CVE)-[r:AFFECTS]->(product)
-    WHERE cve.cvss_score >= 7.0
-    RETURN labels(product) AS productType, product.name AS productName, count(cve) AS vulnerabilityCount, avg(cve.cvss_score) AS avgCVSS
-    ORDER BY vulnerabilityCount DESC
-    LIMIT 10
-
-6.  Question: Find mitigation strategies for a specific CWE weakness
-    Query:
-    MATCH (cwe:CWE)-[r:HAS_MITIGATION]->(mitigation)
-    WHERE toLower(cwe.id) CONTAINS 'cwe-79'
-    RETURN cwe.id AS weaknessId, cwe.name AS weaknessName, mitigation.technique AS mitigationTechnique, mitigation.description AS mitigationDescription
-
-7.  Question: What are the most exploitable vulnerabilities based on exploit availability?
-    Query:
-    MATCH (cve:CVE)-[r:HAS_EXPLOIT]->(exploit)
-    RETURN cve.id AS cveId, cve.cvss_score AS cvssScore, cve.exploitability_score AS exploitability, count(exploit) AS exploitCount
-    ORDER BY exploitability DESC, exploitCount DESC
-    LIMIT 10
-
+cypher_generation_suffix = """
 The question is:
 {question}
 """
 
-cyper_generation_prompt = PromptTemplate(
-    template=cypher_generation_template,
-    input_variables=["schema","question"]
+# Seed pool for dynamic few-shot selection. Generated queries the review accepted
+# are added on startup (from the Cypher log) and after every accepted run, so the
+# pool keeps growing while each prompt only carries the FEW_SHOT_K most similar examples.
+CYPHER_EXAMPLES = [
+    {
+        "question": "Which vulnerabilities have the highest CVSS scores?",
+        "query": """MATCH (cve:CVE)
+WHERE cve.cvss_score IS NOT NULL
+RETURN cve.id AS cveId, cve.cvss_score AS cvssScore, cve.description AS description
+ORDER BY cvssScore DESC
+LIMIT 10""",
+    },
+    {
+        "question": "List all attack patterns (CAPEC) associated with a specific weakness type.",
+        "query": """MATCH (cwe:CWE)-[r:HAS_CAPEC|RELATED_TO]->(capec:CAPEC)
+RETURN cwe.id AS cweId, cwe.name AS weaknessName, type(r) AS relationship, capec.id AS capecId, capec.name AS attackPattern
+LIMIT 20""",
+    },
+    {
+        "question": "Show the full vulnerability chain from CVE to CWE to CAPEC for critical vulnerabilities",
+        "query": """MATCH (cve:CVE)-[r1:HAS_CWE]->(cwe:CWE)-[r2:HAS_CAPEC]->(capec:CAPEC)
+WHERE cve.cvss_score >= 9.0
+RETURN
+    cve.id AS cveId,
+    cve.cvss_score AS cvssScore,
+    type(r1) AS cveToWeakness,
+    cwe.id AS cweId,
+    cwe.name AS weaknessName,
+    type(r2) AS weaknessToAttack,
+    capec.id AS capecId,
+    capec.name AS attackPattern
+LIMIT 15""",
+    },
+    {
+        "question": "Give me information about CVE-2024-1234 vulnerability?",
+        "query": """MATCH (cve:CVE)-[r]->(n)
+WHERE toLower(cve.id) = 'cve-2024-1234'
+RETURN cve.id AS vulnerability, type(r) as relationship, labels(n) AS relatedEntityType, n.id as entityId, n.name as entityName""",
+    },
+    {
+        "question": "Which products or vendors are affected by the most critical vulnerabilities?",
+        "query": """MATCH (cve:CVE)-[r:AFFECTS]->(product)
+WHERE cve.cvss_score >= 7.0
+RETURN labels(product) AS productType, product.name AS productName, count(cve) AS vulnerabilityCount, avg(cve.cvss_score) AS avgCVSS
+ORDER BY vulnerabilityCount DESC
+LIMIT 10""",
+    },
+    {
+        "question": "Find mitigation strategies for a specific CWE weakness",
+        "query": """MATCH (cwe:CWE)-[r:HAS_MITIGATION]->(mitigation)
+WHERE toLower(cwe.id) CONTAINS 'cwe-79'
+RETURN cwe.id AS weaknessId, cwe.name AS weaknessName, mitigation.technique AS mitigationTechnique, mitigation.description AS mitigationDescription""",
+    },
+    {
+        "question": "What are the most exploitable vulnerabilities based on exploit availability?",
+        "query": """MATCH (cve:CVE)-[r:HAS_EXPLOIT]->(exploit)
+RETURN cve.id AS cveId, cve.cvss_score AS cvssScore, cve.exploitability_score AS exploitability, count(exploit) AS exploitCount
+ORDER BY exploitability DESC, exploitCount DESC
+LIMIT 10""",
+    },
+]
+
+FEW_SHOT_K = 3
+# Successful past runs read from the Cypher log on startup.
+FEW_SHOT_LOG_LIMIT = 200
+
+def _escape_braces(text: str) -> str:
+    # The assembled few-shot template is formatted once more, so literal braces
+    # in examples (e.g. `{id: 'x'}` maps) must be escaped.
+    return text.replace("{", "{{").replace("}", "}}")
+
+class CypherExamplePool:
+    """Embedding-indexed question/Cypher examples, deduplicated by question."""
+
+    def __init__(self, examples: list[dict], k: int = FEW_SHOT_K):
+        self._questions = set()
+        self.selector = SemanticSimilarityExampleSelector(
+            vectorstore=InMemoryVectorStore(embeddings),
+            k=k,
+            input_keys=["question"],
+        )
+        for example in examples:
+            self.add(example["question"], example["query"])
+
+    def add(self, question: str, query: str) -> bool:
+        """Add an example; returns False when the question is already in the pool."""
+        question = question.strip()
+        if not question or question in self._questions:
+            return False
+        self._questions.add(question)
+        self.selector.add_example(
+            {"question": _escape_braces(question), "query": _escape_braces(query.strip())}
+        )
+        return True
+
+    def __len__(self) -> int:
+        return len(self._questions)
+
+example_pool = CypherExamplePool(
+    CYPHER_EXAMPLES + successful_queries(CYPHER_LOG_PATH, limit=FEW_SHOT_LOG_LIMIT)
+)
+
+cyper_generation_prompt = FewShotPromptTemplate(
+    example_selector=example_pool.selector,
+    example_prompt=PromptTemplate.from_template("Question: {question}\nQuery:\n{query}"),
+    prefix=cypher_generation_template,
+    suffix=cypher_generation_suffix,
+    input_variables=["schema", "question"],
 )
 
 # --- Cypher QA Prompt Template ---
@@ -137,15 +197,88 @@ cypher_qa_chain = GraphCypherQAChain.from_llm(
     use_function_response=True
 )
 
-def query_cypher(question: str) -> dict:
+# Validated queries keyed on the question shape; a hit skips Cypher generation entirely.
+cypher_cache = CypherQueryCache(CACHE_DIR / "cypher_cache.json")
+
+def generate_cypher(question: str) -> str:
+    """
+    Generate a Cypher query for the question and validate it against the schema.
+    Reuses the chain's generation prompt and query corrector; nothing is executed.
+    Returns an empty string when the corrector rejects the query.
+    """
+    generated_cypher = cypher_qa_chain.cypher_generation_chain.invoke(
+        {"question": question, "schema": cypher_qa_chain.graph_schema}
+    )
+    generated_cypher = extract_cypher(generated_cypher)
+    if cypher_qa_chain.cypher_query_corrector:
+        generated_cypher = cypher_qa_chain.cypher_query_corrector(generated_cypher)
+    return generated_cypher
+
+def execute_cypher(question: str, query: str, params: dict | None = None, source: str = "generated") -> list:
+    """Run the query through the result cache and log it with its latency and row count."""
+    start_time = time.perf_counter()
+    result = query_cache.query(graph, query, params)
+    duration_ms = (time.perf_counter() - start_time) * 1000
+    append_cypher_log(CYPHER_LOG_PATH, question, query, params, len(result), duration_ms, source)
+    return result
+
+def retrieve_cypher_context(question: str) -> dict:
+    """
+    Retrieval-only Cypher path: generate, validate and execute the query,
+    skipping the QA generation step of the chain. Questions matching a cached
+    question shape reuse its query with the new parameters instead.
+    Both pass the EXPLAIN cost guard first (cached templates with their new
+    parameters), which raises CypherCostError for queries over budget. Nothing is cached here: the
+    workflow calls accept_cypher / reject_cypher once the review has decided.
+    """
+    cached = cypher_cache.lookup(question)
+    if cached:
+        cached_query, params = cached
+        print(f"--- Reusing cached Cypher with params {params}: {cached_query} ---")
+        cached_query = guard_cypher(graph, cached_query, params)
+        context = execute_cypher(question, cached_query, params, source="cache")[: cypher_qa_chain.top_k]
+        return {"query": cached_query, "params": params, "context": context, "source": "cache"}
+
+    generated_cypher = generate_cypher(question)
+    print(f"--- Generated Cypher: {generated_cypher} ---")
+    if generated_cypher:
+        generated_cypher = guard_cypher(graph, generated_cypher)
+    context = execute_cypher(question, generated_cypher)[: cypher_qa_chain.top_k] if generated_cypher else []
+    return {"query": generated_cypher, "context": context, "source": "generated"}
+
+def answer_from_context(question: str, context: list) -> str:
+    """Run only the QA step of the chain on already retrieved results."""
+    if cypher_qa_chain.use_function_response:
+        return cypher_qa_chain.qa_chain.invoke(
+            {"question": question, "function_response": get_function_response(question, context)}
+        )
+    return cypher_qa_chain.qa_chain.invoke({"question": question, "context": context})
+
+def accept_cypher(question: str, query: str, rows: int) -> None:
+    """
+    Keep a generated query whose results the review found sufficient: as a
+    template for questions of the same shape, as a few-shot example, and as an
+    accepted record in the Cypher log (which seeds the examples on startup).
+    """
+    cypher_cache.store(question, query)
+    example_pool.add(question, query)
+    append_cypher_log(CYPHER_LOG_PATH, question, query, None, rows, 0.0, ACCEPTED_SOURCE)
+
+def reject_cypher(question: str) -> None:
+    """Evict the cached template for the question's shape after the review rejected its results."""
+    if cypher_cache.evict(question):
+        print(f"--- Evicted cached Cypher for: {question} ---")
+
+def query_cypher(question: str, context_only: bool = True) -> dict:
     """
     Generate and run a Cypher query against the graph database.
     Use this for complex questions requiring structured data, aggregations, or specific graph traversals
-    Returns the query and the result context.
+    Returns the query and the result context. With `context_only=False` the
+    chain's QA step runs on that context as well and its human-readable answer
+    is returned under "answer"; retrieval (and its cost guard) is the same.
     """
     print(f"--- Executing Cypher Search for: {question} ---")
-    response = cypher_qa_chain.invoke({"query": question})
-    return {
-        "query": response["intermediate_steps"][0]["query"],
-        "context": response["intermediate_steps"][1]["context"]
-    }
+    result = retrieve_cypher_context(question)
+    if not context_only:
+        result["answer"] = answer_from_context(question, result["context"])
+    return result
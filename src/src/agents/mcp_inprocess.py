@@ -0,0 +1,90 @@
+# src/agents/mcp_inprocess.py
+import asyncio
+import logging
+from contextlib import AsyncExitStack
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from langchain_core.tools import StructuredTool
+from langgraph.prebuilt import create_react_agent
+from scripts.run_sepses_mcp import load_server
+
+logger = logging.getLogger(__name__)
+
+class InProcessMCPAgent:
+    """
+    Runs the SEPSES knowledge-graph tools inside this process instead of over
+    the stdio MCP transport. The server module is imported (not started), its
+    lifespan context (graph, metrics, token budget) is opened once, and every
+    registered tool is wrapped as a LangChain tool for a ReAct agent.
+
+    Mirrors the MCPAgent methods used by mcp_rdf_agent: initialize, run, close.
+    """
+
+    def __init__(self, llm, server_args: List[str], max_steps: int = 30, system_prompt: Optional[str] = None):
+        self.llm = llm
+        self.server_args = server_args
+        self.max_steps = max_steps
+        self.system_prompt = system_prompt
+        self.lifespan_context: Dict[str, Any] = {}
+        self._tools: List[StructuredTool] = []
+        self._agent = None
+        self._exit_stack: Optional[AsyncExitStack] = None
+
+    async def initialize(self) -> None:
+        server = load_server()
+        # Same flags as the stdio server (e.g. --sparql-endpoint from browser_mcp.json).
+        server_args, _ = server.parser.parse_known_args(self.server_args)
+        # The imported module was configured with the defaults; apply the real flags
+        # (http pool, cache, concurrency, output format, keyword index, metrics).
+        server.configure(server_args)
+        self._exit_stack = AsyncExitStack()
+        self.lifespan_context = await self._exit_stack.enter_async_context(
+            server.attack_triplestore_lifespan(
+                server.mcp, server_args.rdf_file, server_args.sparql_endpoint, server_args.store_path
+            )
+        )
+        # Tools only read `ctx.request_context.lifespan_context`.
+        ctx = SimpleNamespace(request_context=SimpleNamespace(lifespan_context=self.lifespan_context))
+        self._tools = [self._wrap_tool(tool, ctx) for tool in server.mcp._tool_manager.list_tools()]
+        self._agent = create_react_agent(self.llm, self._tools, prompt=self.system_prompt)
+        logger.info(f"In-process MCP tools ready: {len(self._tools)} tools")
+
+    @staticmethod
+    def _wrap_tool(tool, ctx) -> StructuredTool:
+        async def call(**kwargs):
+            if tool.context_kwarg:
+                kwargs[tool.context_kwarg] = ctx
+            if tool.is_async:
+                return await tool.fn(**kwargs)
+            # Sync tools block on SPARQL I/O; keep the event loop free.
+            return await asyncio.to_thread(tool.fn, **kwargs)
+
+        return StructuredTool(
+            name=tool.name,
+            description=tool.description or tool.name,
+            args_schema=tool.parameters,
+            coroutine=call,
+        )
+
+    async def run(self, question: str, manage_connector: bool = False) -> str:
+        if self._agent is None:
+            await self.initialize()
+        result = await self._agent.ainvoke(
+            {"messages": [("human", question)]},
+            config={"recursion_limit": 2 * self.max_steps + 1},
+        )
+        return result["messages"][-1].content
+
+    async def reset_session_settings(self) -> None:
+        """Restore the server's default token budget and output format."""
+        for tool in self._tools:
+            if tool.name == "reset_session_settings":
+                await tool.ainvoke({})
+
+    async def close(self) -> None:
+        exit_stack, self._exit_stack = self._exit_stack, None
+        self._agent = None
+        self._tools = []
+        if exit_stack is not None:
+            await exit_stack.aclose()
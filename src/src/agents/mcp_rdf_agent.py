@@ -1,8 +1,13 @@
 # src/agents/mcp_rdf_agent.py
 import os
+import asyncio
+import json
 import logging
+import time
 from pathlib import Path
+import anyio
 from mcp_use import MCPAgent, MCPClient
+from src.agents.mcp_inprocess import InProcessMCPAgent
 from src.config.settings import llm
 
 logger = logging.getLogger(__name__)
@@ -11,18 +16,32 @@ logger = logging.getLogger(__name__)
 
 _mcp_client = None
 
+# "stdio" spawns the server from browser_mcp.json; "inprocess" imports its tools
+# into this process (single-host deployments, no subprocess or JSON-RPC hop).
+MCP_TRANSPORT = os.environ.get("MCP_TRANSPORT", "stdio").lower()
+
+def find_mcp_config() -> Path:
+    """Locate browser_mcp.json in the current or parent directories."""
+    for parent in Path(__file__).resolve().parents:
+        candidate = parent / "browser_mcp.json"
+        if candidate.exists():
+            return candidate
+    raise FileNotFoundError("MCP config file not found in current or parent directories.")
+
+def get_server_args() -> list[str]:
+    """Return the CLI flags browser_mcp.json passes to the SEPSES server."""
+    config = json.loads(find_mcp_config().read_text(encoding="utf-8"))
+    for server in config.get("mcpServers", {}).values():
+        args = server.get("args", [])
+        if "scripts.run_sepses_mcp" in args:
+            return args[args.index("scripts.run_sepses_mcp") + 1:]
+    return []
+
 def get_mcp_client():
     """Inisialisasi dan mengembalikan MCPClient (hanya sekali)."""
     global _mcp_client
     if _mcp_client is None:
-        config_path = None
-        for parent in Path(__file__).resolve().parents:
-            candidate = parent / "browser_mcp.json"
-            if candidate.exists():
-                config_path = candidate
-                break
-        if config_path is None:
-            raise FileNotFoundError("MCP config file not found in current or parent directories.")
+        config_path = find_mcp_config()
         os.environ["MCP_USE_ANONYMIZED_TELEMETRY"] = "false"
         _mcp_client = MCPClient.from_config_file(str(config_path))
     return _mcp_client
@@ -35,6 +54,9 @@ Answer questions ONLY via the available tools, which surface data from the Neo4j
 Workflow:
 1. Analyze the user's intent regarding vulnerability assessment, risk scoring, or mitigation strategies.
 2. Select the most appropriate tool. Prefer the focused helper tools when possible.
+   When you need several independent lookups, request them together in one `batch_execute` call.
+   To trace CVEs to their CWE, CAPEC, ATT&CK techniques and mitigations, call `get_cve_dossier` once with all CVE IDs.
+   For large listings, call `set_output_format` with "tsv" first to get compact tables instead of one labelled line per row.
 3. Execute the tool. When you must run an ad-hoc Cypher query, call `text_to_cypher`
    and pass the natural language question to generate the appropriate Cypher statement.
 4. Inspect the results:
@@ -43,21 +65,106 @@ Workflow:
 5. Never answer from memory; every statement must trace back to tool output from the knowledge graph.
 """
 
+# --- Persistent Agent ---
+# One initialized MCPAgent (sessions + tool catalogue + executor) is kept for the
+# lifetime of the process. Memory is disabled so questions do not leak into each other.
+_mcp_agent = None
+_mcp_agent_lock = asyncio.Lock()
+mcp_stats = {"initializations": 0, "init_ms": 0.0, "runs": 0, "run_ms": 0.0, "reconnects": 0}
+
+# mcp_use reports step failures (e.g. a dead server pipe) as a result string.
+AGENT_ERROR_PREFIX = "Agent stopped due to an error"
+
+# Only a broken connection is worth a reconnect; tool, LLM and validation
+# errors would fail the same way on a fresh session.
+TRANSPORT_ERRORS = (ConnectionError, EOFError, anyio.ClosedResourceError, anyio.BrokenResourceError,
+                    anyio.EndOfStream)
+TRANSPORT_ERROR_MARKERS = ("connection closed", "broken pipe", "connection reset", "not connected",
+                           "closedresourceerror", "brokenresourceerror", "endofstream")
+
+def is_transport_error(error) -> bool:
+    """True when an exception or an agent error result reports a lost MCP connection."""
+    if isinstance(error, TRANSPORT_ERRORS):
+        return True
+    text = f"{type(error).__name__}: {error}".lower()
+    return any(marker in text for marker in TRANSPORT_ERROR_MARKERS)
+
+async def get_mcp_agent() -> MCPAgent:
+    """Return the shared MCPAgent, connecting and listing tools on first use."""
+    global _mcp_agent
+    if _mcp_agent is None:
+        start_time = time.perf_counter()
+        if MCP_TRANSPORT == "inprocess":
+            agent = InProcessMCPAgent(
+                llm=llm,
+                server_args=get_server_args(),
+                max_steps=30,
+                system_prompt=strict_system_prompt,
+            )
+        else:
+            agent = MCPAgent(
+                llm=llm,
+                client=get_mcp_client(),
+                max_steps=30,
+                verbose=True,
+                system_prompt=strict_system_prompt,
+                memory_enabled=False,
+            )
+        await agent.initialize()
+        _mcp_agent = agent
+        mcp_stats["initializations"] += 1
+        mcp_stats["init_ms"] += (time.perf_counter() - start_time) * 1000
+        logger.info(f"MCP agent initialized in {(time.perf_counter() - start_time) * 1000:.0f} ms")
+    return _mcp_agent
+
+async def close_mcp_agent() -> None:
+    """Close the shared agent and its MCP sessions (the next run reconnects)."""
+    global _mcp_agent
+    agent, _mcp_agent = _mcp_agent, None
+    if agent is not None:
+        await agent.close()
+
+async def reset_session_settings(agent) -> None:
+    """Restore the server defaults a previous run may have changed (output format, token budget)."""
+    if isinstance(agent, InProcessMCPAgent):
+        await agent.reset_session_settings()
+        return
+    for session in agent.client.get_all_active_sessions().values():
+        connector = session.connector
+        if any(tool.name == "reset_session_settings" for tool in connector.tools):
+            await connector.call_tool("reset_session_settings", {})
+
 async def run_mcp_agent(question: str) -> str:
     """
-    Runs the MCPAgent with the given question and returns the result.
+    Runs the shared MCPAgent with the given question and returns the result.
+    If the MCP connection was lost, the sessions are closed and the question
+    is retried once on a fresh connection.
+
+    Runs share one agent and its sessions; the lock only covers connecting
+    and closing, so concurrent questions run side by side.
     """
-    try:
-        client = get_mcp_client()
-        agent = MCPAgent(
-            llm=llm,
-            client=client,
-            max_steps=30,
-            verbose=True,
-            system_prompt=strict_system_prompt
-        )
-        result = await agent.run(question)
-        return result
-    except Exception as e:
-        logger.error(f"An error occurred while running the MCP Agent: {e}")
-        return f"Error during MCP agent execution: {e}"
+    for attempt in range(2):
+        async with _mcp_agent_lock:
+            agent = await get_mcp_agent()
+        try:
+            await reset_session_settings(agent)
+            start_time = time.perf_counter()
+            result = await agent.run(question, manage_connector=False)
+            mcp_stats["runs"] += 1
+            mcp_stats["run_ms"] += (time.perf_counter() - start_time) * 1000
+            if not str(result).startswith(AGENT_ERROR_PREFIX):
+                return result
+            error = result
+        except Exception as e:
+            error = e
+        logger.error(f"An error occurred while running the MCP Agent: {error}")
+        if not is_transport_error(error):
+            break
+        async with _mcp_agent_lock:
+            # Another run may already have replaced the broken agent.
+            if _mcp_agent is agent:
+                await close_mcp_agent()
+        if attempt == 0:
+            mcp_stats["reconnects"] += 1
+            logger.info("Reconnecting MCP sessions and retrying.")
+    return f"Error during MCP agent execution: {error}"
@@ -40,6 +40,7 @@ cypher_reflection_prompt = ChatPromptTemplate.from_messages([
         - If it used terms not in the schema (e.g., "bugs" instead of "CVE", "flaws" instead of "CWE"), suggest the correct node labels and properties.
         - If searching for relationships, ensure they exist in the schema (e.g., HAS_CWE, HAS_CAPEC, AFFECTS, HAS_MITIGATION).
         - If filtering failed, suggest using properties that exist (e.g., cvss_score, exploitability_score, severity).
+        - If the query was rejected as too expensive, narrow the question (specific CVE/CWE IDs, score thresholds, a smaller result set) so the query can be bounded.
         Do not just repeat the question. Provide a meaningful improvement using vulnerability assessment terminology aligned with the schema.
         
         Schema:
@@ -48,7 +49,7 @@ cypher_reflection_prompt = ChatPromptTemplate.from_messages([
     ),
     (
         "human", 
-        "Original Question: {original_question}\n\nFailed Cypher Query:\n{cypher_query}\n\nRephrase the question to improve the chances of getting a result from the vulnerability knowledge graph."
+        "Original Question: {original_question}\n\nFailed Cypher Query:\n{cypher_query}\n\nFailure Reason:\n{failure_reason}\n\nRephrase the question to improve the chances of getting a result from the vulnerability knowledge graph."
     ),
 ])
 reflection_chain = cypher_reflection_prompt | llm.with_structured_output(RephrasedQuestion)
\ No newline at end of file
@@ -1,9 +1,11 @@
 # src/agents/vector_agent.py 
+import re
+from datetime import datetime, timedelta
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_neo4j.vectorstores.neo4j_vector import remove_lucene_chars
 from pydantic import BaseModel, Field
 from typing import List
-from src.config.settings import llm, graph, vector_index
+from src.config.settings import llm, graph, vector_index, embeddings, query_cache, KEYWORD_INDEX_NAME
 
 # --- Entity Extraction ---
 class LogEntities(BaseModel):
@@ -35,7 +37,190 @@ entity_prompt = ChatPromptTemplate.from_messages(
 
 entity_chain = entity_prompt | llm.with_structured_output(LogEntities)
 
+# --- Metadata Filters ---
+# Chunks carry `severity`, `score` and `published` (see scripts/ingest_cve_dataset.py),
+# so constraints stated in the question can be pushed down into the retrieval queries.
+RECENT_WINDOW_DAYS = 365
+FILTERED_SEARCH_K = 4
+KEYWORD_CANDIDATES = 50
+
+# A bare "critical" ("critical infrastructure") is not a severity; the level has
+# to be tied to "severity"/"risk" ("critical severity", "severity: critical").
+SEVERITY_PATTERN = re.compile(
+    r"\b(critical|high|medium|moderate|low)[\s-]+(?:severity|risk)\b"
+    r"|\bseverity\s*(?::|=|of|is)?\s*(critical|high|medium|moderate|low)\b",
+    re.IGNORECASE,
+)
+MIN_SCORE_PATTERN = re.compile(
+    r"(?:score|cvss)\w*\s*(?:of\s+)?(?:>=|>|above|over|greater than|higher than|more than|at least)\s*(\d+(?:\.\d+)?)",
+    re.IGNORECASE,
+)
+MAX_SCORE_PATTERN = re.compile(
+    r"(?:score|cvss)\w*\s*(?:of\s+)?(?:<=|<|below|under|less than|lower than|at most)\s*(\d+(?:\.\d+)?)",
+    re.IGNORECASE,
+)
+SCORE_RANGE_PATTERN = re.compile(
+    r"(?:score|cvss)\w*\s*(?:between|from)\s*(\d+(?:\.\d+)?)\s*(?:and|to|-)\s*(\d+(?:\.\d+)?)",
+    re.IGNORECASE,
+)
+YEAR_RANGE_PATTERN = re.compile(r"\bbetween\s+((?:19|20)\d{2})\s+and\s+((?:19|20)\d{2})\b", re.IGNORECASE)
+YEAR_SINCE_PATTERN = re.compile(r"\bsince\s+((?:19|20)\d{2})\b", re.IGNORECASE)
+YEAR_AFTER_PATTERN = re.compile(r"\bafter\s+((?:19|20)\d{2})\b", re.IGNORECASE)
+YEAR_BEFORE_PATTERN = re.compile(r"\bbefore\s+((?:19|20)\d{2})\b", re.IGNORECASE)
+YEAR_IN_PATTERN = re.compile(r"\b(?:in|during|from|of)\s+((?:19|20)\d{2})\b", re.IGNORECASE)
+RECENT_PATTERN = re.compile(r"\b(?:recent|recently|latest|newest)\b", re.IGNORECASE)
+
+def extract_metadata_filters(question: str) -> dict:
+    """
+    Derive severity, CVSS score and publication date constraints from the question.
+    Returns an empty dict when the question does not constrain the metadata.
+    """
+    filters = {}
+
+    severities = set()
+    for match in SEVERITY_PATTERN.finditer(question):
+        level = (match.group(1) or match.group(2)).upper()
+        severities.add("MEDIUM" if level == "MODERATE" else level)
+    if severities:
+        filters["severities"] = sorted(severities)
+
+    score_range = SCORE_RANGE_PATTERN.search(question)
+    if score_range:
+        filters["min_score"] = float(score_range.group(1))
+        filters["max_score"] = float(score_range.group(2))
+    else:
+        min_score = MIN_SCORE_PATTERN.search(question)
+        max_score = MAX_SCORE_PATTERN.search(question)
+        if min_score:
+            filters["min_score"] = float(min_score.group(1))
+        if max_score:
+            filters["max_score"] = float(max_score.group(1))
+
+    year_range = YEAR_RANGE_PATTERN.search(question)
+    year_since = YEAR_SINCE_PATTERN.search(question)
+    year_after = YEAR_AFTER_PATTERN.search(question)
+    year_before = YEAR_BEFORE_PATTERN.search(question)
+    year_in = YEAR_IN_PATTERN.search(question)
+    if year_range:
+        filters["published_after"] = f"{year_range.group(1)}-01-01"
+        filters["published_before"] = f"{int(year_range.group(2)) + 1}-01-01"
+    elif year_since or year_after or year_before:
+        if year_since:
+            filters["published_after"] = f"{year_since.group(1)}-01-01"
+        if year_after:
+            filters["published_after"] = f"{int(year_after.group(1)) + 1}-01-01"
+        if year_before:
+            filters["published_before"] = f"{year_before.group(1)}-01-01"
+    elif year_in:
+        filters["published_after"] = f"{year_in.group(1)}-01-01"
+        filters["published_before"] = f"{int(year_in.group(1)) + 1}-01-01"
+    elif RECENT_PATTERN.search(question):
+        cutoff = datetime.now() - timedelta(days=RECENT_WINDOW_DAYS)
+        filters["published_after"] = cutoff.strftime("%Y-%m-%d")
+
+    return filters
+
+def build_filter_clause(alias: str, filters: dict) -> tuple[str, dict]:
+    """
+    Translate metadata filters into a Cypher predicate on `alias` and its parameters.
+    Returns an empty predicate when there is nothing to filter on.
+    """
+    conditions = []
+    params = {}
+    if filters.get("severities"):
+        conditions.append(f"{alias}.severity IN $severities")
+        params["severities"] = filters["severities"]
+    if filters.get("min_score") is not None:
+        conditions.append(f"{alias}.score >= $min_score")
+        params["min_score"] = filters["min_score"]
+    if filters.get("max_score") is not None:
+        conditions.append(f"{alias}.score <= $max_score")
+        params["max_score"] = filters["max_score"]
+    if filters.get("published_after"):
+        conditions.append(f"{alias}.published >= $published_after")
+        params["published_after"] = filters["published_after"]
+    if filters.get("published_before"):
+        conditions.append(f"{alias}.published < $published_before")
+        params["published_before"] = filters["published_before"]
+    return " AND ".join(conditions), params
+
+def merge_by_normalized_score(vector_rows: List[dict], keyword_rows: List[dict], k: int) -> List[str]:
+    """
+    Merge vector and keyword hits the way the hybrid index does: each list's scores
+    are divided by that list's best score, a chunk found by both keeps its higher
+    score, and the top k texts are returned.
+    """
+    scores = {}
+    for rows in (vector_rows, keyword_rows):
+        best = max((row["score"] for row in rows), default=0)
+        for row in rows:
+            score = row["score"] / best if best else 0.0
+            if score > scores.get(row["text"], float("-inf")):
+                scores[row["text"]] = score
+    return sorted(scores, key=scores.get, reverse=True)[:k]
+
+def filtered_similarity_search(question: str, filters: dict, k: int = FILTERED_SEARCH_K) -> List[str]:
+    """
+    Hybrid search restricted to chunks matching the metadata filters.
+
+    The vector part is an exact similarity ranking over the pre-filtered chunks, so the
+    candidate set is bounded by the filter instead of by the approximate index top-k.
+    The keyword part filters the fulltext candidates before they are ranked. The two
+    lists are merged by normalized score (see merge_by_normalized_score).
+    """
+    clause, params = build_filter_clause("chunk", filters)
+
+    vector_rows = query_cache.query(
+        graph,
+        f"""
+        MATCH (chunk:Chunk)
+        WHERE {clause}
+        WITH chunk, vector.similarity.cosine(chunk.embedding, $embedding) AS score
+        ORDER BY score DESC
+        LIMIT $k
+        RETURN chunk.text AS text, score
+        """,
+        {**params, "embedding": embeddings.embed_query(question), "k": k},
+    )
+
+    keyword_rows = []
+    keyword_query = " ".join(remove_lucene_chars(question).split())
+    if keyword_query:
+        keyword_rows = query_cache.query(
+            graph,
+            f"""
+            CALL db.index.fulltext.queryNodes($index_name, $keyword_query, {{limit: $candidates}})
+            YIELD node AS chunk, score
+            WHERE {clause}
+            RETURN chunk.text AS text, score
+            ORDER BY score DESC
+            LIMIT $k
+            """,
+            {
+                **params,
+                "index_name": KEYWORD_INDEX_NAME,
+                "keyword_query": keyword_query,
+                "candidates": KEYWORD_CANDIDATES,
+                "k": k,
+            },
+        )
+
+    return merge_by_normalized_score(vector_rows, keyword_rows, k)
+
 # --- Helper Functions ---
+# Identifiers are resolved with index-backed equality lookups; fuzzy fulltext
+# matching is reserved for free-text names where misspellings are plausible.
+IDENTIFIER_PATTERN = re.compile(r"\b(?:CVE-\d{4}-\d{4,}|CWE-\d+|CAPEC-\d+)\b", re.IGNORECASE)
+
+def extract_identifiers(text: str) -> List[str]:
+    """Return the distinct CVE/CWE/CAPEC identifiers in the text, upper-cased."""
+    identifiers = []
+    for match in IDENTIFIER_PATTERN.findall(text):
+        identifier = match.upper()
+        if identifier not in identifiers:
+            identifiers.append(identifier)
+    return identifiers
+
 def generate_full_text_query(input: str) -> str:
     """
     Generate a full-text search query for a given input string.
@@ -48,57 +233,103 @@ def generate_full_text_query(input: str) -> str:
     """
     full_text_query = ""
     words = [el for el in remove_lucene_chars(input).split() if el]
+    if not words:
+        return ""
     for word in words[:-1]:
         full_text_query += f" {word}~2 AND"
     full_text_query += f" {words[-1]}~2"
     return full_text_query.strip()
 
-def structured_retriever(question: str) -> str:
+ENTITY_CONTEXT_QUERY = """
+{entity_match}
+
+MATCH (chunk:Chunk)-[:HAS_ENTITY]->(entity)
+{chunk_filter}
+
+OPTIONAL MATCH (chunk)-[:PART_OF]->(doc:VulnerabilityReport)
+
+WITH entity, chunk, doc,
+     CASE WHEN 'CVE' IN labels(entity) 
+          THEN entity.id 
+          WHEN 'CWE' IN labels(entity)
+          THEN entity.id
+          WHEN 'CAPEC' IN labels(entity)
+          THEN entity.id
+          WHEN 'Product' IN labels(entity)
+          THEN entity.name
+          ELSE entity.id 
+     END AS entity_name
+     
+RETURN "Entity '" + entity_name + "' found in vulnerability report '" + coalesce(doc.reportId, 'N/A') +
+       "'. Context: '" + left(chunk.text, 250) + "...'"
+       AS output, entity.id AS entity_id
+LIMIT $limit
+"""
+
+EXACT_ENTITY_MATCH = """
+MATCH (entity:Document)
+WHERE entity.id IN $ids
+"""
+
+FUZZY_ENTITY_MATCH = """
+CALL db.index.fulltext.queryNodes('entities', $query, {limit: 10})
+YIELD node AS entity
+"""
+
+def unmatched_identifiers(identifiers: List[str], rows: List[dict]) -> List[str]:
+    """Return the identifiers that no exact-lookup row resolved (compared upper-cased)."""
+    matched = {str(row.get("entity_id") or "").upper() for row in rows}
+    return [identifier for identifier in identifiers if identifier not in matched]
+
+def structured_retriever(question: str, filters: dict | None = None) -> str:
     """
-    Collects the neighborhood of resources mentioned
-    in the question
+    Collects the neighborhood of resources mentioned in the question.
+    Identifiers named explicitly are looked up as they are; the metadata
+    filters only restrict the fuzzy fulltext matches.
     """
-    result = ""
+    outputs = []
+    filter_clause, filter_params = build_filter_clause("chunk", filters or {})
+    chunk_filter = f"WHERE {filter_clause}" if filter_clause else ""
     
     entities = entity_chain.invoke({"question": question})
     print(f"\n--- Extracted Entities: {entities.entity_values} ---")
 
+    identifiers = extract_identifiers(question)
+    free_text_values = []
     for entity_value in entities.entity_values:
+        value_identifiers = extract_identifiers(entity_value)
+        if value_identifiers:
+            identifiers += [el for el in value_identifiers if el not in identifiers]
+        else:
+            free_text_values.append(entity_value)
+
+    if identifiers:
+        print(f"--- Exact Identifier Lookup: {identifiers} ---")
+        response = query_cache.query(
+            graph,
+            ENTITY_CONTEXT_QUERY.format(entity_match=EXACT_ENTITY_MATCH, chunk_filter=""),
+            {"ids": identifiers, "limit": 10 * len(identifiers)},
+        )
+        outputs += [el['output'] for el in response]
+        # Only CVE ids are stored on Document.id; CWE/CAPEC ids (and CVEs not
+        # ingested under that id) fall back to the fuzzy fulltext match.
+        fallback = unmatched_identifiers(identifiers, response)
+        if fallback:
+            print(f"--- No exact match, using fuzzy lookup for: {fallback} ---")
+            free_text_values += fallback
+
+    for entity_value in free_text_values:
         query = generate_full_text_query(entity_value)
         if not query:
             continue
         
-        response = graph.query(
-            """
-            CALL db.index.fulltext.queryNodes('entities', $query, {limit: 10})
-            YIELD node AS entity
-            
-            MATCH (chunk:Chunk)-[:HAS_ENTITY]->(entity)
-            
-            OPTIONAL MATCH (chunk)-[:PART_OF]->(doc:VulnerabilityReport)
-            
-            WITH entity, chunk, doc,
-                 CASE WHEN 'CVE' IN labels(entity) 
-                      THEN entity.id 
-                      WHEN 'CWE' IN labels(entity)
-                      THEN entity.id
-                      WHEN 'CAPEC' IN labels(entity)
-                      THEN entity.id
-                      WHEN 'Product' IN labels(entity)
-                      THEN entity.name
-                      ELSE entity.id 
-                 END AS entity_name
-                 
-            RETURN "Entity '" + entity_name + "' found in vulnerability report '" + coalesce(doc.reportId, 'N/A') +
-                   "'. Context: '" + left(chunk.text, 250) + "...'"
-                   AS output
-            LIMIT 10
-            """,
-            {"query": query},
+        response = query_cache.query(
+            graph,
+            ENTITY_CONTEXT_QUERY.format(entity_match=FUZZY_ENTITY_MATCH, chunk_filter=chunk_filter),
+            {"query": query, "limit": 10, **filter_params},
         )
-        if response:
-            result += "\n".join([el['output'] for el in response])
-    return result
+        outputs += [el['output'] for el in response]
+    return "\n".join(outputs)
 
 # --- Main Search Function ---
 def query_vector_search(question: str):
@@ -107,8 +338,14 @@ def query_vector_search(question: str):
     This is for questions that require finding similar concepts or descriptions.
     """
     print(f"--- Executing Vector Search for: {question} ---")
-    structured_data = structured_retriever(question)
-    unstructured_data = [el.page_content for el in vector_index.similarity_search(question)]
+    filters = extract_metadata_filters(question)
+    if filters:
+        print(f"--- Applying Metadata Filters: {filters} ---")
+    structured_data = structured_retriever(question, filters)
+    if filters:
+        unstructured_data = filtered_similarity_search(question, filters)
+    else:
+        unstructured_data = [el.page_content for el in vector_index.similarity_search(question)]
     final_data = f"""Structured data:
     {structured_data}
     Unstructured data:
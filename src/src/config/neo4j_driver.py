@@ -0,0 +1,125 @@
+# src/config/neo4j_driver.py
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import neo4j
+from neo4j import GraphDatabase, Query, RoutingControl
+from neo4j.exceptions import Neo4jError
+from neo4j_graphrag.schema import _value_sanitize
+from langchain_neo4j import Neo4jGraph
+from langchain_neo4j.vectorstores.neo4j_vector import Neo4jVector
+
+# --- Pool Settings ---
+# Every component (agents, ingest, index advisor) builds its driver from these,
+# so they can be tuned in one place via the environment.
+def driver_config() -> Dict[str, Any]:
+    """Return the shared driver/pool configuration, overridable via NEO4J_* env vars."""
+    return {
+        "max_connection_pool_size": int(os.environ.get("NEO4J_MAX_POOL_SIZE", "50")),
+        "max_connection_lifetime": float(os.environ.get("NEO4J_MAX_CONNECTION_LIFETIME", "3600")),
+        "connection_acquisition_timeout": float(os.environ.get("NEO4J_CONNECTION_ACQUISITION_TIMEOUT", "30")),
+        "fetch_size": int(os.environ.get("NEO4J_FETCH_SIZE", "1000")),
+    }
+
+def create_driver(uri: str, username: str, password: str) -> neo4j.Driver:
+    """Create a driver with the shared pool configuration."""
+    return GraphDatabase.driver(uri, auth=(username, password), **driver_config())
+
+# --- Read Routing ---
+_stats_lock = threading.Lock()
+query_stats = {"read_queries": 0, "read_time_ms": 0.0}
+
+def read_query(
+    driver: neo4j.Driver,
+    database: Optional[str],
+    query: str,
+    params: Optional[dict] = None,
+    timeout: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Run a query as a read transaction. In a cluster it is routed to a read
+    replica; on any deployment a write statement is rejected by the server.
+    """
+    start_time = time.perf_counter()
+    records, _, _ = driver.execute_query(
+        Query(text=query, timeout=timeout),
+        parameters_=params or {},
+        database_=database,
+        routing_=RoutingControl.READ,
+    )
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    with _stats_lock:
+        query_stats["read_queries"] += 1
+        query_stats["read_time_ms"] += elapsed_ms
+    return [record.data() for record in records]
+
+def needs_implicit_transaction(error: Neo4jError) -> bool:
+    """True for `CALL ... IN TRANSACTIONS` / `USING PERIODIC COMMIT` rejected inside a managed transaction."""
+    message = error.message or ""
+    if error.code in ("Neo.DatabaseError.Statement.ExecutionFailed",
+                      "Neo.DatabaseError.Transaction.TransactionStartFailed"):
+        return "in an implicit transaction" in message
+    if error.code == "Neo.ClientError.Statement.SemanticError":
+        return ("in an open transaction is not possible" in message
+                or "tried to execute in an explicit transaction" in message)
+    return False
+
+class ReadOnlyNeo4jGraph(Neo4jGraph):
+    """
+    Neo4jGraph whose queries (schema refresh, QA chain, agents) run as read
+    transactions. Only the routing/access mode differs from Neo4jGraph.query:
+    statements that need an implicit transaction still fall back to a session.
+    """
+
+    def query(
+        self,
+        query: str,
+        params: Optional[dict] = None,
+        session_params: Optional[dict] = None,
+    ) -> List[Dict[str, Any]]:
+        self._check_driver_state()
+        params = params or {}
+        if not session_params:
+            try:
+                data = read_query(self._driver, self._database, query, params, timeout=self.timeout)
+                return [_value_sanitize(row) for row in data] if self.sanitize else data
+            except Neo4jError as e:
+                if not needs_implicit_transaction(e):
+                    raise
+        session_params = {"database": self._database, "default_access_mode": neo4j.READ_ACCESS,
+                          **(session_params or {})}
+        with self._driver.session(**session_params) as session:
+            result = session.run(Query(text=query, timeout=self.timeout), params)
+            data = [record.data() for record in result]
+        return [_value_sanitize(row) for row in data] if self.sanitize else data
+
+class ReadOnlyNeo4jVector(Neo4jVector):
+    """Neo4jVector whose index lookups and searches run as read transactions."""
+
+    def query(self, query: str, *, params: Optional[dict] = None) -> List[Dict[str, Any]]:
+        return read_query(self._driver, self._database, query, params)
+
+# --- Pool Metrics ---
+def pool_metrics(driver: neo4j.Driver) -> Dict[str, Any]:
+    """
+    Snapshot of connection pool utilisation per server address, plus read
+    query counters. Relies on driver internals, so missing fields read as 0.
+    """
+    pool = getattr(driver, "_pool", None)
+    max_size = getattr(getattr(pool, "pool_config", None), "max_connection_pool_size", 0)
+    addresses = {}
+    for address, connections in list(getattr(pool, "connections", {}).items()):
+        connections = list(connections)
+        in_use = sum(1 for connection in connections if getattr(connection, "in_use", False))
+        addresses[str(address)] = {
+            "in_use": in_use,
+            "idle": len(connections) - in_use,
+            "utilisation": round(in_use / max_size, 3) if max_size else 0.0,
+        }
+    with _stats_lock:
+        stats = dict(query_stats)
+    stats["avg_read_ms"] = round(stats["read_time_ms"] / stats["read_queries"], 2) if stats["read_queries"] else 0.0
+    stats["read_time_ms"] = round(stats["read_time_ms"], 2)
+    return {"max_pool_size": max_size, "addresses": addresses, **stats}
@@ -3,9 +3,9 @@ import os
 from pathlib import Path
 from dotenv import load_dotenv, find_dotenv
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_neo4j import Neo4jGraph
-from langchain_neo4j.vectorstores.neo4j_vector import Neo4jVector
 from langchain_huggingface import HuggingFaceEmbeddings
+from src.config.neo4j_driver import ReadOnlyNeo4jGraph, ReadOnlyNeo4jVector, driver_config
+from src.utils.query_cache import QueryResultCache
 
 dotenv_path = find_dotenv(usecwd=True)
 if not dotenv_path:
@@ -51,15 +51,28 @@ llm = ChatGoogleGenerativeAI(
 )
 
 # Koneksi ke DB Lokal (MITRE ATT&CK)
-graph = Neo4jGraph(
+# One driver (pool settings from src/config/neo4j_driver.py) shared by the graph,
+# the vector index and the Cypher guard; every agent query is a read transaction.
+graph = ReadOnlyNeo4jGraph(
     url=neo4j_uri,
     username=neo4j_username,
     password=neo4j_password,
     database=neo4j_database,
+    driver_config=driver_config(),
 )
 
 # --- Global Configs & Schema ---
 DEFAULT_MAX_ITERATIONS = 3
+# Local cache directory (generated Cypher, query results); defaults to src/.cache
+CACHE_DIR = Path(os.environ.get("AGENT_CACHE_DIR") or Path(__file__).resolve().parents[2] / ".cache")
+
+# Neo4j results are cached until the next ingest run; set QUERY_CACHE_DISK=false
+# to keep them in memory only and QUERY_CACHE_DISK_ENTRIES to bound the SQLite file.
+query_cache = QueryResultCache(
+    CACHE_DIR,
+    disk=os.environ.get("QUERY_CACHE_DISK", "true").lower() != "false",
+    max_disk_entries=int(os.environ.get("QUERY_CACHE_DISK_ENTRIES", "10000")),
+)
 NEO4J_SCHEMA_RAW = graph.schema
 NEO4J_SCHEMA_ESCAPED_FOR_PROMPT = NEO4J_SCHEMA_RAW.replace("{", "{{").replace("}", "}}")
 
@@ -72,12 +85,9 @@ model_name = "sentence-transformers/all-MiniLM-L6-v2"
 embeddings = HuggingFaceEmbeddings(model_name=model_name)
 
 # --- Vector Index Init ---
-vector_index = Neo4jVector.from_existing_index(
+vector_index = ReadOnlyNeo4jVector.from_existing_index(
     embedding=embeddings,
-    url=neo4j_uri,
-    username=neo4j_username,
-    password=neo4j_password,
-    database=neo4j_database,
+    graph=graph,
     index_name=VECTOR_INDEX_NAME,
     keyword_index_name=KEYWORD_INDEX_NAME,
     search_type="hybrid"
@@ -21,6 +21,7 @@ class AgentState(TypedDict):
     
     answer: Optional[str]
     cypher_query: Optional[str]
+    cypher_source: Optional[str]
     error: Optional[str]
     messages: Annotated[list, add_messages]
     
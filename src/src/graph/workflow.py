@@ -8,11 +8,12 @@ from src.agents.guardrails_agent import guardrails_router_chain
 from src.agents.review_agent import review_chain
 from src.agents.synthesizer_agent import synthesis_chain
 from src.agents.vector_agent import query_vector_search
-from src.agents.cypher_agent import query_cypher
+from src.agents.cypher_agent import query_cypher, accept_cypher, reject_cypher
 from src.agents.reflection_agent import vector_reflection_chain, reflection_chain
 from src.agents.mcp_rdf_agent import run_mcp_agent
 # from src.agents.routing_agent import router_chain
 from src.agents.log_analysis_agent import log_analysis_chain
+from src.utils.cypher_guard import CypherCostError
 
 logger = logging.getLogger(__name__)
 
@@ -110,14 +111,25 @@ def cypher_query_node(state: AgentState):
 
         return {
             "cypher_query": generated_query,
-            "log_cypher_context": context
+            "cypher_source": cypher_result.get("source"),
+            "log_cypher_context": context,
+            "error": None
+        }
+    except CypherCostError as e:
+        logger.warning(f"[[Cypher Agent]]: {e}. Query: {e.query}")
+        return {
+            "error": str(e),
+            "log_cypher_context": [],
+            "cypher_query": e.query,
+            "cypher_source": None
         }
     except Exception as e:
         logger.error(f"[[Cypher Agent]] failed: {e}", exc_info=True)
         return {
             "error": f"Query Cypher failed: {e}",
             "log_cypher_context": [],
-            "cypher_query": "Failed to generate Cypher query due to an error."
+            "cypher_query": "Failed to generate Cypher query due to an error.",
+            "cypher_source": None
         }
 
 # --- Node Definition: Review Cypher Answer ---
@@ -138,7 +150,15 @@ def review_cypher_node(state: AgentState):
     review = review_chain.invoke({"question": question, "context": context})
     logger.info(f"[[Review Cypher]]: Decision: {review.decision}. Reasoning: {review.reasoning}")
 
-    return {"cypher_answer_sufficient": review.decision == "sufficient"}
+    sufficient = review.decision == "sufficient"
+    # Templates and few-shot examples are kept only once the review accepts the
+    # results, so a rejected query is not replayed for every rephrasing.
+    if state.get('cypher_source') == "generated" and sufficient and state['log_cypher_context']:
+        accept_cypher(state['question'], state['cypher_query'], len(state['log_cypher_context']))
+    elif state.get('cypher_source') == "cache" and not sufficient:
+        reject_cypher(state['question'])
+
+    return {"cypher_answer_sufficient": sufficient}
 
 # --- Node Definition: Cypher Reflection ---
 def cypher_reflection_node(state: AgentState):
@@ -149,7 +169,8 @@ def cypher_reflection_node(state: AgentState):
     
     rephrased_result = reflection_chain.invoke({
         "original_question": original_question,
-        "cypher_query": failed_query
+        "cypher_query": failed_query,
+        "failure_reason": state.get('error') or "The query returned no usable results."
     })
     
     new_question = rephrased_result.rephrased_question
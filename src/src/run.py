@@ -3,6 +3,9 @@ import argparse
 import asyncio
 from src.utils.logging_config import setup_logging
 from src.graph.workflow import app
+from src.agents.mcp_rdf_agent import close_mcp_agent
+from src.config.neo4j_driver import pool_metrics
+from src.config.settings import graph
 import logging
 
 async def main():
@@ -25,10 +28,14 @@ async def main():
 
     config = {"recursion_limit": 30}
 
-    final_result = await app.ainvoke(initial_state, config=config)
+    try:
+        final_result = await app.ainvoke(initial_state, config=config)
+    finally:
+        await close_mcp_agent()
     
     print("\n--- Final Answer ---")
     print(final_result.get('answer'))
+    logging.info(f"Neo4j pool metrics: {pool_metrics(graph._driver)}")
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
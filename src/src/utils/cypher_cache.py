@@ -0,0 +1,197 @@
+# src/utils/cypher_cache.py
+import json
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+# --- Question Normalization ---
+# Slots are the parts of a question that change between templated questions
+# ("info about CVE-XXXX"). Identifiers are matched first so their digits are
+# not picked up again as numbers.
+SLOT_PATTERNS = [
+    ("CVE", re.compile(r"\bCVE-\d{4}-\d{4,}\b", re.IGNORECASE)),
+    ("CWE", re.compile(r"\bCWE-\d+\b", re.IGNORECASE)),
+    ("CAPEC", re.compile(r"\bCAPEC-\d+\b", re.IGNORECASE)),
+    ("TEXT", re.compile(r"(?<!\w)'([^']+)'(?!\w)|\"([^\"]+)\"")),
+    ("NUM", re.compile(r"(?<![\w.])\d+(?:\.\d+)?(?![\w.])")),
+    ("NAME", re.compile(r"\b[A-Z][\w+&.-]*[\w+](?:\s+[A-Z][\w+&.-]*[\w+])*")),
+]
+
+# Capitalized words that are vocabulary rather than product names.
+DOMAIN_TERMS = {
+    "CVE", "CVES", "CWE", "CWES", "CAPEC", "CAPECS", "CVSS", "CPE", "MITRE",
+    "ATT&CK", "NVD", "I",
+}
+
+# Cypher string and numeric literals. Numbers glued to identifiers (`r1`) are skipped.
+CYPHER_LITERAL_PATTERN = re.compile(
+    r"'((?:[^'\\]|\\.)*)'|\"((?:[^\"\\]|\\.)*)\"|(?<![\w.$])(\d+(?:\.\d+)?)(?![\w.])"
+)
+
+# Row counts are part of the query shape, not of the question's values.
+PAGING_PREFIX_PATTERN = re.compile(r"\b(?:LIMIT|SKIP)\s*$", re.IGNORECASE)
+
+TRANSFORMS = {
+    "exact": lambda value: value,
+    "lower": lambda value: value.lower(),
+    "upper": lambda value: value.upper(),
+}
+
+def _is_name(value: str, start: int) -> bool:
+    """Keep capitalized spans that are not the sentence opener or domain vocabulary."""
+    if start == 0:
+        return False
+    return any(word.upper() not in DOMAIN_TERMS for word in value.split())
+
+def normalize_question(question: str) -> tuple[str, list[tuple[str, str]]]:
+    """
+    Replace identifiers, quoted strings, numbers and product names with placeholders.
+    Returns the normalized key and the (kind, value) slots in order of appearance.
+    """
+    spans = []
+    for kind, pattern in SLOT_PATTERNS:
+        for match in pattern.finditer(question):
+            start, end = match.span()
+            if any(start < taken_end and taken_start < end for taken_start, taken_end, _, _ in spans):
+                continue
+            value = next((group for group in match.groups() if group), match.group(0))
+            if kind == "NAME" and not _is_name(value, start):
+                continue
+            spans.append((start, end, kind, value))
+    spans.sort()
+
+    key_parts = []
+    cursor = 0
+    for start, end, kind, _ in spans:
+        key_parts.append(question[cursor:start].lower())
+        key_parts.append(f"<{kind}>")
+        cursor = end
+    key_parts.append(question[cursor:].lower())
+    key = " ".join("".join(key_parts).split()).rstrip("?.! ")
+    return key, [(kind, value) for _, _, kind, value in spans]
+
+# --- Literal Lifting ---
+def _match_literal(kind: str, value: str, literal: str, is_number: bool) -> str | None:
+    """Return the transform that turns the slot value into the literal, if any."""
+    if is_number:
+        if kind != "NUM":
+            return None
+        return "number" if float(literal) == float(value) else None
+    for transform, apply in TRANSFORMS.items():
+        if apply(value) == literal:
+            return transform
+    return None
+
+def lift_literals(query: str, slots: list[tuple[str, str]]) -> tuple[str, list[dict]] | None:
+    """
+    Replace the query literals that carry slot values with parameters.
+    Each slot lifts exactly one literal; LIMIT/SKIP counts are never lifted.
+    Returns the parameterized query and its bindings, or None when a slot
+    value does not appear in the query or appears in a second literal (the
+    shape cannot be reused safely).
+    """
+    bindings = {}
+    bound_slots = set()
+    ambiguous = False
+
+    def replace(match):
+        nonlocal ambiguous
+        literal = next(group for group in match.groups() if group is not None)
+        is_number = match.group(3) is not None
+        if is_number and PAGING_PREFIX_PATTERN.search(match.string, 0, match.start()):
+            return match.group(0)
+        matches_bound_slot = False
+        for index, (kind, value) in enumerate(slots):
+            transform = _match_literal(kind, value, literal, is_number)
+            if transform is None:
+                continue
+            if index in bound_slots:
+                matches_bound_slot = True
+                continue
+            param = f"slot{index}_{transform}"
+            bindings[param] = {"slot": index, "transform": transform}
+            bound_slots.add(index)
+            return f"${param}"
+        # A second copy of a slot value would keep the old value when the template is reused.
+        ambiguous = ambiguous or matches_bound_slot
+        return match.group(0)
+
+    template = CYPHER_LITERAL_PATTERN.sub(replace, query)
+    if ambiguous or len(bound_slots) != len(slots):
+        return None
+    return template, [{"param": param, **binding} for param, binding in bindings.items()]
+
+def _number(value: str) -> int | float:
+    """Type a number by its own form: 7 is an integer, 7.5 and 7.0 are floats."""
+    return float(value) if "." in value else int(value)
+
+def bind_parameters(bindings: list[dict], slots: list[tuple[str, str]]) -> dict:
+    """Build the query parameters for a cached template from new slot values."""
+    params = {}
+    for binding in bindings:
+        value = slots[binding["slot"]][1]
+        if binding["transform"] == "number":
+            params[binding["param"]] = _number(value)
+        else:
+            params[binding["param"]] = TRANSFORMS[binding["transform"]](value)
+    return params
+
+# --- Cache ---
+class CypherQueryCache:
+    """
+    LRU cache of validated, parameterized Cypher keyed on the normalized question.
+    Entries are persisted as JSON so the cache survives across runs.
+    """
+
+    def __init__(self, path: Path, max_entries: int = 500):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        if self.path.exists():
+            try:
+                entries = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                entries = {}
+            self._entries.update(entries)
+
+    def lookup(self, question: str) -> tuple[str, dict] | None:
+        """Return (query, params) for a question matching a cached shape."""
+        key, slots = normalize_question(question)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+        return entry["query"], bind_parameters(entry["bindings"], slots)
+
+    def evict(self, question: str) -> bool:
+        """Drop the template cached for the question's shape. Returns False if there was none."""
+        key, _ = normalize_question(question)
+        with self._lock:
+            if self._entries.pop(key, None) is None:
+                return False
+            self._persist()
+        return True
+
+    def store(self, question: str, query: str) -> bool:
+        """Cache the query with its literals lifted into parameters. Returns False if not cacheable."""
+        key, slots = normalize_question(question)
+        lifted = lift_literals(query, slots)
+        if lifted is None:
+            return False
+        template, bindings = lifted
+        with self._lock:
+            self._entries[key] = {"query": template, "bindings": bindings}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._persist()
+        return True
+
+    def _persist(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self._entries, indent=2), encoding="utf-8")
+        tmp_path.replace(self.path)
@@ -0,0 +1,95 @@
+# src/utils/cypher_guard.py
+import re
+from neo4j import READ_ACCESS
+from langchain_neo4j import Neo4jGraph
+
+# --- Cost Budgets ---
+# Any operator estimated above this many rows is rejected outright.
+MAX_ESTIMATED_ROWS = 1_000_000
+# Queries estimated to return more rows than this get a LIMIT injected.
+MAX_RESULT_ROWS = 100
+
+REJECTED_OPERATORS = {
+    "AllNodesScan": "it scans every node in the database (add a label to each node pattern)",
+}
+
+# Operators that are fine when small but get a tighter row budget. The prompt's
+# `elementId(n1) < elementId(n2)` pair pattern plans as a CartesianProduct.
+LIMITED_OPERATORS = {
+    "CartesianProduct": (
+        10_000,
+        "it builds a cartesian product of disconnected patterns (connect the patterns or split the query)",
+    ),
+}
+
+# `[*]`, `[:REL*]`, `[*2..]` - variable-length relationships without an upper bound.
+UNBOUNDED_PATH_PATTERN = re.compile(r"\*\s*\]|\*\s*\d*\s*\.\.\s*\]")
+TRAILING_LIMIT_PATTERN = re.compile(r"\bLIMIT\s+(?:\d+|\$\w+)\s*$", re.IGNORECASE)
+
+class CypherCostError(ValueError):
+    """Raised when a generated Cypher query is estimated to be too expensive to run."""
+
+    def __init__(self, query: str, reason: str):
+        super().__init__(f"Query rejected by cost guard: {reason}")
+        self.query = query
+        self.reason = reason
+
+def _walk_plan(plan: dict):
+    yield plan
+    for child in plan.get("children", []):
+        yield from _walk_plan(child)
+
+def explain_plan(graph: Neo4jGraph, query: str, params: dict | None = None) -> dict:
+    """Return the planner's EXPLAIN plan for the query without executing it."""
+    with graph._driver.session(database=graph._database, default_access_mode=READ_ACCESS) as session:
+        summary = session.run(f"EXPLAIN {query}", params or {}).consume()
+    return summary.plan or {}
+
+def guard_cypher(graph: Neo4jGraph, query: str, params: dict | None = None) -> str:
+    """
+    Inspect the EXPLAIN plan of an LLM-generated query before it runs.
+
+    Rejects unbounded variable-length paths, AllNodesScan, operators over their
+    LIMITED_OPERATORS budget (CartesianProduct) and operators estimated above
+    MAX_ESTIMATED_ROWS by raising CypherCostError.
+    Queries estimated to return more than MAX_RESULT_ROWS without a LIMIT are
+    rewritten with one. Returns the query to execute.
+    """
+    statement = query.strip().rstrip(";")
+    if UNBOUNDED_PATH_PATTERN.search(statement):
+        raise CypherCostError(
+            statement,
+            "it uses a variable-length relationship without an upper bound (use e.g. [*1..3])",
+        )
+
+    plan = explain_plan(graph, statement, params)
+    operators = list(_walk_plan(plan))
+    for operator in operators:
+        operator_type = operator.get("operatorType", "").split("@")[0]
+        if operator_type in REJECTED_OPERATORS:
+            raise CypherCostError(statement, REJECTED_OPERATORS[operator_type])
+        if operator_type in LIMITED_OPERATORS:
+            limit, reason = LIMITED_OPERATORS[operator_type]
+            estimated = operator.get("args", {}).get("EstimatedRows", 0)
+            if estimated > limit:
+                raise CypherCostError(
+                    statement, f"{reason}; estimated {estimated:,.0f} rows, above the budget of {limit:,}"
+                )
+
+    estimates = [operator.get("args", {}).get("EstimatedRows", 0) for operator in operators]
+    if estimates and max(estimates) > MAX_ESTIMATED_ROWS:
+        raise CypherCostError(
+            statement,
+            f"the planner estimates {max(estimates):,.0f} rows for one step, above the budget of "
+            f"{MAX_ESTIMATED_ROWS:,} (filter on indexed properties such as ids or scores)",
+        )
+
+    result_rows = plan.get("args", {}).get("EstimatedRows", 0)
+    if result_rows > MAX_RESULT_ROWS and not TRAILING_LIMIT_PATTERN.search(statement):
+        if re.search(r"\bUNION\b", statement, re.IGNORECASE):
+            raise CypherCostError(
+                statement,
+                f"the planner estimates {result_rows:,.0f} result rows and a UNION query cannot be limited safely",
+            )
+        statement = f"{statement}\nLIMIT {MAX_RESULT_ROWS}"
+    return statement
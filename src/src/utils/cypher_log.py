@@ -0,0 +1,71 @@
+# src/utils/cypher_log.py
+import json
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+_lock = threading.Lock()
+
+def append_cypher_log(
+    path: Path,
+    question: str,
+    query: str,
+    params: Optional[dict],
+    rows: int,
+    duration_ms: float,
+    source: str,
+) -> None:
+    """Append one executed Cypher query as a JSON line (read by scripts/index_advisor.py)."""
+    record = {
+        "timestamp": time.time(),
+        "question": question,
+        "query": query,
+        "params": params or {},
+        "rows": rows,
+        "duration_ms": round(duration_ms, 2),
+        "source": source,
+    }
+    path = Path(path)
+    with _lock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+
+def read_cypher_log(path: Path) -> List[dict]:
+    """Return the logged queries, skipping malformed lines."""
+    path = Path(path)
+    if not path.exists():
+        return []
+    records = []
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+# Records with this source mark a generated query whose results the review
+# accepted; they are not executions of their own.
+ACCEPTED_SOURCE = "accepted"
+
+def read_executed_queries(path: Path) -> List[dict]:
+    """Return the logged query executions, without the acceptance markers."""
+    return [record for record in read_cypher_log(path) if record.get("source") != ACCEPTED_SOURCE]
+
+def successful_queries(path: Path, limit: int = 200) -> List[dict]:
+    """
+    Return the most recent generated queries the review accepted, one per question,
+    as {"question", "query"} dicts (used to seed the few-shot example pool).
+    """
+    examples = {}
+    for record in reversed(read_cypher_log(path)):
+        if record.get("source") != ACCEPTED_SOURCE:
+            continue
+        question = (record.get("question") or "").strip()
+        if question and question not in examples:
+            examples[question] = {"question": question, "query": record["query"]}
+        if len(examples) >= limit:
+            break
+    return list(examples.values())
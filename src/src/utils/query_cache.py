@@ -0,0 +1,130 @@
+# src/utils/query_cache.py
+import hashlib
+import json
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# The graph only changes when scripts/ingest_cve_dataset.py runs; it rewrites
+# this marker so every cache sharing the directory drops its entries.
+EPOCH_FILE_NAME = "neo4j_epoch"
+DISK_CACHE_FILE_NAME = "neo4j_results.sqlite"
+
+def bump_epoch(cache_dir: Path) -> str:
+    """Write a new ingest epoch marker into the cache directory and return it."""
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    epoch = str(time.time_ns())
+    (cache_dir / EPOCH_FILE_NAME).write_text(epoch, encoding="utf-8")
+    return epoch
+
+class QueryResultCache:
+    """
+    Result cache around `Neo4jGraph.query`, keyed on query text plus parameters.
+
+    Results live in an in-memory LRU and, when `disk` is enabled, in a SQLite
+    file shared by every process using the same cache directory. All entries
+    belong to the ingest epoch they were read in and are dropped when it changes.
+    The SQLite file keeps at most `max_disk_entries` rows; the oldest writes are
+    pruned first.
+    """
+
+    def __init__(self, cache_dir: Path, max_entries: int = 1024, disk: bool = True,
+                 max_disk_entries: int = 10_000):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.disk = disk
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "invalidations": 0}
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._epoch = self._read_epoch()
+        self._db = None
+        if disk:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.cache_dir / DISK_CACHE_FILE_NAME, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, epoch TEXT, value BLOB)"
+            )
+            self._db.commit()
+
+    def _read_epoch(self) -> str:
+        try:
+            return (self.cache_dir / EPOCH_FILE_NAME).read_text(encoding="utf-8").strip()
+        except OSError:
+            return "0"
+
+    def _check_epoch(self) -> None:
+        epoch = self._read_epoch()
+        if epoch != self._epoch:
+            self.invalidate()
+            self._epoch = epoch
+
+    @staticmethod
+    def make_key(query: str, params: Optional[dict]) -> str:
+        payload = json.dumps({"query": query, "params": params or {}}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def invalidate(self) -> None:
+        """Drop every cached result from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+            self.stats["invalidations"] += 1
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return self._memory[key]
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value FROM results WHERE key = ? AND epoch = ?", (key, self._epoch)
+                ).fetchone()
+                if row is not None:
+                    value = pickle.loads(row[0])
+                    self._remember(key, value)
+                    self.stats["disk_hits"] += 1
+                    return value
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key: str, value: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._remember(key, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, epoch, value) VALUES (?, ?, ?)",
+                    (key, self._epoch, pickle.dumps(value)),
+                )
+                # REPLACE re-inserts the row, so rowid order is write order.
+                self._db.execute(
+                    "DELETE FROM results WHERE rowid <= "
+                    "(SELECT rowid FROM results ORDER BY rowid DESC LIMIT 1 OFFSET ?)",
+                    (self.max_disk_entries,),
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, value: List[Dict[str, Any]]) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def query(self, graph, query: str, params: Optional[dict] = None) -> List[Dict[str, Any]]:
+        """Return cached results for the query, running it on `graph` on a miss."""
+        self._check_epoch()
+        key = self.make_key(query, params)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        result = graph.query(query, params or {})
+        self.put(key, result)
+        return result
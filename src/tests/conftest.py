@@ -0,0 +1,41 @@
+import sys
+import types
+from unittest.mock import MagicMock
+
+import pytest
+
+
+@pytest.fixture
+def fake_settings(monkeypatch, tmp_path):
+    """Stand-in for src.config.settings, which connects to Neo4j and loads models on import."""
+    settings = types.ModuleType("src.config.settings")
+    for name in ("llm", "graph", "vector_index", "embeddings", "query_cache"):
+        setattr(settings, name, MagicMock(name=name))
+    settings.CACHE_DIR = tmp_path
+    settings.KEYWORD_INDEX_NAME = "keyword"
+    settings.NEO4J_SCHEMA_ESCAPED_FOR_PROMPT = ""
+    monkeypatch.setitem(sys.modules, "src.config.settings", settings)
+    return settings
+
+
+@pytest.fixture
+def import_agent(fake_settings, monkeypatch):
+    """Import an agent module against the fake settings, discarding any earlier import."""
+    import importlib
+
+    def load(name: str):
+        monkeypatch.delitem(sys.modules, name, raising=False)
+        return importlib.import_module(name)
+
+    return load
+
+
+@pytest.fixture
+def server():
+    """The SEPSES MCP server module, imported in-process and reset to its default flags afterwards."""
+    pytest.importorskip("mcp")
+    from scripts.run_sepses_mcp import load_server
+
+    module = load_server()
+    yield module
+    module.configure(module.parser.parse_args([]))
@@ -0,0 +1,66 @@
+from src.utils.cypher_cache import CypherQueryCache, bind_parameters, lift_literals, normalize_question
+
+
+def test_normalize_question_slots():
+    key, slots = normalize_question("Show CVEs for Apache Tomcat with score above 7.5 like CVE-2024-1234")
+    assert key == "show cves for <NAME> with score above <NUM> like <CVE>"
+    assert slots == [("NAME", "Apache Tomcat"), ("NUM", "7.5"), ("CVE", "CVE-2024-1234")]
+
+
+def test_lift_skips_limit_with_same_value():
+    _, slots = normalize_question("CVEs with score above 7")
+    template, bindings = lift_literals("MATCH (c:CVE) WHERE c.cvss_score > 7 RETURN c LIMIT 7", slots)
+    assert template == "MATCH (c:CVE) WHERE c.cvss_score > $slot0_number RETURN c LIMIT 7"
+    assert bindings == [{"param": "slot0_number", "slot": 0, "transform": "number"}]
+
+
+def test_lift_never_parameterizes_paging():
+    _, slots = normalize_question("top 5 CVEs")
+    assert lift_literals("MATCH (c:CVE) RETURN c SKIP 0 LIMIT 5", slots) is None
+
+
+def test_lift_rejects_second_copy_of_a_slot_value():
+    _, slots = normalize_question("info about CVE-2024-1234")
+    query = "MATCH (c:CVE) WHERE c.id = 'CVE-2024-1234' OR c.alias = 'CVE-2024-1234' RETURN c"
+    assert lift_literals(query, slots) is None
+
+
+def test_lift_binds_each_slot_once_with_equal_values():
+    _, slots = normalize_question("score between 7 and 7")
+    template, bindings = lift_literals("MATCH (c) WHERE c.s >= 7 AND c.s <= 7 RETURN c", slots)
+    assert template == "MATCH (c) WHERE c.s >= $slot0_number AND c.s <= $slot1_number RETURN c"
+    assert [binding["slot"] for binding in bindings] == [0, 1]
+
+
+def test_lift_string_transforms():
+    _, slots = normalize_question("info about CVE-2024-1234")
+    template, bindings = lift_literals("MATCH (c) WHERE toLower(c.id) = 'cve-2024-1234' RETURN c", slots)
+    assert template == "MATCH (c) WHERE toLower(c.id) = $slot0_lower RETURN c"
+    assert bind_parameters(bindings, [("CVE", "CVE-2023-9999")]) == {"slot0_lower": "cve-2023-9999"}
+
+
+def test_bound_number_is_typed_by_new_value():
+    _, slots = normalize_question("CVEs with score above 7")
+    _, bindings = lift_literals("MATCH (c) WHERE c.score > 7 RETURN c", slots)
+    assert bind_parameters(bindings, [("NUM", "7.5")]) == {"slot0_number": 7.5}
+    assert bind_parameters(bindings, [("NUM", "8")]) == {"slot0_number": 8}
+
+
+def test_cache_round_trip(tmp_path):
+    cache = CypherQueryCache(tmp_path / "cache.json")
+    assert cache.store("CVEs with score above 7", "MATCH (c) WHERE c.score > 7 RETURN c LIMIT 7")
+    assert cache.lookup("CVEs with score above 7.5") == (
+        "MATCH (c) WHERE c.score > $slot0_number RETURN c LIMIT 7",
+        {"slot0_number": 7.5},
+    )
+    assert CypherQueryCache(tmp_path / "cache.json").lookup("CVEs with score above 9") is not None
+    assert cache.lookup("something else entirely") is None
+
+
+def test_evict_forgets_the_question_shape(tmp_path):
+    cache = CypherQueryCache(tmp_path / "cache.json")
+    cache.store("info about CVE-2024-1234", "MATCH (c) WHERE c.id = 'CVE-2024-1234' RETURN c")
+    assert cache.evict("info about CVE-2023-0001")
+    assert cache.lookup("info about CVE-2024-1234") is None
+    assert CypherQueryCache(tmp_path / "cache.json").lookup("info about CVE-2024-1234") is None
+    assert not cache.evict("info about CVE-2024-1234")
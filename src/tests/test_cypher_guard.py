@@ -0,0 +1,60 @@
+import pytest
+
+pytest.importorskip("langchain_neo4j")
+
+from src.utils import cypher_guard
+from src.utils.cypher_guard import CypherCostError, guard_cypher
+
+
+def operator(name, rows, *children):
+    return {"operatorType": f"{name}@neo4j", "args": {"EstimatedRows": rows}, "children": list(children)}
+
+
+@pytest.fixture
+def plan(monkeypatch):
+    """Set the EXPLAIN plan the guard sees."""
+    current = {}
+    monkeypatch.setattr(cypher_guard, "explain_plan", lambda graph, query, params=None: current["plan"])
+
+    def set_plan(value):
+        current["plan"] = value
+
+    return set_plan
+
+
+PAIR_QUERY = "MATCH (a:CWE), (b:CWE) WHERE elementId(a) < elementId(b) RETURN a.id, b.id LIMIT 10"
+
+
+def test_small_cartesian_product_is_allowed(plan):
+    plan(operator("ProduceResults", 10, operator("CartesianProduct", 400, operator("NodeByLabelScan", 20))))
+    assert guard_cypher(None, PAIR_QUERY) == PAIR_QUERY
+
+
+def test_large_cartesian_product_is_rejected(plan):
+    plan(operator("ProduceResults", 10, operator("CartesianProduct", 250_000, operator("NodeByLabelScan", 500))))
+    with pytest.raises(CypherCostError, match="cartesian product.*250,000 rows"):
+        guard_cypher(None, PAIR_QUERY)
+
+
+def test_all_nodes_scan_is_rejected(plan):
+    plan(operator("ProduceResults", 1, operator("AllNodesScan", 5)))
+    with pytest.raises(CypherCostError, match="scans every node"):
+        guard_cypher(None, "MATCH (n) RETURN n LIMIT 1")
+
+
+def test_unbounded_path_is_rejected_before_explain(plan):
+    with pytest.raises(CypherCostError, match="upper bound"):
+        guard_cypher(None, "MATCH (a:CVE)-[*]->(b) RETURN b")
+
+
+def test_operator_over_global_budget_is_rejected(plan):
+    plan(operator("ProduceResults", 10, operator("Expand(All)", 5_000_000)))
+    with pytest.raises(CypherCostError, match="5,000,000 rows"):
+        guard_cypher(None, "MATCH (a:CVE)-->(b) RETURN b LIMIT 10")
+
+
+def test_large_result_gets_a_limit(plan):
+    plan(operator("ProduceResults", 5_000, operator("NodeByLabelScan", 5_000)))
+    assert guard_cypher(None, "MATCH (c:CVE) RETURN c.id;") == "MATCH (c:CVE) RETURN c.id\nLIMIT 100"
+    with pytest.raises(CypherCostError, match="UNION"):
+        guard_cypher(None, "MATCH (c:CVE) RETURN c.id UNION MATCH (c:CWE) RETURN c.id")
@@ -0,0 +1,10 @@
+from src.utils.cypher_log import ACCEPTED_SOURCE, append_cypher_log, read_executed_queries, successful_queries
+
+
+def test_only_accepted_queries_seed_examples(tmp_path):
+    path = tmp_path / "log.jsonl"
+    append_cypher_log(path, "rejected question", "MATCH (a) RETURN a", None, 3, 1.0, "generated")
+    append_cypher_log(path, "accepted question", "MATCH (b) RETURN b", None, 2, 1.0, "generated")
+    append_cypher_log(path, "accepted question", "MATCH (b) RETURN b", None, 2, 0.0, ACCEPTED_SOURCE)
+    assert successful_queries(path) == [{"question": "accepted question", "query": "MATCH (b) RETURN b"}]
+    assert [record["question"] for record in read_executed_queries(path)] == ["rejected question", "accepted question"]
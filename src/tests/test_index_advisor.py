@@ -0,0 +1,52 @@
+import pytest
+
+index_advisor = pytest.importorskip("scripts.index_advisor")
+
+
+LOWERED = "MATCH (c:CVE) WHERE toLower(c.description) CONTAINS 'sql' RETURN c.id"
+EQUALITY = "MATCH (c:CVE) WHERE c.id = $id RETURN c.description ORDER BY c.published"
+
+
+def test_extract_access_patterns():
+    assert set(index_advisor.extract_access_patterns(LOWERED)) == {("CVE", "description", "lowered_string")}
+    assert set(index_advisor.extract_access_patterns(EQUALITY)) == {
+        ("CVE", "id", "equality"),
+        ("CVE", "published", "order"),
+    }
+
+
+LOWERED_EQUALITY = "MATCH (w:CWE) WHERE toLower(w.name) = 'sql injection' RETURN w.id"
+
+
+def test_lowered_contains_gets_a_fulltext_index():
+    records = [{"query": LOWERED}, {"query": LOWERED}, {"query": EQUALITY}, {"query": EQUALITY}]
+
+    proposals = index_advisor.propose_indexes(records, existing=set(), min_count=2)
+    assert {(p["type"], p["label"], p["property"]) for p in proposals} == {
+        ("FULLTEXT", "CVE", "description"),
+        ("RANGE", "CVE", "id"),
+        ("RANGE", "CVE", "published"),
+    }
+    fulltext = next(p for p in proposals if p["type"] == "FULLTEXT")
+    assert fulltext["statement"] == (
+        "CREATE FULLTEXT INDEX advisor_cve_description_fulltext IF NOT EXISTS FOR (n:CVE) ON EACH [n.description]"
+    )
+    assert index_advisor.propose_indexes(
+        records, existing={("FULLTEXT", "CVE", "description")}, min_count=2
+    ) == [p for p in proposals if p["type"] != "FULLTEXT"]
+
+
+def test_lowered_equality_is_rewrite_advice_only():
+    records = [{"query": LOWERED_EQUALITY}, {"query": LOWERED_EQUALITY}]
+    assert index_advisor.propose_indexes(records, existing=set(), min_count=2) == []
+    rewrites = index_advisor.propose_rewrites(records, min_count=2)
+    assert [(r["label"], r["property"], r["kind"], r["queries"]) for r in rewrites] == [
+        ("CWE", "name", "lowered_equality", 2)
+    ]
+
+
+def test_existing_and_rare_patterns_are_skipped():
+    records = [{"query": EQUALITY}, {"query": EQUALITY}, {"query": LOWERED}]
+    proposals = index_advisor.propose_indexes(records, existing={("RANGE", "CVE", "id")}, min_count=2)
+    assert [p["property"] for p in proposals] == ["published"]
+    assert index_advisor.propose_rewrites([{"query": LOWERED_EQUALITY}], min_count=2) == []
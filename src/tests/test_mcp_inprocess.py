@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("langgraph")
+
+TURTLE = """
+@prefix attack: <http://w3id.org/sepses/vocab/ref/attack#> .
+@prefix dcterm: <http://purl.org/dc/terms/> .
+<http://w3id.org/sepses/resource/attack/technique/T0001> a attack:Technique ; dcterm:title "Phishing" .
+"""
+
+
+def test_initialize_applies_server_flags(server, monkeypatch, tmp_path):
+    from src.agents import mcp_inprocess
+
+    monkeypatch.setattr(mcp_inprocess, "create_react_agent", lambda llm, tools, prompt=None: object())
+    rdf_file = tmp_path / "attack.ttl"
+    rdf_file.write_text(TURTLE)
+    agent = mcp_inprocess.InProcessMCPAgent(
+        llm=None,
+        server_args=[
+            "--rdf-file", str(rdf_file),
+            "--max-concurrency", "3",
+            "--cache-size", "7",
+            "--output-format", "json",
+            "--no-keyword-index",
+        ],
+    )
+
+    async def scenario():
+        await agent.initialize()
+        try:
+            assert server.args.max_concurrency == 3
+            assert server.pool_stats["workers"] == 3
+            assert server.sparql_cache.max_entries == 7
+            assert agent.lifespan_context["output_format"] == "json"
+            assert agent.lifespan_context["keyword_index"] is None
+        finally:
+            await agent.close()
+
+    asyncio.run(scenario())
+
+
+def test_reset_session_settings_restores_the_defaults(server, monkeypatch, tmp_path):
+    from src.agents import mcp_inprocess
+
+    monkeypatch.setattr(mcp_inprocess, "create_react_agent", lambda llm, tools, prompt=None: object())
+    rdf_file = tmp_path / "attack.ttl"
+    rdf_file.write_text(TURTLE)
+    agent = mcp_inprocess.InProcessMCPAgent(llm=None, server_args=["--rdf-file", str(rdf_file), "--no-keyword-index"])
+
+    async def scenario():
+        await agent.initialize()
+        try:
+            tools = {tool.name: tool for tool in agent._tools}
+            await tools["set_output_format"].ainvoke({"output_format": "tsv"})
+            await agent.reset_session_settings()
+            return agent.lifespan_context.get("session_settings")
+        finally:
+            await agent.close()
+
+    assert asyncio.run(scenario()) == {}
@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("mcp_use")
+
+
+class FakeAgent:
+    def __init__(self, results, started=None):
+        self.results = list(results)
+        self.started = started
+        self.closed = False
+
+    async def run(self, question, manage_connector=False):
+        if self.started is not None:
+            self.started.append(question)
+            await asyncio.sleep(0.01)
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def rdf_agent(import_agent, monkeypatch):
+    module = import_agent("src.agents.mcp_rdf_agent")
+    resets = []
+
+    async def reset(agent):
+        resets.append(agent)
+
+    monkeypatch.setattr(module, "reset_session_settings", reset)
+    module.resets = resets
+    return module
+
+
+def use_agents(module, monkeypatch, *agents):
+    pending = list(agents)
+
+    async def get_agent():
+        if module._mcp_agent is None:
+            module._mcp_agent = pending.pop(0)
+        return module._mcp_agent
+
+    monkeypatch.setattr(module, "get_mcp_agent", get_agent)
+
+
+def test_tool_errors_are_not_retried(rdf_agent, monkeypatch):
+    agent = FakeAgent(["Agent stopped due to an error: Invalid SPARQL query"])
+    use_agents(rdf_agent, monkeypatch, agent)
+
+    result = asyncio.run(rdf_agent.run_mcp_agent("q"))
+
+    assert result.startswith("Error during MCP agent execution")
+    assert not agent.closed and rdf_agent._mcp_agent is agent
+    assert rdf_agent.mcp_stats["reconnects"] == 0
+
+
+def test_transport_errors_reconnect_once(rdf_agent, monkeypatch):
+    broken = FakeAgent([BrokenPipeError("Broken pipe")])
+    fresh = FakeAgent(["answer"])
+    use_agents(rdf_agent, monkeypatch, broken, fresh)
+    monkeypatch.setitem(rdf_agent.mcp_stats, "reconnects", 0)
+
+    assert asyncio.run(rdf_agent.run_mcp_agent("q")) == "answer"
+    assert broken.closed and rdf_agent._mcp_agent is fresh
+    assert rdf_agent.mcp_stats["reconnects"] == 1
+    assert rdf_agent.resets == [broken, fresh]
+
+
+def test_runs_are_not_serialized(rdf_agent, monkeypatch):
+    started = []
+    agent = FakeAgent(["one", "two"], started)
+    use_agents(rdf_agent, monkeypatch, agent)
+
+    async def scenario():
+        first = asyncio.create_task(rdf_agent.run_mcp_agent("first"))
+        second = asyncio.create_task(rdf_agent.run_mcp_agent("second"))
+        await asyncio.sleep(0.005)
+        overlapping = len(started)
+        await asyncio.gather(first, second)
+        return overlapping
+
+    assert asyncio.run(scenario()) == 2
+
+
+@pytest.mark.parametrize(
+    "error, expected",
+    [
+        (ConnectionResetError(), True),
+        ("Agent stopped due to an error: Connection closed", True),
+        ("Agent stopped due to an error: ClosedResourceError()", True),
+        (ValueError("bad argument"), False),
+        ("Agent stopped due to an error: rate limit exceeded", False),
+    ],
+)
+def test_is_transport_error(rdf_agent, error, expected):
+    assert rdf_agent.is_transport_error(error) is expected
@@ -0,0 +1,78 @@
+import pytest
+
+pytest.importorskip("langchain_neo4j")
+
+import neo4j
+from neo4j.exceptions import Neo4jError
+
+from src.config.neo4j_driver import ReadOnlyNeo4jGraph
+
+IN_TRANSACTIONS = Neo4jError._hydrate_neo4j(
+    code="Neo.DatabaseError.Statement.ExecutionFailed",
+    message="A query with 'CALL { ... } IN TRANSACTIONS' can only be executed in an implicit transaction",
+)
+
+
+class Record(dict):
+    def data(self):
+        return dict(self)
+
+
+class FakeSession:
+    def __init__(self, driver, **params):
+        self.driver, self.params = driver, params
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, params):
+        self.driver.calls.append(("session", self.params, params))
+        return [Record(self.driver.row)]
+
+
+class FakeDriver:
+    def __init__(self, row, error=None):
+        self.row, self.error, self.calls = row, error, []
+
+    def execute_query(self, query, parameters_=None, database_=None, routing_=None):
+        self.calls.append(("execute", routing_, parameters_))
+        if self.error is not None:
+            raise self.error
+        return [Record(self.row)], None, None
+
+    def session(self, **params):
+        return FakeSession(self, **params)
+
+
+def make_graph(driver, sanitize=False):
+    graph = ReadOnlyNeo4jGraph.__new__(ReadOnlyNeo4jGraph)
+    graph._driver, graph._database, graph.timeout, graph.sanitize = driver, "neo4j", None, sanitize
+    return graph
+
+
+def test_queries_are_routed_to_readers():
+    driver = FakeDriver({"n": 1})
+    assert make_graph(driver).query("RETURN 1 AS n") == [{"n": 1}]
+    assert driver.calls == [("execute", neo4j.RoutingControl.READ, {})]
+
+
+def test_sanitize_drops_long_lists():
+    driver = FakeDriver({"embedding": [0.1] * 200, "id": "CVE-2024-0001"})
+    assert make_graph(driver, sanitize=True).query("MATCH (n) RETURN n") == [{"id": "CVE-2024-0001"}]
+
+
+def test_implicit_transaction_statements_fall_back_to_a_read_session():
+    driver = FakeDriver({"n": 1}, error=IN_TRANSACTIONS)
+    result = make_graph(driver).query("CALL { RETURN 1 AS n } IN TRANSACTIONS RETURN n", {"x": 1})
+
+    assert result == [{"n": 1}]
+    assert driver.calls[-1] == ("session", {"database": "neo4j", "default_access_mode": neo4j.READ_ACCESS}, {"x": 1})
+
+
+def test_other_errors_are_raised():
+    error = Neo4jError._hydrate_neo4j(code="Neo.ClientError.Statement.SyntaxError", message="bad")
+    with pytest.raises(Neo4jError):
+        make_graph(FakeDriver({}, error=error)).query("RETURN")
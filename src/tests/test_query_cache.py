@@ -0,0 +1,74 @@
+from unittest.mock import MagicMock
+
+from src.utils.query_cache import QueryResultCache, bump_epoch
+
+
+def make_graph(*results):
+    graph = MagicMock()
+    graph.query.side_effect = list(results)
+    return graph
+
+
+def test_repeated_query_is_served_from_memory(tmp_path):
+    cache = QueryResultCache(tmp_path)
+    graph = make_graph([{"id": "CVE-2021-44228"}])
+
+    assert cache.query(graph, "MATCH (c:CVE {id: $id}) RETURN c.id AS id", {"id": "CVE-2021-44228"}) == [
+        {"id": "CVE-2021-44228"}
+    ]
+    assert cache.query(graph, "MATCH (c:CVE {id: $id}) RETURN c.id AS id", {"id": "CVE-2021-44228"}) == [
+        {"id": "CVE-2021-44228"}
+    ]
+    assert graph.query.call_count == 1
+    assert cache.stats["memory_hits"] == 1
+
+
+def test_parameters_are_part_of_the_key(tmp_path):
+    cache = QueryResultCache(tmp_path, disk=False)
+    graph = make_graph([{"n": 1}], [{"n": 2}])
+    assert cache.query(graph, "RETURN $n AS n", {"n": 1}) == [{"n": 1}]
+    assert cache.query(graph, "RETURN $n AS n", {"n": 2}) == [{"n": 2}]
+
+
+def test_disk_tier_is_shared_between_caches(tmp_path):
+    QueryResultCache(tmp_path).query(make_graph([{"n": 1}]), "RETURN 1 AS n")
+    other = QueryResultCache(tmp_path)
+    graph = make_graph()
+    assert other.query(graph, "RETURN 1 AS n") == [{"n": 1}]
+    assert other.stats["disk_hits"] == 1
+    graph.query.assert_not_called()
+
+
+def test_new_epoch_drops_cached_results(tmp_path):
+    cache = QueryResultCache(tmp_path)
+    other = QueryResultCache(tmp_path)
+    cache.query(make_graph([{"n": 1}]), "MATCH (c:CVE) RETURN count(c) AS n")
+
+    bump_epoch(tmp_path)
+    graph = make_graph([{"n": 2}])
+    assert cache.query(graph, "MATCH (c:CVE) RETURN count(c) AS n") == [{"n": 2}]
+    assert cache.stats["invalidations"] == 1
+    # A process that read the old epoch does not serve the old result from disk either.
+    assert other.query(make_graph([{"n": 2}]), "MATCH (c:CVE) RETURN count(c) AS n") == [{"n": 2}]
+
+
+def test_memory_tier_is_bounded(tmp_path):
+    cache = QueryResultCache(tmp_path, max_entries=2, disk=False)
+    graph = make_graph([{"n": 1}], [{"n": 2}], [{"n": 3}], [{"n": 1}])
+    for n in (1, 2, 3, 1):
+        cache.query(graph, f"RETURN {n} AS n")
+    assert graph.query.call_count == 4
+
+
+def test_disk_tier_is_bounded(tmp_path):
+    cache = QueryResultCache(tmp_path, max_entries=1, max_disk_entries=2)
+    graph = make_graph([{"n": 1}], [{"n": 2}], [{"n": 3}], [{"n": 1}])
+    for n in (1, 2, 3):
+        cache.query(graph, f"RETURN {n} AS n")
+    assert cache._db.execute("SELECT count(*) FROM results").fetchone()[0] == 2
+
+    other = QueryResultCache(tmp_path, max_entries=1, max_disk_entries=2)
+    assert other.query(graph, "RETURN 3 AS n") == [{"n": 3}]
+    assert other.query(graph, "RETURN 1 AS n") == [{"n": 1}]
+    assert other.stats["disk_hits"] == 1
+    assert graph.query.call_count == 4
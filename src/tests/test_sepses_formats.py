@@ -0,0 +1,96 @@
+import json
+
+import pytest
+import rdflib
+from rdflib.query import ResultRow
+from rdflib.term import Variable
+
+from test_sepses_server import make_context, make_ctx, technique_graph
+
+ATTACK = rdflib.Namespace("http://w3id.org/sepses/vocab/ref/attack#")
+
+
+def rows(labels, *values):
+    variables = [Variable(label) for label in labels]
+    return [ResultRow(dict(zip(variables, cells)), variables) for cells in values]
+
+
+T1566, T1059 = ATTACK.T1566, ATTACK.T1059
+MITIGATIONS = rows(
+    ["technique", "label", "mitigation"],
+    (T1566, rdflib.Literal("Phishing"), ATTACK.M1017),
+    (T1566, rdflib.Literal("Phishing"), ATTACK.M1054),
+    (T1059, rdflib.Literal("Command Shell"), ATTACK.M1038),
+)
+
+
+def test_group_table_groups_adjacent_rows_only(server):
+    assert server.group_table([["a", "1"], ["b", "2"], ["a", "3"]]) is None
+    key_width, groups = server.group_table([["a", "x", "1"], ["a", "x", "2"], ["b", "y", "3"], ["a", "x", "4"]])
+    assert key_width == 2
+    assert [len(group) for group in groups] == [2, 1, 1]
+
+
+def test_tsv_leaves_grouped_key_cells_empty(server):
+    formatted, shown = server.format_compact(MITIGATIONS, "tsv")
+    assert shown == 3
+    assert formatted.splitlines() == [
+        "technique\tlabel\tmitigation",
+        "attack:T1566\tPhishing\tattack:M1017",
+        "\t\tattack:M1054",
+        "attack:T1059\tCommand Shell\tattack:M1038",
+    ]
+
+
+def test_json_groups_keep_the_query_order(server):
+    unordered = [MITIGATIONS[0], MITIGATIONS[2], MITIGATIONS[1]]
+    document = json.loads(server.format_compact(unordered, "json")[0])
+    assert document == {
+        "columns": ["technique", "label", "mitigation"],
+        "rows": [
+            ["attack:T1566", "Phishing", "attack:M1017"],
+            ["attack:T1059", "Command Shell", "attack:M1038"],
+            ["attack:T1566", "Phishing", "attack:M1054"],
+        ],
+    }
+    grouped = json.loads(server.format_compact(MITIGATIONS, "json")[0])
+    assert grouped["key"] == ["technique", "label"]
+    assert grouped["groups"][0] == ["attack:T1566", "Phishing", [["attack:M1017"], ["attack:M1054"]]]
+
+
+def test_text_page_footer(server):
+    formatted = server.format_page(MITIGATIONS, False, limit=2, offset=10)
+    assert formatted.splitlines()[-1] == "[rows 11-12; has_more: true; next offset: 12]"
+    last = server.format_page(MITIGATIONS, False, limit=5, offset=0)
+    assert last.splitlines()[-1] == "[rows 1-3; has_more: false]"
+
+
+def test_json_page_state_is_part_of_the_document(server):
+    document = json.loads(server.format_page(MITIGATIONS, False, limit=2, offset=10, output_format="json"))
+    assert document["page"] == {"first": 11, "last": 12, "has_more": True, "next_offset": 12}
+    assert len(document["groups"][0][2]) == 2
+
+
+def test_empty_page_keeps_the_paging_state(server):
+    past_end = server.format_page([], False, limit=100, offset=200)
+    assert past_end.splitlines() == ["No results found.", "[rows: none from 201; has_more: false]"]
+    document = json.loads(server.format_page([], False, limit=100, offset=200, output_format="json"))
+    assert document == {"rows": [], "page": {"first": 201, "last": 200, "has_more": False}}
+
+
+@pytest.mark.parametrize("output_format", ["text", "json"])
+def test_truncation_marker(server, output_format):
+    formatted = server.format_sparql_results(MITIGATIONS, max_tokens=20, output_format=output_format)
+    if output_format == "json":
+        assert json.loads(formatted)["truncated"]["total"] == 3
+    else:
+        assert formatted.splitlines()[-1].startswith("[truncated: ")
+        assert "of 3 rows shown; token budget of 20 reached]" in formatted
+
+
+def test_listing_pages_through_a_tool(server):
+    ctx = make_ctx(make_context(technique_graph(), output_format="json"))
+    first = json.loads(server.tool_functions["get_all_techniques"](ctx=ctx, limit=2))
+    assert [row[1] for row in first["rows"]] == ["Command Shell", "Phishing"]
+    second = json.loads(server.tool_functions["get_all_techniques"](ctx=ctx, limit=2, offset=first["page"]["next_offset"]))
+    assert second["page"] == {"first": 3, "last": 3, "has_more": False}
@@ -0,0 +1,357 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+import rdflib
+
+ATTACK = rdflib.Namespace("http://w3id.org/sepses/vocab/ref/attack#")
+RESOURCE = rdflib.Namespace("http://w3id.org/sepses/resource/attack/")
+TITLE = rdflib.URIRef("http://purl.org/dc/terms/title")
+
+
+class Session:
+    """Stands in for an MCP ServerSession (only its identity is used)."""
+
+
+def make_context(graph=None, **settings):
+    return {
+        "graph": graph if graph is not None else rdflib.Graph(),
+        "metrics": {"queries": 0, "total_time": 0.0},
+        "max_tokens": 10000,
+        "output_format": "text",
+        "keyword_index": None,
+        "is_sparql_endpoint": False,
+        "rdf_file": "",
+        "store_path": "",
+        "sparql_endpoint": "",
+        **settings,
+    }
+
+
+def make_ctx(context, session=None):
+    return SimpleNamespace(request_context=SimpleNamespace(lifespan_context=context, session=session))
+
+
+def test_settings_are_per_session(server):
+    context = make_context()
+    first, second = make_ctx(context, Session()), make_ctx(context, Session())
+
+    assert server.tool_functions["set_max_tokens"](tokens=50, ctx=first) == "MAX_TOKENS set to 50"
+    server.tool_functions["set_output_format"](output_format="json", ctx=first)
+
+    assert server.session_setting(first, "max_tokens") == 50
+    assert server.session_setting(first, "output_format") == "json"
+    assert server.session_setting(second, "max_tokens") == 10000
+    assert server.session_setting(second, "output_format") == "text"
+    assert context["max_tokens"] == 10000 and context["output_format"] == "text"
+
+
+def test_settings_without_session_keep_the_defaults(server):
+    context = make_context()
+    ctx = make_ctx(context)
+    server.tool_functions["set_output_format"](output_format="tsv", ctx=ctx)
+    assert server.session_setting(ctx, "output_format") == "tsv"
+    assert context["output_format"] == "text"
+
+
+@pytest.mark.parametrize("session", [None, Session()])
+def test_reset_session_settings_restores_the_defaults(server, session):
+    context = make_context()
+    ctx = make_ctx(context, session)
+    server.tool_functions["set_max_tokens"](tokens=50, ctx=ctx)
+    server.tool_functions["set_output_format"](output_format="json", ctx=ctx)
+
+    server.tool_functions["reset_session_settings"](ctx=ctx)
+
+    assert server.session_setting(ctx, "max_tokens") == 10000
+    assert server.session_setting(ctx, "output_format") == "text"
+
+
+def test_lifespan_loads_once_off_the_event_loop(server, monkeypatch):
+    calls = []
+
+    def load(rdf_file, sparql_endpoint, store_path=""):
+        calls.append(threading.current_thread() is threading.main_thread())
+        return make_context()
+
+    monkeypatch.setattr(server, "load_triplestore", load)
+
+    async def session():
+        async with server.attack_triplestore_lifespan(server.mcp, "attack.ttl", "") as context:
+            await asyncio.sleep(0)
+            return context
+
+    async def scenario():
+        return await asyncio.gather(session(), session())
+
+    first, second = asyncio.run(scenario())
+    assert first is second
+    assert calls == [False]
+
+
+@pytest.mark.parametrize(
+    "query, form",
+    [
+        ("SELECT ?s WHERE { ?s ?p ?o }", "SELECT"),
+        ("PREFIX attack: <http://w3id.org/sepses/vocab/ref/attack#>\n# techniques\nconstruct { ?s a attack:Technique } WHERE { ?s a attack:Technique }", "CONSTRUCT"),
+        ("BASE <http://example.org/> DESCRIBE <T1566>", "DESCRIBE"),
+        ("ASK { ?s ?p ?o }", "ASK"),
+    ],
+)
+def test_query_form(server, query, form):
+    assert server.query_form(query) == form
+
+
+def test_query_form_rejects_other_text(server):
+    with pytest.raises(ValueError):
+        server.query_form("INSERT DATA { <a> <b> <c> }")
+
+
+class FakeResponse:
+    def __init__(self, content: bytes):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+@pytest.fixture
+def endpoint(server, monkeypatch):
+    """A SparqlEndpoint whose HTTP session records the Accept header and returns canned bodies."""
+    client = server.SparqlEndpoint("http://sparql.example/query", retries=0)
+    sent = []
+    bodies = {
+        "application/sparql-results+json": b'{"head": {"vars": ["s"]}, "results": {"bindings": '
+        b'[{"s": {"type": "uri", "value": "http://example.org/T1566"}}]}}',
+        "application/n-triples": b'<http://example.org/T1566> <http://purl.org/dc/terms/title> "Phishing" .\n',
+    }
+
+    def post(url, data, headers, timeout):
+        sent.append(headers["Accept"])
+        return FakeResponse(bodies[headers["Accept"]])
+
+    monkeypatch.setattr(client.session, "post", post)
+    client.sent = sent
+    return client
+
+
+def test_endpoint_parses_select_as_results_json(server, endpoint):
+    rows = server.result_rows(endpoint.query("SELECT ?s WHERE { ?s ?p ?o }"))
+    assert endpoint.sent == ["application/sparql-results+json"]
+    assert [str(row.s) for row in rows] == ["http://example.org/T1566"]
+
+
+def test_endpoint_parses_construct_as_graph(server, endpoint):
+    result = endpoint.query("CONSTRUCT { ?s ?p ?o } WHERE { ?s ?p ?o }")
+    assert endpoint.sent == ["application/n-triples"]
+    rows = server.result_rows(result)
+    assert [row.asdict() for row in rows] == [
+        {"subject": rdflib.URIRef("http://example.org/T1566"), "predicate": TITLE, "object": rdflib.Literal("Phishing")}
+    ]
+
+
+def test_text_to_sparql_formats_ask_and_construct(server):
+    graph = rdflib.Graph()
+    graph.add((RESOURCE["technique/T1566"], TITLE, rdflib.Literal("Phishing")))
+    ctx = make_ctx(make_context(graph))
+    text_to_sparql = server.tool_functions["text_to_sparql"]
+
+    assert text_to_sparql(prompt="ASK { ?s dcterms:title ?o }", ctx=ctx).startswith("answer: true")
+    constructed = text_to_sparql(prompt="CONSTRUCT { ?s dcterms:title ?o } WHERE { ?s dcterms:title ?o }", ctx=ctx)
+    assert constructed.startswith("subject: T1566 | predicate: title | object: Phishing")
+
+
+def test_store_without_oxigraph_names_the_extra(server, monkeypatch, tmp_path):
+    monkeypatch.setattr(server, "HAS_OXIGRAPH", False)
+    with pytest.raises(RuntimeError, match="`store` extra"):
+        server.open_store(str(tmp_path))
+    with pytest.raises(RuntimeError, match="`store` extra"):
+        server.build_store("attack.ttl", str(tmp_path / "store"))
+
+
+def technique_graph():
+    graph = rdflib.Graph()
+    for identifier, title in [("T1566", "Phishing"), ("T1598", "Phishing for Information"), ("T1059", "Command Shell")]:
+        node = RESOURCE[f"technique/{identifier}"]
+        graph.add((node, rdflib.RDF.type, ATTACK.Technique))
+        graph.add((node, TITLE, rdflib.Literal(title)))
+    return graph
+
+
+@pytest.mark.parametrize("indexed", [True, False])
+def test_keyword_tools_use_one_template_for_all_keywords(server, indexed):
+    graph = technique_graph()
+    context = make_context(graph, keyword_index=server.KeywordIndex(graph) if indexed else None)
+    ctx = make_ctx(context)
+    search = server.tool_functions["get_techniques_by_keyword"]
+    server.sparql_template.cache_clear()
+
+    phishing = search(ctx=ctx, keyword="phish")
+    assert [line.split(" | ")[1] for line in phishing.splitlines()] == [
+        "label: Phishing", "label: Phishing for Information"
+    ]
+    assert search(ctx=ctx, keyword="shell").endswith("label: Command Shell")
+    assert search(ctx=ctx, keyword="nothing") == "No results found."
+    assert server.sparql_template.cache_info().currsize == 1
+
+
+def test_with_candidates_leaves_the_prepared_query_unchanged(server):
+    graph = technique_graph()
+    template = server.sparql_template(
+        f"""SELECT ?t WHERE {{ {server.candidate_slot("t")} ?t a attack:Technique }} ORDER BY ?t"""
+    )
+    assert template.candidate_slots == {"t"}
+    t1566 = RESOURCE["technique/T1566"]
+
+    bound = graph.query(template.with_candidates({"t": [t1566]}))
+    assert [row.t for row in bound] == [t1566]
+    assert len(list(graph.query(template.with_candidates({})))) == 3
+    assert len(list(graph.query(template.with_candidates({"t": [t1566]})))) == 1
+    assert f"VALUES ?t {{ {t1566.n3()} }}" in template.render({}, {"t": [t1566]})
+    assert "VALUES" not in template.render({})
+
+
+def run_batch(server, ctx, calls):
+    async def scenario():
+        handler = server.mcp._tool_manager.get_tool("batch_execute")
+        return await asyncio.wait_for(handler.run({"calls": calls}, context=ctx), timeout=10)
+
+    return asyncio.run(scenario())
+
+
+def test_batch_validates_arguments_against_the_tool_schema(server):
+    ctx = make_ctx(make_context(technique_graph()), Session())
+    result = run_batch(server, ctx, [
+        {"tool": "get_techniques_by_tactic", "args": {"tactic_name": 5}},
+        {"tool": "get_techniques_by_keyword", "args": {}},
+        {"tool": "batch_execute", "args": {"calls": []}},
+        {"tool": "get_techniques_by_keyword", "args": ["phish"]},
+    ])
+    sections = result.split("\n\n### ")
+    assert "valid string" in sections[0]
+    assert "keyword" in sections[1] and "Field required" in sections[1]
+    assert "unknown tool 'batch_execute'" in sections[2]
+    assert "'args' for get_techniques_by_keyword must be an object" in sections[3]
+
+
+def test_batch_calls_take_slots_and_are_accounted(server):
+    server.configure(server.parser.parse_args(["--max-concurrency", "1"]))
+    ctx = make_ctx(make_context(technique_graph()), Session())
+    completed = server.pool_stats["completed"]
+
+    result = run_batch(server, ctx, [
+        {"tool": "get_techniques_by_keyword", "args": {"keyword": "phish"}},
+        {"sparql": "SELECT ?t WHERE { ?t a attack:Technique } ORDER BY ?t"},
+    ])
+
+    assert "label: Phishing" in result and "t: T1059" in result
+    # Only the two sub-calls hold a slot; the batch itself does not (it would block them with one slot).
+    assert server.pool_stats["completed"] - completed == 2
+    stats = server.client_stats[server._client_key(ctx)]
+    assert stats["tools"] == {"batch_execute": 1, "get_techniques_by_keyword": 1, "execute_sparql_query": 1}
+
+
+def test_template_rejects_parameters_named_like_variables(server):
+    with pytest.raises(ValueError, match="platform"):
+        server.SparqlTemplate("SELECT ?platform WHERE { ?t attack:platform ?platform FILTER(?platform = $platform) }")
+
+
+def test_techniques_by_platform_binds_the_platform_name(server):
+    graph = technique_graph()
+    graph.add((RESOURCE["technique/T1566"], ATTACK.platform, rdflib.Literal("Windows")))
+    graph.add((RESOURCE["technique/T1059"], ATTACK.platform, rdflib.Literal("Linux")))
+    result = server.tool_functions["get_techniques_by_platform"](platform="win", ctx=make_ctx(make_context(graph)))
+    assert result == "technique: T1566 | label: Phishing | platform: Windows"
+
+
+def placeholder(annotation):
+    return {str: "x", int: 1, float: 1.0, bool: False}.get(annotation, ["CVE-2020-0001"])
+
+
+# Tools whose required arguments must be valid for the call to succeed at all.
+VALID_ARGUMENTS = {
+    "set_output_format": {"output_format": "text"},
+    "execute_sparql_query": {"query": "SELECT ?t WHERE { ?t a attack:Technique }"},
+    "text_to_sparql": {"prompt": "SELECT ?t WHERE { ?t a attack:Technique }"},
+}
+# These CVE queries read named graphs (GRAPH ?g), which a plain local rdflib
+# Graph cannot answer; they only work against a SPARQL endpoint or a dataset.
+LOCAL_MODE_FAILURES = {
+    "get_all_cves", "get_cve_by_id", "search_cves_by_keyword", "get_cves_by_cvss_score",
+    "get_high_severity_cves", "get_critical_cves", "get_recent_cves", "get_cves_by_year",
+}
+
+
+def test_every_tool_template_prepares(server):
+    """Each tool's query is parsed on first use; run them all once on an empty graph."""
+    import inspect
+
+    ctx = make_ctx(make_context())
+    for name, fn in server.tool_functions.items():
+        if inspect.iscoroutinefunction(fn):
+            continue
+        parameters = inspect.signature(fn).parameters.values()
+        kwargs = {
+            parameter.name: placeholder(parameter.annotation)
+            for parameter in parameters
+            if parameter.default is inspect.Parameter.empty and parameter.name != "ctx"
+        }
+        kwargs.update(VALID_ARGUMENTS.get(name, {}))
+        if "ctx" in inspect.signature(fn).parameters:
+            kwargs["ctx"] = ctx
+        result = str(fn(**kwargs))
+        assert "missing query parameters" not in result, name
+        if name in LOCAL_MODE_FAILURES:
+            assert result.startswith("Error executing SPARQL query"), name
+        else:
+            assert not result.startswith("Error"), f"{name}: {result}"
+
+
+def dossier_graph():
+    cve_ns = rdflib.Namespace("http://w3id.org/sepses/vocab/ref/cve#")
+    cwe_ns = rdflib.Namespace("http://w3id.org/sepses/vocab/ref/cwe#")
+    capec_ns = rdflib.Namespace("http://w3id.org/sepses/vocab/ref/capec#")
+    data = rdflib.Namespace("http://w3id.org/sepses/resource/")
+    graph = rdflib.Graph()
+    cve, cwe, capec = data["cve/CVE-2021-44228"], data["cwe/CWE-917"], data["capec/CAPEC-136"]
+    technique, mitigation = RESOURCE["technique/T1190"], RESOURCE["mitigation/M1048"]
+    graph.add((cve, rdflib.RDF.type, cve_ns.CVE))
+    graph.add((cve, cve_ns.id, rdflib.Literal("CVE-2021-44228")))
+    graph.add((cve, cve_ns.hasCWE, cwe))
+    graph.add((cwe, cwe_ns.id, rdflib.Literal("CWE-917")))
+    # CAPEC -> CWE direction; the query also accepts cwe:hasCAPEC.
+    graph.add((capec, capec_ns.hasCWE, cwe))
+    graph.add((capec, capec_ns.id, rdflib.Literal("CAPEC-136")))
+    graph.add((capec, TITLE, rdflib.Literal("LDAP Injection")))
+    graph.add((technique, ATTACK.hasCAPEC, capec))
+    graph.add((technique, TITLE, rdflib.Literal("Exploit Public-Facing Application")))
+    graph.add((technique, ATTACK.hasMitigation, mitigation))
+    graph.add((mitigation, TITLE, rdflib.Literal("Application Isolation and Sandboxing")))
+    # A CVE without a weakness still gets a (short) dossier.
+    other = data["cve/CVE-2020-0001"]
+    graph.add((other, cve_ns.id, rdflib.Literal("CVE-2020-0001")))
+    return graph
+
+
+def test_cve_dossier_on_a_local_graph(server):
+    import json
+
+    ctx = make_ctx(make_context(dossier_graph()))
+    result = json.loads(server.tool_functions["get_cve_dossier"](
+        cve_ids=["cve-2021-44228", "CVE-2020-0001", "CVE-1999-0001"], ctx=ctx
+    ))
+    assert result["not_found"] == ["CVE-1999-0001"]
+    assert result["dossiers"]["CVE-2020-0001"] == {"cwes": []}
+    assert result["dossiers"]["CVE-2021-44228"] == {"cwes": [{
+        "id": "CWE-917",
+        "capecs": [{
+            "id": "CAPEC-136",
+            "label": "LDAP Injection",
+            "techniques": [{
+                "id": "T1190",
+                "label": "Exploit Public-Facing Application",
+                "mitigations": [{"id": "M1048", "label": "Application Isolation and Sandboxing"}],
+            }],
+        }],
+    }]}
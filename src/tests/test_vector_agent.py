@@ -0,0 +1,110 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("langchain_neo4j")
+
+
+@pytest.fixture
+def vector_agent(import_agent):
+    return import_agent("src.agents.vector_agent")
+
+
+@pytest.mark.parametrize(
+    "question, severities",
+    [
+        ("critical severity CVEs in OpenSSL", ["CRITICAL"]),
+        ("CVEs with severity: critical", ["CRITICAL"]),
+        ("high-risk or low severity bugs", ["HIGH", "LOW"]),
+        ("moderate severity issues", ["MEDIUM"]),
+        ("vulnerabilities affecting critical infrastructure", None),
+        ("what is the most critical CVE", None),
+    ],
+)
+def test_severity_requires_severity_context(vector_agent, question, severities):
+    assert vector_agent.extract_metadata_filters(question).get("severities") == severities
+
+
+def test_score_and_year_filters(vector_agent):
+    filters = vector_agent.extract_metadata_filters("CVEs with a CVSS score above 7.5 published in 2023")
+    assert filters == {"min_score": 7.5, "published_after": "2023-01-01", "published_before": "2024-01-01"}
+    assert vector_agent.extract_metadata_filters("score between 4 and 6 since 2020") == {
+        "min_score": 4.0,
+        "max_score": 6.0,
+        "published_after": "2020-01-01",
+    }
+
+
+def test_build_filter_clause(vector_agent):
+    clause, params = vector_agent.build_filter_clause("chunk", {"severities": ["HIGH"], "min_score": 7.0})
+    assert clause == "chunk.severity IN $severities AND chunk.score >= $min_score"
+    assert params == {"severities": ["HIGH"], "min_score": 7.0}
+    assert vector_agent.build_filter_clause("chunk", {}) == ("", {})
+
+
+def test_merge_keeps_strong_keyword_hits(vector_agent):
+    vector_rows = [{"text": f"v{i}", "score": 0.9 - i * 0.1} for i in range(4)]
+    keyword_rows = [{"text": "k0", "score": 12.0}, {"text": "k1", "score": 3.0}]
+    merged = vector_agent.merge_by_normalized_score(vector_rows, keyword_rows, 4)
+    # Each list's best hit normalizes to 1.0, so the top keyword hit is not cut off.
+    assert merged[:2] == ["v0", "k0"]
+    assert len(merged) == 4
+
+
+def test_merge_deduplicates_by_best_score(vector_agent):
+    merged = vector_agent.merge_by_normalized_score(
+        [{"text": "a", "score": 0.5}, {"text": "b", "score": 0.25}],
+        [{"text": "b", "score": 2.0}],
+        3,
+    )
+    assert merged == ["a", "b"]
+    assert vector_agent.merge_by_normalized_score([], [], 4) == []
+
+
+def test_extract_identifiers(vector_agent):
+    assert vector_agent.extract_identifiers("cve-2024-1234 and CWE-79, again CVE-2024-1234; capec-18") == [
+        "CVE-2024-1234",
+        "CWE-79",
+        "CAPEC-18",
+    ]
+
+
+def test_unmatched_identifiers_fall_back(vector_agent):
+    rows = [{"output": "...", "entity_id": "cve-2024-1234"}]
+    assert vector_agent.unmatched_identifiers(["CVE-2024-1234", "CWE-79", "CAPEC-18"], rows) == ["CWE-79", "CAPEC-18"]
+    assert vector_agent.unmatched_identifiers(["CWE-79"], []) == ["CWE-79"]
+
+
+def test_structured_retriever_fuzzy_fallback(vector_agent, fake_settings, monkeypatch):
+    calls = []
+
+    def query(graph, query, params):
+        calls.append(params)
+        if "ids" in params:
+            return [{"output": "exact CVE", "entity_id": "CVE-2024-1234"}]
+        return [{"output": f"fuzzy {params['query']}", "entity_id": "x"}]
+
+    fake_settings.query_cache.query.side_effect = query
+    no_entities = SimpleNamespace(invoke=lambda _: SimpleNamespace(entity_values=[]))
+    monkeypatch.setattr(vector_agent, "entity_chain", no_entities)
+    output = vector_agent.structured_retriever("Is CVE-2024-1234 an instance of CWE-79?")
+    assert calls[0]["ids"] == ["CVE-2024-1234", "CWE-79"]
+    assert [params["query"] for params in calls[1:]] == ["CWE~2 AND 79~2"]
+    assert output.splitlines() == ["exact CVE", "fuzzy CWE~2 AND 79~2"]
+
+
+def test_structured_retriever_filters_only_fuzzy_matches(vector_agent, fake_settings, monkeypatch):
+    calls = []
+
+    def query(graph, query, params):
+        calls.append((query, params))
+        return []
+
+    fake_settings.query_cache.query.side_effect = query
+    entities = SimpleNamespace(invoke=lambda _: SimpleNamespace(entity_values=["OpenSSL"]))
+    monkeypatch.setattr(vector_agent, "entity_chain", entities)
+    vector_agent.structured_retriever("Is CVE-2024-1234 a critical OpenSSL bug?", {"severities": ["CRITICAL"]})
+
+    (exact_query, exact_params), (fuzzy_query, fuzzy_params) = calls[0], calls[1]
+    assert "severities" not in exact_params and "$severities" not in exact_query
+    assert fuzzy_params["severities"] == ["CRITICAL"] and "chunk.severity IN $severities" in fuzzy_query